@@ -6,8 +6,8 @@ from alembic import context
 from sqlalchemy import engine_from_config
 
 
-# Ensure project root is on sys.path
-ROOT = Path(__file__).resolve().parents[2]
+# Ensure project root (mentra-backend/) is on sys.path
+ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
@@ -15,7 +15,9 @@ from dotenv import load_dotenv  # type: ignore
 load_dotenv()
 
 from app.db.base import Base  # type: ignore
+from app.models import entities as _entities  # type: ignore # noqa: F401 - register models for autogenerate
 from app.core.config import settings  # type: ignore
+from app.db.fts import include_object  # type: ignore
 
 
 config = context.config
@@ -31,6 +33,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_object=include_object,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -40,6 +43,14 @@ def run_migrations_offline() -> None:
 
 
 def run_migrations_online() -> None:
+    # Allow callers (e.g. tests) to hand in an open connection via Config.attributes
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        context.configure(connection=connection, target_metadata=target_metadata, include_object=include_object)
+        with context.begin_transaction():
+            context.run_migrations()
+        return
+
     configuration = config.get_section(config.config_ini_section) or {}
     configuration["sqlalchemy.url"] = settings.DATABASE_URL
     connectable = engine_from_config(
@@ -49,7 +60,7 @@ def run_migrations_online() -> None:
     )
 
     with connectable.connect() as connection:
-        context.configure(connection=connection, target_metadata=target_metadata)
+        context.configure(connection=connection, target_metadata=target_metadata, include_object=include_object)
 
         with context.begin_transaction():
             context.run_migrations()
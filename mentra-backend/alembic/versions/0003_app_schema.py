@@ -0,0 +1,165 @@
+"""app schema and lookup indexes
+
+Replaces the placeholder tables from 0001/0002 (users, sessions, transcript_chunks, ...),
+which the app never used, with the tables declared in app/models/entities.py, and adds
+indexes for the per-session and proposal lookups.
+
+Databases bootstrapped by Base.metadata.create_all() already have the app tables; those
+are left in place and only the missing indexes are created, so such a database can be
+stamped at 0002_full_schema and upgraded.
+
+Revision ID: 0003_app_schema
+Revises: 0002_full_schema
+Create Date: 2026-10-18
+
+"""
+from typing import List, Sequence, Tuple, Union
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0003_app_schema"
+down_revision: Union[str, None] = "0002_full_schema"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+LEGACY_TABLES = ["quiz_attempts", "flashcards", "assets", "transcript_chunks", "sessions", "users"]
+
+# (index name, table, columns)
+INDEXES: List[Tuple[str, str, List[str]]] = [
+    ("ix_transcript_chunk_session_ts", "transcript_chunk", ["session_id", "ts_start"]),
+    ("ix_asset_session_id", "asset", ["session_id"]),
+    ("ix_flashcard_session_created", "flashcard", ["session_id", "created_at"]),
+    ("ix_quiz_attempt_session_id", "quiz_attempt", ["session_id"]),
+    ("ix_session_course_course_id", "session_course", ["course_id"]),
+    ("ix_flashcard_course_flashcard_id", "flashcard_course", ["flashcard_id"]),
+    ("ix_flashcard_course_course_id", "flashcard_course", ["course_id"]),
+    ("ix_proposed_calendar_item_message_id", "proposed_calendar_item", ["message_id"]),
+    ("ix_proposed_calendar_item_status_created", "proposed_calendar_item", ["status", "created_at"]),
+]
+
+
+def _app_tables() -> List[Tuple[str, list]]:
+    return [
+        ("session", [
+            sa.Column("id", sa.String(), primary_key=True),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.Column("title", sa.String(), nullable=True),
+            sa.Column("is_active", sa.Boolean(), nullable=False, server_default=sa.text("1")),
+            sa.Column("summary_json", sa.Text(), nullable=True),
+        ]),
+        ("transcript_chunk", [
+            sa.Column("id", sa.String(), primary_key=True),
+            sa.Column("session_id", sa.String(), sa.ForeignKey("session.id", ondelete="CASCADE"), nullable=False),
+            sa.Column("ts_start", sa.Float(), nullable=True),
+            sa.Column("ts_end", sa.Float(), nullable=True),
+            sa.Column("text", sa.Text(), nullable=False),
+            sa.Column("bookmarked", sa.Boolean(), nullable=False, server_default=sa.text("0")),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+        ]),
+        ("asset", [
+            sa.Column("id", sa.String(), primary_key=True),
+            sa.Column("session_id", sa.String(), sa.ForeignKey("session.id", ondelete="CASCADE"), nullable=False),
+            sa.Column("kind", sa.String(), nullable=False),
+            sa.Column("path", sa.String(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+        ]),
+        ("flashcard", [
+            sa.Column("id", sa.String(), primary_key=True),
+            sa.Column("session_id", sa.String(), sa.ForeignKey("session.id", ondelete="CASCADE"), nullable=False),
+            sa.Column("type", sa.String(), nullable=False),
+            sa.Column("question", sa.Text(), nullable=False),
+            sa.Column("answer", sa.Text(), nullable=False),
+            sa.Column("source_ts", sa.Float(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+        ]),
+        ("quiz_attempt", [
+            sa.Column("id", sa.String(), primary_key=True),
+            sa.Column("session_id", sa.String(), sa.ForeignKey("session.id", ondelete="CASCADE"), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.Column("questions_json", sa.Text(), nullable=True),
+            sa.Column("score", sa.Float(), nullable=True),
+        ]),
+        ("user", [
+            sa.Column("id", sa.String(), primary_key=True),
+            sa.Column("email", sa.String(), nullable=False, unique=True),
+        ]),
+        ("course", [
+            sa.Column("id", sa.String(), primary_key=True),
+            sa.Column("name", sa.String(), nullable=False, unique=True),
+            sa.Column("color", sa.String(), nullable=True),
+            sa.Column("aliases_json", sa.Text(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+        ]),
+        ("session_course", [
+            sa.Column("id", sa.String(), primary_key=True),
+            sa.Column("session_id", sa.String(), sa.ForeignKey("session.id", ondelete="CASCADE"), nullable=False),
+            sa.Column("course_id", sa.String(), sa.ForeignKey("course.id", ondelete="CASCADE"), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.UniqueConstraint("session_id", name="uix_session_course_session"),
+        ]),
+        ("flashcard_course", [
+            sa.Column("id", sa.String(), primary_key=True),
+            sa.Column("flashcard_id", sa.String(), sa.ForeignKey("flashcard.id", ondelete="CASCADE"), nullable=False),
+            sa.Column("course_id", sa.String(), sa.ForeignKey("course.id", ondelete="CASCADE"), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+        ]),
+        ("calendar_event", [
+            sa.Column("id", sa.String(), primary_key=True),
+            sa.Column("title", sa.String(), nullable=False),
+            sa.Column("start", sa.DateTime(), nullable=False),
+            sa.Column("duration_min", sa.Integer(), nullable=False),
+            sa.Column("location", sa.String(), nullable=True),
+            sa.Column("description", sa.Text(), nullable=True),
+            sa.Column("tags_json", sa.Text(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+        ]),
+        ("proposed_calendar_item", [
+            sa.Column("id", sa.String(), primary_key=True),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.Column("source", sa.String(), nullable=False),
+            sa.Column("message_id", sa.String(), nullable=True),
+            sa.Column("proposer", sa.String(), nullable=True),
+            sa.Column("kind", sa.String(), nullable=True),
+            sa.Column("title", sa.String(), nullable=True),
+            sa.Column("start", sa.DateTime(), nullable=True),
+            sa.Column("duration_min", sa.Integer(), nullable=True),
+            sa.Column("location", sa.String(), nullable=True),
+            sa.Column("description", sa.Text(), nullable=True),
+            sa.Column("professor_email", sa.String(), nullable=True),
+            sa.Column("course_id", sa.String(), nullable=True),
+            sa.Column("confidence", sa.Float(), nullable=True),
+            sa.Column("raw", sa.Text(), nullable=True),
+            sa.Column("status", sa.String(), nullable=False),
+        ]),
+    ]
+
+
+def upgrade() -> None:
+    insp = sa.inspect(op.get_bind())
+    existing = set(insp.get_table_names())
+
+    for name in LEGACY_TABLES:
+        if name in existing:
+            op.drop_table(name)
+
+    for name, cols in _app_tables():
+        if name not in existing:
+            op.create_table(name, *cols)
+
+    insp = sa.inspect(op.get_bind())
+    # Superseded by the (status, created_at) composite index
+    if any(ix["name"] == "ix_proposed_calendar_item_status" for ix in insp.get_indexes("proposed_calendar_item")):
+        op.drop_index("ix_proposed_calendar_item_status", table_name="proposed_calendar_item")
+    for ix_name, table, cols in INDEXES:
+        if not any(ix["name"] == ix_name for ix in insp.get_indexes(table)):
+            op.create_index(ix_name, table, cols, unique=False)
+
+
+def downgrade() -> None:
+    # Only the indexes are reverted; app tables hold live data and the legacy
+    # placeholder tables were never used, so neither is dropped nor recreated.
+    for ix_name, table, _ in reversed(INDEXES):
+        op.drop_index(ix_name, table_name=table)
+    op.create_index("ix_proposed_calendar_item_status", "proposed_calendar_item", ["status"], unique=False)
@@ -0,0 +1,32 @@
+"""transcript chunk idempotency key
+
+Revision ID: 0004_chunk_key
+Revises: 0003_app_schema
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0004_chunk_key"
+down_revision: Union[str, None] = "0003_app_schema"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    insp = sa.inspect(op.get_bind())
+    cols = {c["name"] for c in insp.get_columns("transcript_chunk")}
+    if "chunk_key" not in cols:
+        op.add_column("transcript_chunk", sa.Column("chunk_key", sa.String(), nullable=True))
+    # Existing rows keep a NULL key, which never conflicts
+    if not any(ix["name"] == "uix_transcript_chunk_session_key" for ix in insp.get_indexes("transcript_chunk")):
+        op.create_index("uix_transcript_chunk_session_key", "transcript_chunk", ["session_id", "chunk_key"], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index("uix_transcript_chunk_session_key", table_name="transcript_chunk")
+    with op.batch_alter_table("transcript_chunk") as batch:
+        batch.drop_column("chunk_key")
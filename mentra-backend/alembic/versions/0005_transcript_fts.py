@@ -0,0 +1,28 @@
+"""transcript full-text index
+
+SQLite: FTS5 external-content table + sync triggers. Postgres: generated tsvector column + GIN.
+DDL lives in app/db/fts.py so startup (ensure_fts) and migrations stay identical.
+
+Revision ID: 0005_transcript_fts
+Revises: 0004_chunk_key
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+from alembic import op
+
+from app.db.fts import drop_fts, install_fts
+
+
+revision: str = "0005_transcript_fts"
+down_revision: Union[str, None] = "0004_chunk_key"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    install_fts(op.get_bind())
+
+
+def downgrade() -> None:
+    drop_fts(op.get_bind())
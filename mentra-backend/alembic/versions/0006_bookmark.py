@@ -0,0 +1,37 @@
+"""bookmark ranges with tags
+
+Revision ID: 0006_bookmark
+Revises: 0005_transcript_fts
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0006_bookmark"
+down_revision: Union[str, None] = "0005_transcript_fts"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    insp = sa.inspect(op.get_bind())
+    if "bookmark" not in insp.get_table_names():
+        op.create_table(
+            "bookmark",
+            sa.Column("id", sa.String(), primary_key=True),
+            sa.Column("session_id", sa.String(), sa.ForeignKey("session.id", ondelete="CASCADE"), nullable=False),
+            sa.Column("ts_start", sa.Float(), nullable=False),
+            sa.Column("ts_end", sa.Float(), nullable=False),
+            sa.Column("tag", sa.String(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+        )
+    if not any(ix["name"] == "ix_bookmark_session_tag" for ix in sa.inspect(op.get_bind()).get_indexes("bookmark")):
+        op.create_index("ix_bookmark_session_tag", "bookmark", ["session_id", "tag"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_bookmark_session_tag", table_name="bookmark")
+    op.drop_table("bookmark")
@@ -0,0 +1,31 @@
+"""session summary watermark for incremental summaries
+
+Revision ID: 0007_summary_watermark
+Revises: 0006_bookmark
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0007_summary_watermark"
+down_revision: Union[str, None] = "0006_bookmark"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    cols = {c["name"] for c in sa.inspect(op.get_bind()).get_columns("session")}
+    with op.batch_alter_table("session") as batch:
+        if "summary_cursor" not in cols:
+            batch.add_column(sa.Column("summary_cursor", sa.String(), nullable=True))
+        if "summary_chunk_count" not in cols:
+            batch.add_column(sa.Column("summary_chunk_count", sa.Integer(), nullable=False, server_default=sa.text("0")))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("session") as batch:
+        batch.drop_column("summary_chunk_count")
+        batch.drop_column("summary_cursor")
@@ -0,0 +1,45 @@
+"""background generation jobs
+
+Revision ID: 0008_job
+Revises: 0007_summary_watermark
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0008_job"
+down_revision: Union[str, None] = "0007_summary_watermark"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    insp = sa.inspect(op.get_bind())
+    if "job" not in insp.get_table_names():
+        op.create_table(
+            "job",
+            sa.Column("id", sa.String(), primary_key=True),
+            sa.Column("kind", sa.String(), nullable=False),
+            sa.Column("session_id", sa.String(), nullable=True),
+            sa.Column("status", sa.String(), nullable=False),
+            sa.Column("params_json", sa.Text(), nullable=True),
+            sa.Column("result_json", sa.Text(), nullable=True),
+            sa.Column("error_json", sa.Text(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.Column("started_at", sa.DateTime(), nullable=True),
+            sa.Column("finished_at", sa.DateTime(), nullable=True),
+        )
+    existing = {ix["name"] for ix in sa.inspect(op.get_bind()).get_indexes("job")}
+    if "ix_job_session_created" not in existing:
+        op.create_index("ix_job_session_created", "job", ["session_id", "created_at"], unique=False)
+    if "ix_job_status" not in existing:
+        op.create_index("ix_job_status", "job", ["status"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_job_status", table_name="job")
+    op.drop_index("ix_job_session_created", table_name="job")
+    op.drop_table("job")
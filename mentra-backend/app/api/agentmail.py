@@ -8,11 +8,12 @@ from uuid import uuid4
 from email import message_from_bytes, policy
 from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from icalendar import Calendar
+from sqlalchemy import select
 
 from app.core.security import require_bearer
 from app.core.config import settings
 from app.core.events import event_bus, build_event
-from app.db.session import get_session
+from app.db.session import get_async_session, get_session
 from app.models.entities import ProposedCalendarItem, CalendarEvent
 
 
@@ -92,9 +93,9 @@ async def email_inbound(request: Request):
     # Fallback to Gemini extraction if no ICS
     if not extracted:
         try:
-            from app.services.email_extract import extract_from_email
+            from app.services.email_extract import extract_from_email_async
 
-            parsed = extract_from_email(subject, body)
+            parsed = await extract_from_email_async(subject, body)
             extracted = parsed if isinstance(parsed, dict) else None
         except Exception:
             extracted = None
@@ -109,9 +110,9 @@ async def email_inbound(request: Request):
     prof_email = (extracted or {}).get("professor_hint") or from_addr
     confidence = float((extracted or {}).get("confidence") or (0.9 if extracted else 0.5))
 
-    with get_session() as db:
+    async with get_async_session() as adb:
         # Deduplicate by message_id if already proposed
-        exists = db.query(ProposedCalendarItem).filter(ProposedCalendarItem.message_id == message_id).first()
+        exists = (await adb.execute(select(ProposedCalendarItem).where(ProposedCalendarItem.message_id == message_id))).scalars().first()
         if exists:
             return {"status": "duplicate", "proposal_id": exists.id}
 
@@ -131,8 +132,8 @@ async def email_inbound(request: Request):
             raw=raw_json,
             status="pending",
         )
-        db.add(prop)
-        db.commit()
+        adb.add(prop)
+        await adb.commit()
         pid = prop.id
 
     # Notify listeners to ask for confirmation
@@ -173,8 +174,8 @@ def list_proposals(status: str = Query("pending"), __: bool = Depends(require_be
 
 @router.post("/proposals/{proposal_id}/confirm")
 async def confirm_proposal(proposal_id: str, __: bool = Depends(require_bearer)):
-    with get_session() as db:
-        p = db.query(ProposedCalendarItem).filter(ProposedCalendarItem.id == proposal_id).first()
+    async with get_async_session() as adb:
+        p = await adb.get(ProposedCalendarItem, proposal_id)
         if not p or p.status != "pending":
             raise HTTPException(status_code=404, detail="proposal not found")
         if not p.title or not p.start or not p.duration_min:
@@ -188,9 +189,9 @@ async def confirm_proposal(proposal_id: str, __: bool = Depends(require_bearer))
             description=p.description or "",
             tags_json=json.dumps({"source": "agentmail", "proposal_id": p.id}),
         )
-        db.add(ev)
+        adb.add(ev)
         p.status = "accepted"
-        db.commit()
+        await adb.commit()
 
     # Notify
     await event_bus.broadcast(build_event("proposal.confirmed", None, None, {"proposal_id": p.id, "event_id": ev.id, "title": p.title}))
@@ -199,12 +200,12 @@ async def confirm_proposal(proposal_id: str, __: bool = Depends(require_bearer))
 
 @router.post("/proposals/{proposal_id}/reject")
 async def reject_proposal(proposal_id: str, __: bool = Depends(require_bearer)):
-    with get_session() as db:
-        p = db.query(ProposedCalendarItem).filter(ProposedCalendarItem.id == proposal_id).first()
+    async with get_async_session() as adb:
+        p = await adb.get(ProposedCalendarItem, proposal_id)
         if not p or p.status != "pending":
             raise HTTPException(status_code=404, detail="proposal not found")
         p.status = "rejected"
-        db.commit()
+        await adb.commit()
     # Notify
     await event_bus.broadcast(build_event("proposal.rejected", None, None, {"proposal_id": p.id, "title": p.title}))
     return {"status": "success"}
@@ -1,22 +1,39 @@
 from __future__ import annotations
 
+import asyncio
 import json
-from typing import Any, Dict, List, Optional
+import math
+from typing import Any, AsyncIterator, Dict, List, Literal, Optional, Tuple
 from uuid import uuid4
 
-from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile, BackgroundTasks
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, Request, UploadFile, BackgroundTasks
 from fastapi import status
-from fastapi.responses import JSONResponse
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi import WebSocket, WebSocketDisconnect
+from pydantic import ValidationError
+from sqlalchemy import select
 
-from app.core.security import require_bearer, require_webhook
+from app.core.security import require_bearer, require_webhook, api_error
+from app.core.schemas import WebhookChunk, WebhookIn
 from app.core.config import settings
-from app.core.events import event_bus, build_event
-from app.db.session import get_session
-from app.models.entities import Session, TranscriptChunk, Asset, Flashcard, Course, SessionCourse, FlashcardCourse, CalendarEvent
-from app.services import llm_service
-from app.services.transcribe_service import transcribe_wav_bytes
-from app.services.vision_service import analyze_image
+from app.core.events import event_bus, build_event, format_sse
+from app.db.session import get_async_session, get_session
+from app.models.entities import Session, TranscriptChunk, Asset, Flashcard, Course, SessionCourse, CalendarEvent
+from app.services import flashcard_service, gemini_provider, llm_service, summary_service, transcript_service
+from app.services.circuit_breaker import breakers
+from app.services.transcript_cache import transcript_cache
+from app.services.ingest_queue import ingest_queue
+from app.services.audio_stream import AudioStream, Segment, wav_duration
+from app.services.live_audio import LiveTranscriber
+from app.services.job_service import job_runner, job_view
+from app.services.llm_cache import llm_cache
+from app.services.llm_scheduler import llm_scheduler
+from app.services.retrieval import chunk_index, relevant_context_async
+from app.services.single_flight import flight_key, single_flight
+from app.services.transcript_service import CursorError, audio_clock, bulk_insert_chunks, iter_timeline, parse_fields, search_chunks, timeline_page
+from app.services.transcribe_service import transcribe_wav_bytes_async
+from app.services.vision_service import analyze_image_async
 
 
 router = APIRouter()
@@ -41,94 +58,132 @@ def create_session(payload: Dict[str, Any], background_tasks: BackgroundTasks, _
 
 @router.post("/webhooks/mentra")
 def webhook_ingest(body: Dict[str, Any], background_tasks: BackgroundTasks, __: bool = Depends(require_webhook)):
-    sid = body.get("session_id") or str(uuid4())
-    chunks = body.get("chunks", [])
+    try:
+        payload = WebhookIn.model_validate({**body, "session_id": body.get("session_id") or str(uuid4())})
+    except ValidationError as e:
+        api_error(f"Invalid webhook payload: {e.error_count()} error(s)", code="invalid_payload", status_code=422)
+    sid = payload.session_id
+    if settings.INGEST_WRITE_BEHIND and ingest_queue.enqueue(sid, payload.chunks):
+        # Write-behind: the background writer upserts the session and group-commits
+        background_tasks.add_task(event_bus.broadcast, build_event("chunk.saved", sid, f"{len(payload.chunks)} chunks queued"))
+        return {"ok": True, "count": len(payload.chunks), "queued": True}
     with get_session() as db:
         # upsert session for robustness
         if not db.get(Session, sid):
             db.add(Session(id=sid, title="Imported", is_active=True))
             db.flush()
-        for c in chunks:
-            db.add(
-                TranscriptChunk(
-                    session_id=sid,
-                    text=str(c.get("text", "")),
-                    ts_start=float(c.get("ts_start", 0)),
-                    ts_end=float(c.get("ts_end", 0)),
-                    bookmarked=bool(c.get("bookmarked", False)),
-                )
-            )
+        chunk_ids = bulk_insert_chunks(db, sid, payload.chunks)
         db.commit()
+    # Retried chunks (same chunk_id / content) are skipped by the insert
+    duplicates = len(payload.chunks) - len(chunk_ids)
     # Notify
-    background_tasks.add_task(event_bus.broadcast, build_event("chunk.saved", sid, f"{len(chunks)} chunks ingested"))
-    return {"ok": True}
+    background_tasks.add_task(event_bus.broadcast, build_event("chunk.saved", sid, f"{len(chunk_ids)} chunks ingested"))
+    return {"ok": True, "count": len(chunk_ids), "duplicates": duplicates}
+
+
+async def _ndjson_lines(request: Request, max_line_bytes: int):
+    # Split the body stream on newlines without ever holding more than one partial line
+    buf = bytearray()
+    async for piece in request.stream():
+        buf.extend(piece)
+        start = 0
+        while (nl := buf.find(b"\n", start)) >= 0:
+            yield bytes(buf[start:nl])
+            start = nl + 1
+        del buf[:start]
+        if len(buf) > max_line_bytes:
+            api_error("NDJSON line too long", code="line_too_long", status_code=413)
+    if buf:
+        yield bytes(buf)
+
+
+@router.post("/webhooks/mentra:ndjson")
+async def webhook_ingest_ndjson(request: Request, background_tasks: BackgroundTasks, session_id: str | None = None, __: bool = Depends(require_webhook)):
+    """
+    Streaming ingest for large backfills: one WebhookChunk JSON object per line
+    (Content-Type: application/x-ndjson). Lines are parsed as they arrive and
+    committed every INGEST_STREAM_BATCH_ROWS chunks, so memory stays flat.
+    Invalid lines are skipped and counted.
+    """
+    if not (request.headers.get("content-type") or "").startswith("application/x-ndjson"):
+        api_error("Expected application/x-ndjson", code="unsupported_media_type", status_code=415)
+    sid = session_id or str(uuid4())
+    batch_rows = max(1, settings.INGEST_STREAM_BATCH_ROWS)
+    stats = {"lines": 0, "count": 0, "duplicates": 0, "invalid": 0, "batches": 0}
+    batch: List[WebhookChunk] = []
+    async with get_async_session() as adb:
+        if not await adb.get(Session, sid):
+            adb.add(Session(id=sid, title="Imported", is_active=True))
+            await adb.commit()
+
+        async def flush(chunks: List[WebhookChunk]) -> None:
+            ids = await adb.run_sync(lambda db: bulk_insert_chunks(db, sid, chunks))
+            await adb.commit()
+            stats["count"] += len(ids)
+            stats["duplicates"] += len(chunks) - len(ids)
+            stats["batches"] += 1
+
+        async for line in _ndjson_lines(request, settings.INGEST_STREAM_MAX_LINE_BYTES):
+            if not line.strip():
+                continue
+            stats["lines"] += 1
+            try:
+                batch.append(WebhookChunk.model_validate_json(line))
+            except ValidationError:
+                stats["invalid"] += 1
+                continue
+            if len(batch) >= batch_rows:
+                await flush(batch)
+                batch = []
+        if batch:
+            await flush(batch)
+    background_tasks.add_task(event_bus.broadcast, build_event("chunk.saved", sid, f"{stats['count']} chunks ingested"))
+    return {"ok": True, "session_id": sid, **stats}
 
 
 @router.post("/sessions/{sid}/assets")
-def upload_asset(sid: str, background_tasks: BackgroundTasks, file: UploadFile = File(...), _: bool = Depends(require_bearer)):
+async def upload_asset(sid: str, background_tasks: BackgroundTasks, file: UploadFile = File(...), _: bool = Depends(require_bearer)):
     # For tests, don't persist file, just record meta path
     path = f"uploads/{sid}_{file.filename}"
-    raw = file.file.read()
-    with get_session() as db:
+    raw = await file.read()
+    async with get_async_session() as adb:
         # For assets, require an existing session; invalid SID should return 404
-        if not db.get(Session, sid):
+        if not await adb.get(Session, sid):
             raise HTTPException(status_code=404, detail="Session not found")
-        db.add(Asset(session_id=sid, path=path, kind="image"))
-        # Analyze image with Gemini/vision service and append to transcript as a chunk
-        try:
-            analysis = analyze_image(raw, mime=file.content_type or "image/png")
-            if analysis:
-                db.add(TranscriptChunk(session_id=sid, text=f"[image-notes] {analysis}", ts_start=0.0, ts_end=0.0, bookmarked=False))
-        except Exception:
-            # Non-fatal: keep asset even if analysis fails
-            pass
-        db.commit()
+    # Analyze image with Gemini/vision service (no connection held during the call) and
+    # append it to the transcript as a chunk
+    try:
+        analysis = await analyze_image_async(raw, mime=file.content_type or "image/png")
+    except Exception:
+        # Non-fatal: keep asset even if analysis fails
+        analysis = ""
+    async with get_async_session() as adb:
+        adb.add(Asset(session_id=sid, path=path, kind="image"))
+        if analysis:
+            adb.add(TranscriptChunk(session_id=sid, text=f"[image-notes] {analysis}", ts_start=0.0, ts_end=0.0, bookmarked=False))
+        await adb.commit()
     background_tasks.add_task(event_bus.broadcast, build_event("asset.uploaded", sid, f"Asset {file.filename} uploaded", {"path": path}))
     return {"path": path}
 
 
 @router.post("/sessions/{sid}/flashcards:generate-sync")
-def flashcards_generate_sync(sid: str, body: Dict[str, Any], background_tasks: BackgroundTasks, _: bool = Depends(require_bearer)):
+async def flashcards_generate_sync(sid: str, body: Dict[str, Any], background_tasks: BackgroundTasks, _: bool = Depends(require_bearer)):
     types = body.get("types", ["qa"]) or []
     max_per_type = int(body.get("max_per_type", 1))
-    with get_session() as db:
-        sess = db.get(Session, sid)
-        if not sess:
-            # Create a placeholder session so future artifacts can attach safely
-            sess = Session(id=sid, title="Imported", is_active=True)
-            db.add(sess)
-            db.flush()
-        # gather transcript
-        chunks = db.query(TranscriptChunk).filter(TranscriptChunk.session_id == sid).order_by(TranscriptChunk.ts_start).all()
-        if not chunks:
-            # test expects empty qa list when no transcript
-            return {"qa": [], "cloze": [], "mc": []}
-        transcript_text = "\n".join(c.text for c in chunks)
-        cards = llm_service.generate_flashcards(transcript_text, types, max_per_type)
-        # persist
-        # If session has an assigned course, link generated flashcards to that course
-        assigned_course_id: Optional[str] = None
-        sc = db.query(SessionCourse).filter(SessionCourse.session_id == sid).first()
-        if sc:
-            assigned_course_id = sc.course_id
-        for t, items in cards.items():
-            for it in items:
-                ans = it["answer"]
-                ans_str = json.dumps(ans) if isinstance(ans, dict) else str(ans)
-                fc = Flashcard(
-                    session_id=sid,
-                    type=t,
-                    question=it.get("question", ""),
-                    answer=ans_str,
-                    source_ts=it.get("source_ts"),
-                )
-                db.add(fc)
-                db.flush()
-                if assigned_course_id:
-                    db.add(FlashcardCourse(flashcard_id=fc.id, course_id=assigned_course_id))
-        db.commit()
-        background_tasks.add_task(event_bus.broadcast, build_event("flashcards.generated", sid, "Flashcards generated", {"counts": {k: len(v) for k, v in cards.items()}}))
-        return cards
+    cards = await flashcard_service.generate_session_flashcards(sid, types, max_per_type, topic=body.get("topic") or None)
+    if cards is None:
+        # test expects empty qa list when no transcript
+        return {"qa": [], "cloze": [], "mc": []}
+    background_tasks.add_task(event_bus.broadcast, build_event("flashcards.generated", sid, "Flashcards generated", {"counts": {k: len(v) for k, v in cards.items()}}))
+    return cards
+
+
+@router.post("/sessions/{sid}/flashcards:generate", status_code=status.HTTP_202_ACCEPTED)
+async def flashcards_generate(sid: str, body: Dict[str, Any], _: bool = Depends(require_bearer)):
+    """Queue flashcard generation; poll GET /jobs/{job_id} or wait for job.succeeded on /ws/notify."""
+    params = {"types": body.get("types", ["qa"]) or [], "max_per_type": int(body.get("max_per_type", 1)), "topic": body.get("topic") or None}
+    job = await job_runner.submit("flashcards", sid, params)
+    return {"job_id": job.id, "status": job.status}
 
 
 @router.get("/sessions/{sid}/flashcards")
@@ -143,17 +198,77 @@ def list_flashcards(sid: str, _: bool = Depends(require_bearer)):
 
 
 @router.post("/sessions/{sid}/explain")
-def explain_topic(sid: str, body: Dict[str, Any], _: bool = Depends(require_bearer)):
+async def explain_topic(sid: str, body: Dict[str, Any], _: bool = Depends(require_bearer)):
     mode = body.get("mode", "eli5")
     topic = body.get("topic", "")
-    with get_session() as db:
-        has_any = db.query(TranscriptChunk).filter(TranscriptChunk.session_id == sid).first() is not None
+    async with get_async_session() as adb:
+        has_any = await adb.scalar(select(TranscriptChunk.id).where(TranscriptChunk.session_id == sid).limit(1)) is not None
     if not has_any:
         return {"mode": mode, "topic": topic, "explanation": "No transcript yet."}
-    txt = llm_service.explain_topic(topic, mode)
+
+    async def explain() -> str:
+        # Only the chunks most relevant to the topic go into the prompt
+        context = await relevant_context_async(sid, topic)
+        return await llm_service.explain_topic_async(topic, mode, context)
+
+    # Repeated clicks on the same topic share one LLM call
+    txt = await single_flight.do(flight_key("explain", sid, {"topic": topic, "mode": mode}), explain)
     return {"mode": mode, "topic": topic, "explanation": txt}
 
 
+_SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+async def _sse_response(events: AsyncIterator[Tuple[str, Any]]) -> StreamingResponse:
+    """Stream ``(event, data)`` pairs as text/event-stream.
+
+    The first event is awaited before responding, so config/quota/timeout errors
+    keep their HTTP status; failures after that are sent as an ``error`` event.
+    """
+    try:
+        first: Optional[Tuple[str, Any]] = await events.__anext__()
+    except StopAsyncIteration:
+        first = None
+
+    async def body():
+        try:
+            if first is None:
+                return
+            yield format_sse(*first)
+            async for event, data in events:
+                yield format_sse(event, data)
+        except HTTPException as e:
+            yield format_sse("error", e.detail if isinstance(e.detail, dict) else {"detail": str(e.detail), "code": "llm_error"})
+        except Exception as e:
+            yield format_sse("error", {"detail": str(e), "code": "internal_error"})
+        finally:
+            await events.aclose()
+
+    return StreamingResponse(body(), media_type="text/event-stream", headers=_SSE_HEADERS)
+
+
+@router.post("/sessions/{sid}/explain:stream")
+async def explain_topic_stream(sid: str, body: Dict[str, Any], _: bool = Depends(require_bearer)):
+    """Explain as server-sent events: ``token`` pieces as generated, then ``done`` with the full text."""
+    mode = body.get("mode", "eli5")
+    topic = body.get("topic", "")
+    async with get_async_session() as adb:
+        has_any = await adb.scalar(select(TranscriptChunk.id).where(TranscriptChunk.session_id == sid).limit(1)) is not None
+
+    async def events():
+        if not has_any:
+            yield "done", {"mode": mode, "topic": topic, "explanation": "No transcript yet."}
+            return
+        context = await relevant_context_async(sid, topic)
+        pieces: List[str] = []
+        async for piece in llm_service.explain_topic_stream(topic, mode, context):
+            pieces.append(piece)
+            yield "token", {"text": piece}
+        yield "done", {"mode": mode, "topic": topic, "explanation": "".join(pieces)}
+
+    return await _sse_response(events())
+
+
 @router.post("/sessions/{sid}/quiz:start")
 def quiz_start(sid: str, background_tasks: BackgroundTasks, _: bool = Depends(require_bearer)):
     # Local import to avoid static analysis self-dependency warning in some IDEs
@@ -209,51 +324,185 @@ def quiz_submit(sid: str, body: Dict[str, Any], background_tasks: BackgroundTask
 
 
 @router.get("/sessions/{sid}/timeline")
-def timeline(sid: str, q: str | None = None, tag: str | None = None, bookmarked: bool | None = None, _: bool = Depends(require_bearer)):
+def timeline(
+    sid: str,
+    q: str | None = None,
+    tag: str | None = None,
+    bookmarked: bool | None = None,
+    limit: int | None = Query(None, ge=1, le=1000),
+    cursor: str | None = None,
+    fields: str | None = None,
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+    _: bool = Depends(require_bearer),
+):
+    """
+    Session timeline. Chunks come back in (ts_start, id) order; pass `limit` to page
+    and feed `next_cursor` back as `cursor`. `fields` projects chunk columns
+    (e.g. `fields=id,bookmarked` skips loading text); `tag` keeps chunks inside ranges
+    bookmarked with that tag. `q` searches instead: the top `limit` matches by rank,
+    with `truncated` set when there are more (rejected with `cursor`, `tag`, `fields`). `format=ndjson` streams every
+    chunk as one JSON line, followed by the assets; it is a full export, so `q`, `limit`
+    and `cursor` are rejected with it. Assets are returned on the first page only.
+    """
+    try:
+        wanted = parse_fields(fields)
+    except ValueError as e:
+        api_error(str(e), code="invalid_fields")
+    if format == "ndjson":
+        if q or limit is not None or cursor:
+            api_error("format=ndjson streams the whole timeline; it can't be combined with q, limit or cursor", code="invalid_format")
+        def _lines():
+            with get_session() as db:
+                for row in iter_timeline(db, sid, wanted, bookmarked=bookmarked, tag=tag):
+                    yield json.dumps({"chunk": jsonable_encoder(row)}) + "\n"
+                for a in db.query(Asset).filter(Asset.session_id == sid).all():
+                    yield json.dumps({"asset": {"id": a.id, "path": a.path}}) + "\n"
+        return StreamingResponse(_lines(), media_type="application/x-ndjson")
+
     with get_session() as db:
-        chunks_q = db.query(TranscriptChunk).filter(TranscriptChunk.session_id == sid)
         if q:
-            chunks_q = chunks_q.filter(TranscriptChunk.text.contains(q))
-        if bookmarked is True:
-            chunks_q = chunks_q.filter(TranscriptChunk.bookmarked.is_(True))
-        chunks = chunks_q.order_by(TranscriptChunk.ts_start).all()
-        assets = db.query(Asset).filter(Asset.session_id == sid).all()
+            # Full-text search: ranked matches with highlighted snippets. One page of the
+            # top `limit` (default 50); `truncated` says more matches exist
+            if cursor or tag or fields:
+                api_error("q returns one ranked page; it can't be combined with cursor, tag or fields", code="invalid_search")
+            page = limit or 50
+            hits = search_chunks(db, sid, q, bookmarked=bookmarked, limit=page + 1)
+            assets = db.query(Asset).filter(Asset.session_id == sid).all()
+            return {
+                "chunks": [{"id": h["id"], "text": h["text"], "bookmarked": bool(h["bookmarked"]), "snippet": h["snippet"], "rank": h["rank"]} for h in hits[:page]],
+                "assets": [{"id": a.id, "path": a.path} for a in assets],
+                "next_cursor": None,
+                "truncated": len(hits) > page,
+            }
+        try:
+            chunks, next_cursor = timeline_page(db, sid, wanted, limit=limit, cursor=cursor, bookmarked=bookmarked, tag=tag)
+        except CursorError:
+            api_error("Invalid cursor", code="invalid_cursor")
+        assets = db.query(Asset).filter(Asset.session_id == sid).all() if not cursor else []
         return {
-            "chunks": [{"id": c.id, "text": c.text, "bookmarked": c.bookmarked} for c in chunks],
+            "chunks": chunks,
             "assets": [{"id": a.id, "path": a.path} for a in assets],
+            "next_cursor": next_cursor,
         }
 
 
 @router.post("/sessions/{sid}/bookmark")
 def bookmark_range(sid: str, background_tasks: BackgroundTasks, ts_start: str = Form(...), ts_end: str = Form(...), tag: str | None = Form(None), _: bool = Depends(require_bearer)):
-    s = float(ts_start)
-    e = float(ts_end)
+    try:
+        s = float(ts_start)
+        e = float(ts_end)
+    except ValueError:
+        api_error("ts_start and ts_end must be numbers", code="invalid_range")
+    if not (math.isfinite(s) and math.isfinite(e) and s <= e):
+        api_error("ts_start and ts_end must be finite with ts_start <= ts_end", code="invalid_range")
     with get_session() as db:
-        rows = db.query(TranscriptChunk).filter(TranscriptChunk.session_id == sid).all()
-        for c in rows:
-            # defensive against None values
-            if c.ts_start is None or c.ts_end is None:
-                continue
-            if c.ts_start >= s and c.ts_end <= e:
-                c.bookmarked = True
+        # Ensure session exists to satisfy FK on Bookmark
+        if not db.get(Session, sid):
+            db.add(Session(id=sid, title="Imported", is_active=True))
+            db.flush()
+        bookmark_id, updated = transcript_service.bookmark_range(db, sid, s, e, tag)
         db.commit()
-    background_tasks.add_task(event_bus.broadcast, build_event("bookmark.added", sid, "Bookmark added", {"tag": tag, "ts_start": s, "ts_end": e}))
-    return {"ok": True, "tag": tag}
+    background_tasks.add_task(event_bus.broadcast, build_event("bookmark.added", sid, "Bookmark added", {"tag": tag, "ts_start": s, "ts_end": e, "bookmark_id": bookmark_id}))
+    return {"ok": True, "tag": tag, "bookmark_id": bookmark_id, "updated": updated}
 
 
-@router.post("/sessions/{sid}/summary:generate-sync")
-def generate_summary(sid: str, background_tasks: BackgroundTasks, _: bool = Depends(require_bearer)):
+@router.get("/sessions/{sid}/bookmarks")
+def list_bookmarks(sid: str, tag: str | None = None, _: bool = Depends(require_bearer)):
     with get_session() as db:
-        chunks = db.query(TranscriptChunk).filter(TranscriptChunk.session_id == sid).order_by(TranscriptChunk.ts_start).all()
-        text = "\n".join(c.text for c in chunks)
-        summary = llm_service.generate_summary(text)
-        ses = db.get(Session, sid)
-        if ses:
-            # Persist as JSON string in DB, but return dict in response
-            ses.summary_json = json.dumps(summary)
-            db.commit()
-        background_tasks.add_task(event_bus.broadcast, build_event("summary.generated", sid, "Summary generated"))
-        return summary
+        return transcript_service.list_bookmarks(db, sid, tag)
+
+
+@router.post("/sessions/{sid}/summary:generate-sync")
+async def generate_summary(
+    sid: str,
+    background_tasks: BackgroundTasks,
+    mode: Literal["full", "incremental"] = Query("full", description="incremental: summarize only chunks since the last summary and merge"),
+    _: bool = Depends(require_bearer),
+):
+    summary = await summary_service.generate_session_summary(sid, incremental=mode == "incremental")
+    background_tasks.add_task(event_bus.broadcast, build_event("summary.generated", sid, "Summary generated"))
+    return summary
+
+
+@router.post("/sessions/{sid}/summary:generate-stream")
+async def generate_summary_stream(
+    sid: str,
+    mode: Literal["full", "incremental"] = Query("full", description="incremental: summarize only chunks since the last summary and merge"),
+    _: bool = Depends(require_bearer),
+):
+    """Summary as server-sent events: an ``item`` per bullet/section/keyword as the model
+    completes it, then ``done`` with the persisted summary."""
+
+    async def events():
+        async for event, data in summary_service.stream_session_summary(sid, incremental=mode == "incremental"):
+            yield event, data
+            if event == "done":
+                await event_bus.broadcast(build_event("summary.generated", sid, "Summary generated"))
+
+    return await _sse_response(events())
+
+
+@router.post("/sessions/{sid}/summary:generate", status_code=status.HTTP_202_ACCEPTED)
+async def generate_summary_job(
+    sid: str,
+    mode: Literal["full", "incremental"] = Query("full", description="incremental: summarize only chunks since the last summary and merge"),
+    _: bool = Depends(require_bearer),
+):
+    job = await job_runner.submit("summary", sid, {"mode": mode})
+    return {"job_id": job.id, "status": job.status}
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str, _: bool = Depends(require_bearer)):
+    job = await job_runner.get(job_id)
+    if not job:
+        api_error("Job not found", code="job_not_found", status_code=404)
+    return job_view(job)
+
+
+@router.get("/metrics/llm")
+async def llm_metrics(_: bool = Depends(require_bearer)):
+    """Scheduler queue depth/wait times, cache hit rates, coalesced requests, retrieval index and circuit breaker stats."""
+    return {
+        "scheduler": llm_scheduler.stats(),
+        "cache": llm_cache.stats(),
+        "single_flight": {"in_flight": single_flight.in_flight(), "started": single_flight.started, "joined": single_flight.joined},
+        "retrieval": chunk_index.stats(),
+        "breakers": breakers.stats(),
+        "sim": gemini_provider.sim_stats(),
+    }
+
+
+async def _save_live_transcript(sid: str, text: str, ts_start: float, ts_end: float, bookmarked: bool) -> None:
+    """Persist one live-audio segment's transcript as a timed chunk (flushed ones bookmarked)."""
+    chunk = WebhookChunk(chunk_id=str(uuid4()), text=text, ts_start=ts_start, ts_end=ts_end, bookmarked=bookmarked)
+    queued = settings.INGEST_WRITE_BEHIND and ingest_queue.enqueue(sid, [chunk])
+    if not queued:
+        async with get_async_session() as adb:
+            # ensure session exists for safety
+            if not await adb.get(Session, sid):
+                adb.add(Session(id=sid, title="Imported", is_active=True))
+                await adb.flush()
+            adb.add(TranscriptChunk(session_id=sid, text=text, ts_start=ts_start, ts_end=ts_end, bookmarked=bookmarked))
+            await adb.commit()
+
+
+async def _audio_clock(sid: str, offset: Optional[str]) -> float:
+    """Session-relative start of newly received audio: the client's `offset` (seconds on
+    its session clock) or, by default, the end of the session's latest chunk."""
+    if offset is not None and offset != "":
+        try:
+            value = float(offset)
+        except ValueError:
+            value = math.nan
+        if not math.isfinite(value):
+            api_error("offset must be a finite number of seconds", code="invalid_offset")
+        return max(0.0, value)
+    if settings.INGEST_WRITE_BEHIND:
+        # Chunks still queued for the write-behind writer count towards the clock
+        await asyncio.to_thread(ingest_queue.flush)
+    async with get_async_session() as adb:
+        return await adb.run_sync(lambda db: audio_clock(db, sid))
 
 
 # Live audio via WebSocket (binary frames)
@@ -265,7 +514,32 @@ async def ws_live_audio(websocket: WebSocket, sid: str):
         await websocket.close(code=1008)
         return
     await websocket.accept()
-    buffer: bytearray = bytearray()
+    # Headerless frames are 16-bit mono PCM at `sample_rate` (default LIVE_AUDIO_SAMPLE_RATE);
+    # the stream is cut into utterances by voice activity, each sent as its own WAV
+    try:
+        rate = int(websocket.query_params.get("sample_rate") or 0) or None
+        # Timestamps: sample offset within this socket's stream + where the stream starts in the session
+        offset = await _audio_clock(sid, websocket.query_params.get("offset"))
+    except (ValueError, HTTPException):
+        await websocket.close(code=1003)
+        return
+    audio = AudioStream(rate)
+    # Segments transcribe concurrently (up to LIVE_AUDIO_MAX_IN_FLIGHT) while frames keep
+    # arriving; results are sent in order
+    live = LiveTranscriber(transcribe_wav_bytes_async, websocket.send_json, settings.LIVE_AUDIO_MAX_IN_FLIGHT)
+
+    async def submit(seg: Optional[Segment], final: bool = False) -> None:
+        if seg is None:
+            await live.submit(None, final=final)
+            return
+        ts_start, ts_end = seg.span(offset)
+
+        async def save(text: str) -> None:
+            if text:
+                await _save_live_transcript(sid, text, ts_start, ts_end, bookmarked=final)
+
+        await live.submit(seg.wav, final=final, persist=save, seam=seg.overlap > 0, meta={"ts_start": round(ts_start, 3), "ts_end": round(ts_end, 3)})
+
     try:
         while True:
             msg = await websocket.receive()
@@ -274,57 +548,50 @@ async def ws_live_audio(websocket: WebSocket, sid: str):
                 break
             # Binary audio frames
             if "bytes" in msg and msg["bytes"]:
-                buffer.extend(msg["bytes"])  # accumulate raw WAV bytes from client
-                # Transcribe on rolling buffer (naive):
-                if len(buffer) > 16000:  # ~1 sec at 16kHz 16-bit mono
-                    text = transcribe_wav_bytes(bytes(buffer))
-                    await websocket.send_json({"transcript": text})
-                    buffer.clear()
+                try:
+                    segments = audio.feed(msg["bytes"])
+                except ValueError as e:
+                    live.send({"error": str(e), "code": "audio_format"})
+                    continue
+                # Every utterance is persisted as a timed chunk
+                for seg in segments:
+                    await submit(seg)
             # Control/text messages
             elif msg.get("text") == "flush":
-                if buffer:
-                    text = transcribe_wav_bytes(bytes(buffer))
-                    buffer.clear()
-                    # Persist the final transcript chunk to DB for this session
-                    try:
-                        with get_session() as db:
-                            # ensure session exists for safety
-                            if not db.get(Session, sid):
-                                db.add(Session(id=sid, title="Imported", is_active=True))
-                                db.flush()
-                            db.add(TranscriptChunk(session_id=sid, text=text, ts_start=0.0, ts_end=0.0, bookmarked=True))
-                            db.commit()
-                    except Exception:
-                        # Non-fatal for WS response
-                        pass
-                    await websocket.send_json({"transcript": text, "final": True})
-                else:
-                    # Even if no audio buffered, respond to flush to avoid hanging clients
-                    await websocket.send_json({"transcript": "", "final": True})
+                # The final chunk is bookmarked; even if no speech is pending, respond to
+                # flush to avoid hanging clients
+                await submit(audio.flush(), final=True)
             else:
                 # ignore other texts; send pong
-                await websocket.send_json({"ok": True})
+                live.send({"ok": True})
     except WebSocketDisconnect:
         pass
     except RuntimeError:
         # Raised if receive() called after disconnect; safe to ignore for tests
         pass
+    finally:
+        await live.close()
 
 
 @router.post("/sessions/{sid}/transcribe")
-async def upload_and_transcribe(sid: str, file: UploadFile = File(...), _: bool = Depends(require_bearer)):
+async def upload_and_transcribe(sid: str, file: UploadFile = File(...), offset: Optional[str] = Form(None), _: bool = Depends(require_bearer)):
+    """Transcribe an uploaded recording into one bookmarked chunk. It starts at `offset`
+    seconds (default: the end of the session's latest chunk) and spans the WAV's duration
+    (byte length / sample rate); other formats get a zero-length span."""
     data = await file.read()
-    txt = transcribe_wav_bytes(data, mime=file.content_type or "audio/wav")
-    with get_session() as db:
+    ts_start = await _audio_clock(sid, offset)
+    txt = await transcribe_wav_bytes_async(data, mime=file.content_type or "audio/wav")
+    ts_end = ts_start + (wav_duration(data) or 0.0)
+    async with get_async_session() as adb:
         # Ensure session exists (glasses may generate their own SID before calling this)
-        if not db.get(Session, sid):
-            db.add(Session(id=sid, title="Imported", is_active=True))
-            db.flush()
-        db.add(TranscriptChunk(session_id=sid, text=txt, ts_start=0.0, ts_end=0.0, bookmarked=True))
-        db.commit()
+        if not await adb.get(Session, sid):
+            adb.add(Session(id=sid, title="Imported", is_active=True))
+            await adb.flush()
+        adb.add(TranscriptChunk(session_id=sid, text=txt, ts_start=ts_start, ts_end=ts_end, bookmarked=True))
+        await adb.commit()
     # We are already in async context here
     await event_bus.broadcast(build_event("transcript.saved", sid, "Transcript saved from file"))
-    return {"text": txt}
+    return {"text": txt, "ts_start": ts_start, "ts_end": ts_end}
 
 
 # Notifications WebSocket for webapp
@@ -424,8 +691,7 @@ def suggest_class(sid: str, _: bool = Depends(require_bearer)):
         text_parts: List[str] = []
         if sess.title:
             text_parts.append(sess.title)
-        chunks = db.query(TranscriptChunk).filter(TranscriptChunk.session_id == sid).all()
-        text_parts.extend([c.text for c in chunks])
+        text_parts.append(transcript_cache.get(db, sid))
         haystack = ("\n".join(text_parts)).lower()
         # score courses
         candidates = []
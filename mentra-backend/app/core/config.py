@@ -1,3 +1,5 @@
+from typing import Dict, List
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import Field
 from dotenv import load_dotenv
@@ -20,6 +22,80 @@ class Settings(BaseSettings):
     GEMINI_MODEL: str | None = Field(None, description="Preferred Gemini model name; overrides MODEL when set")
     REQUEST_TIMEOUT_SECONDS: int = Field(60, description="LLM request timeout in seconds")
     DEV_FAKE_LLM: bool = Field(False, description="If true, return deterministic fake flashcards without calling an LLM")
+    # Long transcripts are split into windows and summarized map-reduce style
+    LLM_WINDOW_TOKENS: int = Field(3000, description="Approximate token budget per transcript window sent to the LLM")
+    LLM_MAP_CONCURRENCY: int = Field(4, description="Max concurrent LLM calls per map/reduce step")
+    LLM_PROMPT_TOKEN_BUDGET: int = Field(0, description="Optional cost cap on the total transcript tokens sent per summary/flashcard generation, across all map-reduce windows; over it, bookmarked and image-notes chunks are kept first and the rest sampled (0 = no limit: long lectures are windowed, not cut)")
+    # Retrieval: explain (and topic flashcards) send only the most relevant transcript chunks
+    RETRIEVAL_EMBEDDER: str = Field("hashing", description="Chunk embedder: hashing (local, deterministic) or gemini (embedding API)")
+    RETRIEVAL_EMBED_MODEL: str = Field("models/text-embedding-004", description="Gemini embedding model when RETRIEVAL_EMBEDDER=gemini")
+    RETRIEVAL_HASH_DIM: int = Field(1024, description="Vector size of the hashing embedder")
+    RETRIEVAL_TOP_K: int = Field(8, description="Chunks included in a grounded prompt")
+    RETRIEVAL_MAX_SESSIONS: int = Field(256, description="Session indexes kept in memory (LRU)")
+    # Process-wide LLM admission control (every provider call goes through app.services.llm_scheduler)
+    LLM_MAX_IN_FLIGHT: int = Field(8, description="Max concurrent provider calls per process")
+    LLM_RATE_PER_SEC: float = Field(10.0, description="Sustained provider requests per second (token bucket); 0 disables")
+    LLM_RATE_BURST: int = Field(20, description="Token bucket size: requests allowed back-to-back before rate limiting")
+    LLM_QUEUE_TIMEOUT_SECONDS: float = Field(30.0, description="Max wait for an LLM slot before failing with 503 llm_busy")
+    LLM_STARVATION_SECONDS: float = Field(10.0, description="A lower-priority call waiting this long is admitted ahead of newer interactive calls")
+    # Circuit breaker per LLM operation: fail fast (503 llm_unavailable / heuristic fallbacks) while Gemini is degraded
+    LLM_BREAKER_ENABLED: bool = Field(True, description="Enable per-operation circuit breakers")
+    LLM_BREAKER_WINDOW: int = Field(20, description="Recent calls per operation considered for the failure ratio")
+    LLM_BREAKER_MIN_CALLS: int = Field(5, description="Calls in the window before the breaker can open")
+    LLM_BREAKER_FAILURE_RATIO: float = Field(0.5, description="Failed (or slow) share of the window that opens the breaker")
+    LLM_BREAKER_SLOW_SECONDS: float = Field(20.0, description="Successful calls slower than this count as failures")
+    LLM_BREAKER_OPEN_SECONDS: float = Field(30.0, description="How long an open breaker rejects calls before a probe")
+    # Hedged requests: a second attempt after the operation's p95 latency, first answer wins
+    LLM_HEDGE_OPS: List[str] = Field(default_factory=list, description='Operations to hedge (JSON list), e.g. ["transcribe", "explain"]')
+    LLM_HEDGE_MIN_SAMPLES: int = Field(20, description="Successful calls observed before hedging starts (p95 needs data)")
+    LLM_HEDGE_MIN_DELAY_SECONDS: float = Field(0.25, description="Never hedge sooner than this")
+    # Offline latency simulator for load tests (app.services.sim_llm); needs DEV_FAKE_LLM=0
+    LLM_SIM: bool = Field(False, description="Answer every Gemini call from an in-process simulator with realistic latency instead of the network")
+    LLM_SIM_LATENCY_MS: Dict[str, float] = Field(
+        default_factory=lambda: {"transcribe": 600, "vision": 2000, "explain": 800, "summary": 2500, "flashcards": 2500, "email": 700, "embed": 120, "default": 1000},
+        description="Simulator: median time to first token per operation (JSON object, milliseconds)",
+    )
+    LLM_SIM_LATENCY_DIST: str = Field("lognormal", description="Simulator latency distribution: lognormal, exponential or constant")
+    LLM_SIM_LATENCY_SIGMA: float = Field(0.6, description="Simulator: lognormal shape; ~0.6 gives p99 about 4x the median")
+    LLM_SIM_TOKENS_PER_SEC: float = Field(120.0, description="Simulator: output tokens generated per second per call")
+    LLM_SIM_PREFILL_TOKENS_PER_SEC: float = Field(8000.0, description="Simulator: prompt tokens processed per second (long transcripts cost more)")
+    LLM_SIM_ERROR_RATE: float = Field(0.0, description="Simulator: share of calls failing with a 500")
+    LLM_SIM_MAX_CONCURRENCY: int = Field(0, description="Simulator: concurrent calls before 429 rejections (0 = unlimited)")
+    LLM_SIM_SEED: int | None = Field(None, description="Simulator: RNG seed for reproducible runs")
+    # Background generation jobs (POST .../flashcards:generate, .../summary:generate)
+    JOB_MAX_CONCURRENCY: int = Field(2, description="Background jobs running at once per process")
+    JOB_MAX_PENDING: int = Field(100, description="Queued + running jobs before new submissions get 503")
+    # LLM response cache (content-addressed by model + prompt + generation config)
+    LLM_CACHE_ENABLED: bool = Field(True, description="Serve identical LLM prompts from cache")
+    LLM_CACHE_MAX_ENTRIES: int = Field(2048, description="In-process LRU tier size")
+    LLM_CACHE_REDIS_URL: str | None = Field(None, description="Optional shared Redis tier, e.g. redis://localhost:6379/0")
+    LLM_CACHE_DEFAULT_TTL_SECONDS: int = Field(3600, description="TTL for operations missing from LLM_CACHE_TTLS")
+    LLM_CACHE_TTLS: Dict[str, int] = Field(
+        default_factory=lambda: {"explain": 7 * 86400, "summary": 86400, "flashcards": 0, "transcribe": 86400, "vision": 86400, "email": 86400},
+        description="Per-operation TTL seconds (JSON object); 0 disables caching for that operation. Flashcards default to 0: each generate must produce new cards, and a cached answer would be saved again as duplicate rows",
+    )
+    # Transcript ingest durability/latency trade-off
+    INGEST_WRITE_BEHIND: bool = Field(False, description="If true, webhook/live-audio ingest only validates and enqueues chunks; a background writer commits them in groups; failed groups are retried batch by batch (acknowledged chunks still queued are lost on crash)")
+    INGEST_GROUP_MAX_ROWS: int = Field(500, description="Write-behind: commit once this many chunks are pending")
+    INGEST_GROUP_MAX_DELAY_MS: int = Field(50, description="Write-behind: commit at most this many milliseconds after the first pending chunk")
+    INGEST_QUEUE_MAX_BATCHES: int = Field(10000, description="Write-behind: queued requests before ingest falls back to synchronous writes")
+    INGEST_RETRY_ATTEMPTS: int = Field(3, description="Write-behind: when a group commit fails, times each of its batches is retried on its own before it is set aside for later retry")
+    INGEST_RETRY_BACKOFF_MS: int = Field(100, description="Write-behind: initial delay between batch retries (doubles each attempt)")
+    INGEST_STREAM_BATCH_ROWS: int = Field(500, description="NDJSON ingest: chunks parsed before each flush/commit")
+    INGEST_STREAM_MAX_LINE_BYTES: int = Field(1_048_576, description="NDJSON ingest: reject lines longer than this")
+    TRANSCRIPT_CACHE_MAX_CHARS: int = Field(64_000_000, description="Total characters of joined session transcripts kept in memory (LRU)")
+    # Live-audio WebSocket
+    LIVE_AUDIO_MAX_IN_FLIGHT: int = Field(2, description="Audio windows per socket transcribing or awaiting delivery before the socket stops reading (backpressure)")
+    LIVE_AUDIO_SAMPLE_RATE: int = Field(16000, description="Sample rate of headerless 16-bit mono PCM frames (a WAV header on a frame overrides it)")
+    LIVE_VAD_FRAME_MS: int = Field(30, description="VAD analysis frame length")
+    LIVE_VAD_MIN_DBFS: float = Field(-50.0, description="Frames quieter than this are never speech")
+    LIVE_VAD_MARGIN_DB: float = Field(10.0, description="Speech must be this far above the running noise floor")
+    LIVE_VAD_START_FRAMES: int = Field(3, description="Consecutive voiced frames that start an utterance")
+    LIVE_VAD_PREROLL_MS: int = Field(200, description="Audio kept before the detected onset (and after the last voiced frame)")
+    LIVE_VAD_HANGOVER_MS: int = Field(600, description="Silence that ends an utterance")
+    LIVE_SEGMENT_MIN_MS: int = Field(300, description="Shorter utterances are dropped as noise")
+    LIVE_SEGMENT_MAX_SECONDS: float = Field(15.0, description="Longer utterances are cut and continued in a new segment")
+    LIVE_SEGMENT_OVERLAP_MS: int = Field(500, description="Audio repeated at the start of a continued segment; duplicated words are removed")
     # AgentMail webhook signing secret
     AGENTMAIL_WEBHOOK_SECRET: str | None = Field(None, description="HMAC secret for AgentMail inbound webhooks")
 
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import asyncio
+import json
 from datetime import datetime, timezone
 from typing import Any, Dict, Set
 from uuid import uuid4
@@ -45,3 +46,8 @@ def build_event(event_type: str, session_id: str | None = None, message: str | N
         "data": data or {},
         "created_at": datetime.now(timezone.utc).isoformat(),
     }
+
+
+def format_sse(event: str, data: Any) -> str:
+    """One server-sent event frame; ``data`` is JSON-encoded on a single line."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
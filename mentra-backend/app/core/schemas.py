@@ -18,9 +18,12 @@ class SessionOut(BaseModel):
 
 
 class WebhookChunk(BaseModel):
-    text: str
-    ts_start: float
-    ts_end: float
+    # Optional client-supplied id; retries with the same id are ingested once.
+    # When omitted, a content hash of (session_id, ts_start, ts_end, text) is used.
+    chunk_id: Optional[str] = None
+    text: str = ""
+    ts_start: float = 0.0
+    ts_end: float = 0.0
     bookmarked: bool = False
 
 
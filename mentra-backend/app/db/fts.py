@@ -0,0 +1,114 @@
+"""Full-text index over transcript_chunk.text.
+
+SQLite: an external-content FTS5 table kept in sync by triggers. transcript_chunk
+has a string primary key, so its implicit rowid is not stable (VACUUM may renumber
+it); FTS rows are keyed instead by ``transcript_chunk_fts_key``, which gives every
+chunk id a permanent integer, and read their text through a view joining the two.
+Postgres: a generated ``tsvector`` column with a GIN index.
+Both are maintained by the database on every insert/update/delete, so the bulk
+Core insert path needs no extra work.
+"""
+from __future__ import annotations
+
+from typing import List
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+
+FTS_TABLE = "transcript_chunk_fts"
+FTS_KEY_TABLE = f"{FTS_TABLE}_key"
+_FTS_SOURCE = f"{FTS_TABLE}_src"
+_KEY_OF = "(SELECT fts_rowid FROM " + FTS_KEY_TABLE + " WHERE chunk_id = {}.id)"
+
+# Set by ensure_fts() at startup; search falls back to LIKE when False
+enabled = False
+
+_SQLITE_DDL: List[str] = [
+    f"CREATE TABLE IF NOT EXISTS {FTS_KEY_TABLE} (fts_rowid INTEGER PRIMARY KEY, chunk_id TEXT NOT NULL UNIQUE)",
+    f"CREATE VIEW IF NOT EXISTS {_FTS_SOURCE} AS SELECT k.fts_rowid AS fts_rowid, c.text AS text "
+    f"FROM {FTS_KEY_TABLE} k JOIN transcript_chunk c ON c.id = k.chunk_id",
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    f"text, content='{_FTS_SOURCE}', content_rowid='fts_rowid', tokenize='porter unicode61')",
+    f"CREATE TRIGGER IF NOT EXISTS transcript_chunk_fts_ai AFTER INSERT ON transcript_chunk BEGIN "
+    f"INSERT INTO {FTS_KEY_TABLE}(chunk_id) VALUES (new.id); "
+    f"INSERT INTO {FTS_TABLE}(rowid, text) VALUES ({_KEY_OF.format('new')}, new.text); END",
+    f"CREATE TRIGGER IF NOT EXISTS transcript_chunk_fts_ad AFTER DELETE ON transcript_chunk BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text) VALUES ('delete', {_KEY_OF.format('old')}, old.text); "
+    f"DELETE FROM {FTS_KEY_TABLE} WHERE chunk_id = old.id; END",
+    f"CREATE TRIGGER IF NOT EXISTS transcript_chunk_fts_au AFTER UPDATE OF text ON transcript_chunk BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text) VALUES ('delete', {_KEY_OF.format('old')}, old.text); "
+    f"INSERT INTO {FTS_TABLE}(rowid, text) VALUES ({_KEY_OF.format('new')}, new.text); END",
+]
+
+_SQLITE_DROP: List[str] = [
+    "DROP TRIGGER IF EXISTS transcript_chunk_fts_au",
+    "DROP TRIGGER IF EXISTS transcript_chunk_fts_ad",
+    "DROP TRIGGER IF EXISTS transcript_chunk_fts_ai",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+    f"DROP VIEW IF EXISTS {_FTS_SOURCE}",
+    f"DROP TABLE IF EXISTS {FTS_KEY_TABLE}",
+]
+
+_POSTGRES_DDL: List[str] = [
+    "ALTER TABLE transcript_chunk ADD COLUMN IF NOT EXISTS text_tsv tsvector "
+    "GENERATED ALWAYS AS (to_tsvector('english', coalesce(text, ''))) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_transcript_chunk_text_tsv ON transcript_chunk USING GIN (text_tsv)",
+]
+
+_POSTGRES_DROP: List[str] = [
+    "DROP INDEX IF EXISTS ix_transcript_chunk_text_tsv",
+    "ALTER TABLE transcript_chunk DROP COLUMN IF EXISTS text_tsv",
+]
+
+
+def install_fts(conn: Connection) -> None:
+    """Create the full-text index if missing (idempotent); backfills existing rows."""
+    dialect = conn.dialect.name
+    if dialect == "sqlite":
+        created = conn.execute(text("SELECT 1 FROM sqlite_master WHERE name = :n"), {"n": FTS_KEY_TABLE}).first() is None
+        if created:
+            # Replaces an index keyed by transcript_chunk's implicit rowid, if one exists
+            for stmt in _SQLITE_DROP:
+                conn.execute(text(stmt))
+        for stmt in _SQLITE_DDL:
+            conn.execute(text(stmt))
+        if created:
+            conn.execute(text(f"INSERT INTO {FTS_KEY_TABLE}(chunk_id) SELECT id FROM transcript_chunk"))
+            conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+    elif dialect == "postgresql":
+        for stmt in _POSTGRES_DDL:
+            conn.execute(text(stmt))
+
+
+def drop_fts(conn: Connection) -> None:
+    dialect = conn.dialect.name
+    stmts = _SQLITE_DROP if dialect == "sqlite" else _POSTGRES_DROP if dialect == "postgresql" else []
+    for stmt in stmts:
+        conn.execute(text(stmt))
+
+
+def ensure_fts(engine: Engine) -> bool:
+    """Install the index at startup; returns False when the backend lacks FTS (e.g. SQLite built without FTS5)."""
+    global enabled
+    enabled = False
+    if engine.dialect.name not in ("sqlite", "postgresql"):
+        return False
+    try:
+        with engine.begin() as conn:
+            install_fts(conn)
+    except Exception:
+        return False
+    enabled = True
+    return True
+
+
+def include_object(obj, name, type_, reflected, compare_to) -> bool:
+    """Alembic autogenerate filter: the FTS objects live outside Base.metadata."""
+    if type_ == "table" and name and name.startswith(FTS_TABLE):
+        return False
+    if type_ == "column" and name == "text_tsv":
+        return False
+    if type_ == "index" and name == "ix_transcript_chunk_text_tsv":
+        return False
+    return True
@@ -0,0 +1,32 @@
+"""Dev/test schema bootstrap.
+
+``create_all`` only creates missing tables, so a database auto-created by an older
+build never gets columns or indexes added to existing models since (e.g.
+``transcript_chunk.chunk_key``). ``create_schema`` adds those too. Production
+databases use the Alembic migrations, whose upgrades skip objects that already
+exist, so a database bootstrapped here can still be stamped and upgraded.
+"""
+from __future__ import annotations
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.schema import CreateColumn
+
+from .base import Base
+
+
+def create_schema(engine: Engine) -> None:
+    """Create missing tables, then add missing columns and indexes to existing ones."""
+    Base.metadata.create_all(bind=engine)
+    insp = inspect(engine)
+    preparer = engine.dialect.identifier_preparer
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            have = {c["name"] for c in insp.get_columns(table.name)}
+            for col in table.columns:
+                if col.name not in have:
+                    # Model columns added later are nullable or carry a server default
+                    ddl = CreateColumn(col).compile(dialect=engine.dialect)
+                    conn.execute(text(f"ALTER TABLE {preparer.format_table(table)} ADD COLUMN {ddl}"))
+            for ix in table.indexes:
+                ix.create(conn, checkfirst=True)
@@ -1,10 +1,11 @@
 from __future__ import annotations
 
 from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from ..core.config import settings
-from .base import Base
-from contextlib import contextmanager
+from contextlib import asynccontextmanager, contextmanager
 
 
 # Create SQLAlchemy engine
@@ -17,9 +18,29 @@ engine = create_engine(
 )
 
 
+def _async_database_url(url: str) -> str:
+    """Map the sync DSN onto the matching async driver (aiosqlite / psycopg async)."""
+    u = make_url(url)
+    backend = u.get_backend_name()
+    if backend == "sqlite":
+        return u.set(drivername="sqlite+aiosqlite").render_as_string(hide_password=False)
+    if backend == "postgresql" and u.get_driver_name() in ("psycopg2", "pg8000", "psycopg"):
+        return u.set(drivername="postgresql+psycopg").render_as_string(hide_password=False)
+    return url
+
+
+# Async engine for `async def` endpoints so DB round trips don't block the event loop
+async_engine = create_async_engine(
+    _async_database_url(settings.DATABASE_URL),
+    echo=False,
+    pool_pre_ping=True,
+)
+
+
 # Enable useful SQLite PRAGMAs in dev/test
 if settings.DATABASE_URL.startswith("sqlite"):
     @event.listens_for(engine, "connect")
+    @event.listens_for(async_engine.sync_engine, "connect")
     def _set_sqlite_pragma(dbapi_connection, connection_record):  # type: ignore[no-redef]
         cursor = dbapi_connection.cursor()
         try:
@@ -29,8 +50,9 @@ if settings.DATABASE_URL.startswith("sqlite"):
             cursor.close()
 
 
-# Session factory
+# Session factories
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, expire_on_commit=False, future=True)
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
 
 
 # FastAPI dependency helper
@@ -52,11 +74,21 @@ def get_session():
         db.close()
 
 
+# Async counterpart of get_session() for use inside `async def` handlers
+@asynccontextmanager
+async def get_async_session():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 # For tests/dev: ensure metadata tables exist early (idempotent)
 try:
     # Import models so they are registered with Base.metadata
     from app.models import entities as _entities  # noqa: F401
-    Base.metadata.create_all(bind=engine)
+    from .schema import create_schema
+    create_schema(engine)
+    from .fts import ensure_fts
+    ensure_fts(engine)
 except Exception:
     # During certain tooling/import orders this can run before app package is set up;
     # the FastAPI startup in app.main will create tables as a fallback.
@@ -1,9 +1,15 @@
+import asyncio
+
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
 from .api.routes import router
 from .api.agentmail import router as agentmail_router
-from .db.session import engine
-from .db.base import Base
+from .db.session import async_engine, engine
+from .db.fts import ensure_fts
+from .db.schema import create_schema
+from .core.config import settings
+from .services.ingest_queue import ingest_queue
+from .services.job_service import job_runner
 from .models import entities as _entities  # noqa: F401 - ensure models are registered
 from contextlib import asynccontextmanager
 
@@ -12,8 +18,16 @@ def create_app() -> FastAPI:
     @asynccontextmanager
     async def lifespan(app: FastAPI):
         # For demo: ensure tables exist if Alembic not yet run
-        Base.metadata.create_all(bind=engine)
+        create_schema(engine)
+        ensure_fts(engine)
+        if settings.INGEST_WRITE_BEHIND:
+            ingest_queue.start()
+        await job_runner.recover()
         yield
+        await job_runner.shutdown()
+        # Drain write-behind chunks before the process exits
+        await asyncio.to_thread(ingest_queue.stop)
+        await async_engine.dispose()
 
     app = FastAPI(title="Mentra Backend", version="0.1.0", lifespan=lifespan)
 
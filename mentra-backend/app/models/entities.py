@@ -4,7 +4,7 @@ from datetime import datetime, timezone
 from typing import Optional
 from uuid import uuid4
 
-from sqlalchemy import String, DateTime, Text, ForeignKey, Integer, Boolean, Float, UniqueConstraint
+from sqlalchemy import String, DateTime, Text, ForeignKey, Integer, Boolean, Float, UniqueConstraint, Index
 from sqlalchemy.sql import expression as sa_expr
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 from app.db.base import Base
@@ -18,6 +18,9 @@ class Session(Base):
     title: Mapped[Optional[str]] = mapped_column(String, nullable=True)
     is_active: Mapped[bool] = mapped_column(Boolean, nullable=False, default=True, server_default=sa_expr.text("1"))
     summary_json: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    # Incremental summaries: timeline cursor of the last summarized chunk and how many chunks summary_json covers
+    summary_cursor: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    summary_chunk_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default=sa_expr.text("0"))
 
     # relationships
     transcript_chunks = relationship("TranscriptChunk", back_populates="session", cascade="all, delete-orphan")
@@ -28,6 +31,12 @@ class Session(Base):
 
 class TranscriptChunk(Base):
     __tablename__ = "transcript_chunk"
+    # Timeline, summary and bookmark-range queries all filter by session and order/range on ts_start
+    __table_args__ = (
+        Index("ix_transcript_chunk_session_ts", "session_id", "ts_start"),
+        # Idempotent ingest: client chunk id or content hash, see transcript_service.chunk_key
+        Index("uix_transcript_chunk_session_key", "session_id", "chunk_key", unique=True),
+    )
 
     id: Mapped[str] = mapped_column(String, primary_key=True, default=lambda: str(uuid4()))
     session_id: Mapped[str] = mapped_column(String, ForeignKey("session.id", ondelete="CASCADE"), nullable=False)
@@ -35,16 +44,31 @@ class TranscriptChunk(Base):
     ts_end: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
     text: Mapped[str] = mapped_column(Text, nullable=False, default="")
     bookmarked: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False, server_default=sa_expr.text("0"))
+    chunk_key: Mapped[Optional[str]] = mapped_column(String, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
 
     session = relationship("Session", back_populates="transcript_chunks")
 
 
+class Bookmark(Base):
+    """A bookmarked time range, optionally tagged; chunks inside it have bookmarked=True."""
+
+    __tablename__ = "bookmark"
+    __table_args__ = (Index("ix_bookmark_session_tag", "session_id", "tag"),)
+
+    id: Mapped[str] = mapped_column(String, primary_key=True, default=lambda: str(uuid4()))
+    session_id: Mapped[str] = mapped_column(String, ForeignKey("session.id", ondelete="CASCADE"), nullable=False)
+    ts_start: Mapped[float] = mapped_column(Float, nullable=False)
+    ts_end: Mapped[float] = mapped_column(Float, nullable=False)
+    tag: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+
+
 class Asset(Base):
     __tablename__ = "asset"
 
     id: Mapped[str] = mapped_column(String, primary_key=True, default=lambda: str(uuid4()))
-    session_id: Mapped[str] = mapped_column(String, ForeignKey("session.id", ondelete="CASCADE"), nullable=False)
+    session_id: Mapped[str] = mapped_column(String, ForeignKey("session.id", ondelete="CASCADE"), nullable=False, index=True)
     kind: Mapped[str] = mapped_column(String, nullable=False)
     path: Mapped[str] = mapped_column(String, nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
@@ -54,6 +78,7 @@ class Asset(Base):
 
 class Flashcard(Base):
     __tablename__ = "flashcard"
+    __table_args__ = (Index("ix_flashcard_session_created", "session_id", "created_at"),)
 
     id: Mapped[str] = mapped_column(String, primary_key=True, default=lambda: str(uuid4()))
     session_id: Mapped[str] = mapped_column(String, ForeignKey("session.id", ondelete="CASCADE"), nullable=False)
@@ -69,7 +94,7 @@ class QuizAttempt(Base):
     __tablename__ = "quiz_attempt"
 
     id: Mapped[str] = mapped_column(String, primary_key=True, default=lambda: str(uuid4()))
-    session_id: Mapped[str] = mapped_column(String, ForeignKey("session.id", ondelete="CASCADE"), nullable=False)
+    session_id: Mapped[str] = mapped_column(String, ForeignKey("session.id", ondelete="CASCADE"), nullable=False, index=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
     # Store questions as JSON-like Python structure; using Text for portability
     questions_json: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
@@ -100,7 +125,7 @@ class SessionCourse(Base):
 
     id: Mapped[str] = mapped_column(String, primary_key=True, default=lambda: str(uuid4()))
     session_id: Mapped[str] = mapped_column(String, ForeignKey("session.id", ondelete="CASCADE"), nullable=False)
-    course_id: Mapped[str] = mapped_column(String, ForeignKey("course.id", ondelete="CASCADE"), nullable=False)
+    course_id: Mapped[str] = mapped_column(String, ForeignKey("course.id", ondelete="CASCADE"), nullable=False, index=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
 
     session = relationship("Session", backref="session_course")
@@ -111,8 +136,8 @@ class FlashcardCourse(Base):
     __tablename__ = "flashcard_course"
 
     id: Mapped[str] = mapped_column(String, primary_key=True, default=lambda: str(uuid4()))
-    flashcard_id: Mapped[str] = mapped_column(String, ForeignKey("flashcard.id", ondelete="CASCADE"), nullable=False)
-    course_id: Mapped[str] = mapped_column(String, ForeignKey("course.id", ondelete="CASCADE"), nullable=False)
+    flashcard_id: Mapped[str] = mapped_column(String, ForeignKey("flashcard.id", ondelete="CASCADE"), nullable=False, index=True)
+    course_id: Mapped[str] = mapped_column(String, ForeignKey("course.id", ondelete="CASCADE"), nullable=False, index=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
 
     flashcard = relationship("Flashcard", backref="flashcard_course")
@@ -142,6 +167,8 @@ class CalendarEvent(Base):
 
 class ProposedCalendarItem(Base):
     __tablename__ = "proposed_calendar_item"
+    # GET /proposals filters by status and orders by created_at desc
+    __table_args__ = (Index("ix_proposed_calendar_item_status_created", "status", "created_at"),)
 
     id: Mapped[str] = mapped_column(String, primary_key=True, default=lambda: str(uuid4()))
     created_at: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
@@ -160,4 +187,27 @@ class ProposedCalendarItem(Base):
     course_id: Mapped[Optional[str]] = mapped_column(String, nullable=True)
     confidence: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
     raw: Mapped[Optional[str]] = mapped_column(Text, nullable=True)  # store JSON as string for portability
-    status: Mapped[str] = mapped_column(String, nullable=False, default="pending", index=True)  # pending|accepted|rejected
+    status: Mapped[str] = mapped_column(String, nullable=False, default="pending")  # pending|accepted|rejected
+
+
+# ----------------------
+# Background generation jobs
+# ----------------------
+
+class Job(Base):
+    """A queued/running/finished background generation (flashcards, summary)."""
+
+    __tablename__ = "job"
+    __table_args__ = (Index("ix_job_session_created", "session_id", "created_at"),)
+
+    id: Mapped[str] = mapped_column(String, primary_key=True, default=lambda: str(uuid4()))
+    kind: Mapped[str] = mapped_column(String, nullable=False)  # flashcards|summary
+    # No FK: flashcard jobs may target a session that is only created when they run
+    session_id: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    status: Mapped[str] = mapped_column(String, nullable=False, default="queued", index=True)  # queued|running|succeeded|failed
+    params_json: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    result_json: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    error_json: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+    started_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
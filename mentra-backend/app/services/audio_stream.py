@@ -0,0 +1,245 @@
+"""Streaming segmentation of live audio into utterances for transcription.
+
+``AudioStream.feed`` takes the live-audio socket's binary frames: 16-bit PCM, either
+headerless (LIVE_AUDIO_SAMPLE_RATE, mono) or prefixed by a WAV header, which is parsed
+and stripped whenever a frame starts with one. Samples are cut into
+LIVE_VAD_FRAME_MS frames and each frame's energy (dBFS) is computed with NumPy. A
+frame counts as speech when it is LIVE_VAD_MARGIN_DB above a running noise floor
+(and above LIVE_VAD_MIN_DBFS). An utterance starts after a few voiced frames, keeps
+LIVE_VAD_PREROLL_MS of audio before the onset, and ends after LIVE_VAD_HANGOVER_MS
+of silence. Utterances longer than LIVE_SEGMENT_MAX_SECONDS are cut. The next
+segment then re-sends the last LIVE_SEGMENT_OVERLAP_MS, so no word is lost at the
+cut, and ``dedupe_seam`` removes the words transcribed twice.
+
+Each emitted ``Segment`` is a complete mono WAV file, with positions in the stream
+measured in samples.
+"""
+from __future__ import annotations
+
+import re
+import struct
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from ..core.config import settings
+
+
+_SAMPLE_WIDTH = 2
+_WORD = re.compile(r"\w+")
+
+
+def wav_bytes(pcm: bytes, sample_rate: int) -> bytes:
+    """``pcm`` (mono, 16-bit little-endian) wrapped in a canonical 44-byte WAV header."""
+    return (
+        struct.pack("<4sI4s", b"RIFF", 36 + len(pcm), b"WAVE")
+        + struct.pack("<4sIHHIIHH", b"fmt ", 16, 1, 1, sample_rate, sample_rate * _SAMPLE_WIDTH, _SAMPLE_WIDTH, 16)
+        + struct.pack("<4sI", b"data", len(pcm))
+        + pcm
+    )
+
+
+def parse_wav_header(data: bytes) -> Optional[tuple]:
+    """(sample_rate, channels, bits, data offset) if ``data`` starts with a RIFF/WAVE header."""
+    if len(data) < 12 or data[:4] != b"RIFF" or data[8:12] != b"WAVE":
+        return None
+    pos, fmt = 12, None
+    while pos + 8 <= len(data):
+        cid, size = struct.unpack_from("<4sI", data, pos)
+        body = pos + 8
+        if cid == b"fmt " and body + 16 <= len(data):
+            audio_format, channels, rate, _, _, bits = struct.unpack_from("<HHIIHH", data, body)
+            fmt = (audio_format, channels, rate, bits)
+        elif cid == b"data":
+            if fmt is None:
+                raise ValueError("WAV data chunk before fmt chunk")
+            audio_format, channels, rate, bits = fmt
+            # 0xFFFE: WAVE_FORMAT_EXTENSIBLE, PCM subformat in practice
+            if audio_format not in (1, 0xFFFE) or bits != 16:
+                raise ValueError(f"unsupported WAV encoding (format {audio_format}, {bits}-bit); send 16-bit PCM")
+            return rate, max(1, channels), bits, body
+        pos = body + size + (size & 1)
+    raise ValueError("incomplete WAV header; send the header and first samples in one frame")
+
+
+def wav_duration(data: bytes) -> Optional[float]:
+    """Seconds of 16-bit PCM in a WAV file, from its byte length and sample rate; None if not WAV."""
+    try:
+        header = parse_wav_header(data)
+    except ValueError:
+        return None
+    if header is None:
+        return None
+    rate, channels, _, offset = header
+    return (len(data) - offset) // (_SAMPLE_WIDTH * channels) / rate if rate else None
+
+
+def _norm(word: str) -> str:
+    return "".join(_WORD.findall(word.lower()))
+
+
+def dedupe_seam(prev: str, text: str, max_words: int = 8) -> str:
+    """Drop the leading words of ``text`` that repeat the end of ``prev`` (overlap at a cut)."""
+    tail = [_norm(w) for w in prev.split()][-max_words:]
+    words = text.split()
+    head = [_norm(w) for w in words[:max_words]]
+    for k in range(min(len(tail), len(head)), 0, -1):
+        if tail[-k:] == head[:k] and any(head[:k]):
+            return " ".join(words[k:])
+    return text
+
+
+@dataclass
+class Segment:
+    wav: bytes
+    start: int  # first sample, counted from the start of the stream
+    end: int
+    sample_rate: int
+    # Samples at the start repeated from the previous (cut) segment
+    overlap: int = 0
+
+    @property
+    def start_seconds(self) -> float:
+        return self.start / self.sample_rate
+
+    @property
+    def end_seconds(self) -> float:
+        return self.end / self.sample_rate
+
+    def span(self, offset: float = 0.0) -> Tuple[float, float]:
+        """(ts_start, ts_end) in seconds from ``offset``, excluding the overlap already
+        covered by the previous segment."""
+        return offset + (self.start + self.overlap) / self.sample_rate, offset + self.end_seconds
+
+
+class AudioStream:
+    def __init__(self, sample_rate: Optional[int] = None) -> None:
+        self.sample_rate = int(sample_rate or settings.LIVE_AUDIO_SAMPLE_RATE)
+        self.channels = 1
+        self._odd = b""  # trailing byte(s) of an incomplete sample frame
+        self._configure()
+        # Samples since ``self._base`` (absolute index of self._buf[0])
+        self._buf = np.zeros(0, dtype=np.int16)
+        self._base = 0
+        self._frames_pending = np.zeros(0, dtype=np.int16)
+        self._floor: Optional[float] = None
+        self._run = 0  # consecutive voiced frames while idle
+        self._seg_start: Optional[int] = None
+        self._seg_overlap = 0
+        self._onset = 0
+        self._last_voiced = 0
+        self._silence = 0
+
+    def _configure(self) -> None:
+        rate = self.sample_rate
+        self.frame = max(1, rate * settings.LIVE_VAD_FRAME_MS // 1000)
+        self.preroll = rate * settings.LIVE_VAD_PREROLL_MS // 1000
+        self.hangover = rate * settings.LIVE_VAD_HANGOVER_MS // 1000
+        self.min_len = rate * settings.LIVE_SEGMENT_MIN_MS // 1000
+        self.max_len = int(rate * settings.LIVE_SEGMENT_MAX_SECONDS)
+        self.overlap = min(rate * settings.LIVE_SEGMENT_OVERLAP_MS // 1000, self.max_len // 2)
+
+    @property
+    def position(self) -> int:
+        """Samples received so far."""
+        return self._base + len(self._buf) + len(self._frames_pending)
+
+    def feed(self, data: bytes) -> List[Segment]:
+        header = parse_wav_header(data)
+        if header is not None:
+            rate, self.channels, _, offset = header
+            data = data[offset:]
+            self._odd = b""
+            if rate != self.sample_rate:
+                if self.position:
+                    raise ValueError("sample rate changed mid-stream")
+                self.sample_rate = rate
+                self._configure()
+        data = self._odd + data
+        step = _SAMPLE_WIDTH * self.channels
+        cut = len(data) - len(data) % step
+        self._odd = data[cut:]
+        samples = np.frombuffer(data[:cut], dtype="<i2")
+        if self.channels > 1:
+            samples = samples.reshape(-1, self.channels).mean(axis=1).astype(np.int16)
+        return self._push(samples)
+
+    def flush(self) -> Optional[Segment]:
+        """End the current utterance (if any) and return it; the stream stays usable."""
+        self._push(np.zeros(0, dtype=np.int16))
+        pending, self._frames_pending = self._frames_pending, np.zeros(0, dtype=np.int16)
+        self._buf = np.concatenate([self._buf, pending])
+        seg = None
+        if self._seg_start is not None:
+            seg = self._emit(self._seg_start, self.position)
+        self._seg_start, self._run, self._silence = None, 0, 0
+        self._trim()
+        return seg
+
+    def _push(self, samples: np.ndarray) -> List[Segment]:
+        pending = np.concatenate([self._frames_pending, samples])
+        n = len(pending) // self.frame
+        self._frames_pending = pending[n * self.frame :]
+        if not n:
+            return []
+        frames = pending[: n * self.frame].reshape(n, self.frame).astype(np.float32)
+        rms = np.sqrt(np.mean(frames * frames, axis=1))
+        dbfs = 20.0 * np.log10(rms / 32768.0 + 1e-10)
+        first = self._base + len(self._buf)
+        self._buf = np.concatenate([self._buf, pending[: n * self.frame]])
+        out: List[Segment] = []
+        if self._floor is None:
+            # Start no higher than the absolute threshold, so a stream that opens mid-speech is heard
+            self._floor = min(float(dbfs[0]), settings.LIVE_VAD_MIN_DBFS)
+        for i, db in enumerate(dbfs.tolist()):
+            voiced = db >= max(settings.LIVE_VAD_MIN_DBFS, self._floor + settings.LIVE_VAD_MARGIN_DB)
+            # Noise floor: follows drops quickly, rises slowly (~3 s), so speech barely moves it
+            self._floor += (db - self._floor) * (0.3 if db < self._floor else 0.01)
+            start = first + i * self.frame
+            end = start + self.frame
+            if self._seg_start is None:
+                self._run = self._run + 1 if voiced else 0
+                if self._run >= settings.LIVE_VAD_START_FRAMES:
+                    self._onset = end - self._run * self.frame
+                    self._seg_start = max(self._base, self._onset - self.preroll)
+                    self._seg_overlap = 0
+                    self._last_voiced, self._silence = end, 0
+                continue
+            if voiced:
+                self._last_voiced, self._silence = end, 0
+            else:
+                self._silence += self.frame
+            if self._silence >= self.hangover:
+                seg = self._emit(self._seg_start, min(end, self._last_voiced + self.preroll))
+                if seg is not None:
+                    out.append(seg)
+                self._seg_start, self._run = None, 0
+            elif end - self._seg_start >= self.max_len:
+                seg = self._emit(self._seg_start, end)
+                if seg is not None:
+                    out.append(seg)
+                # Continue the utterance with a short overlap so the cut word is heard whole
+                self._seg_start = end - self.overlap
+                self._seg_overlap = self.overlap
+        self._trim()
+        return out
+
+    def _emit(self, start: int, end: int) -> Optional[Segment]:
+        # Only voiced audio (not pre-roll, trailing pad or overlap) counts towards the minimum
+        voiced = min(end, self._last_voiced) - max(start + self._seg_overlap, self._onset)
+        if voiced < self.min_len:
+            return None
+        pcm = self._buf[start - self._base : end - self._base].astype("<i2").tobytes()
+        return Segment(wav_bytes(pcm, self.sample_rate), start, end, self.sample_rate, self._seg_overlap)
+
+    def _trim(self) -> None:
+        if self._seg_start is not None:
+            keep_from = self._seg_start
+        else:
+            # Idle: keep the voiced run so far plus pre-roll for the next onset
+            keep_from = self._base + len(self._buf) - self._run * self.frame - self.preroll
+        drop = min(len(self._buf), max(0, keep_from - self._base))
+        if drop:
+            self._buf = self._buf[drop:]
+            self._base += drop
@@ -0,0 +1,151 @@
+"""Per-operation circuit breakers for provider calls.
+
+Each operation ("summary", "transcribe", "vision", ...) keeps a rolling window of
+recent outcomes. A call that raises, or succeeds slower than LLM_BREAKER_SLOW_SECONDS,
+counts as a failure; once the window holds at least LLM_BREAKER_MIN_CALLS outcomes
+and the failure ratio reaches LLM_BREAKER_FAILURE_RATIO the breaker opens and calls
+fail immediately with ``503 llm_unavailable`` (services fall back to their
+heuristics) instead of waiting out REQUEST_TIMEOUT_SECONDS. After
+LLM_BREAKER_OPEN_SECONDS one probe call is let through: success closes the
+breaker, failure re-opens it.
+
+Successful call latencies are also kept per operation for the hedging delay (p95).
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+from ..core.config import settings
+from ..core.security import api_error
+
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitBreaker:
+    def __init__(self, op: str, window: int, min_calls: int, failure_ratio: float, slow_seconds: float, open_seconds: float, enabled: bool = True) -> None:
+        self.op = op
+        self.min_calls = max(1, int(min_calls))
+        self.failure_ratio = float(failure_ratio)
+        self.slow_seconds = float(slow_seconds)
+        self.open_seconds = float(open_seconds)
+        self.enabled = enabled
+        self._outcomes: Deque[bool] = deque(maxlen=max(self.min_calls, int(window)))
+        self._latencies: Deque[float] = deque(maxlen=200)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probe_out = False
+        self._lock = threading.Lock()
+        self.rejected = 0
+        self.trips = 0
+        # Hedged second attempts started (see gemini_provider.generate_content_async)
+        self.hedges = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    def before_call(self) -> None:
+        """Raise 503 llm_unavailable while open; in half-open, admit a single probe."""
+        if not self.enabled:
+            return
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+                self._state = HALF_OPEN
+                self._probe_out = False
+            if self._state == CLOSED:
+                return
+            if self._state == HALF_OPEN and not self._probe_out:
+                self._probe_out = True
+                return
+            self.rejected += 1
+        api_error(f"LLM {self.op} temporarily unavailable", code="llm_unavailable", status_code=503)
+
+    def record(self, ok: bool, latency: Optional[float] = None) -> None:
+        if ok and latency is not None:
+            with self._lock:
+                self._latencies.append(latency)
+        if not self.enabled:
+            return
+        failed = not ok or (latency is not None and latency > self.slow_seconds)
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._probe_out = False
+                if failed:
+                    self._trip()
+                else:
+                    self._state = CLOSED
+                    self._outcomes.clear()
+                return
+            self._outcomes.append(failed)
+            n = len(self._outcomes)
+            if self._state == CLOSED and n >= self.min_calls and sum(self._outcomes) / n >= self.failure_ratio:
+                self._trip()
+
+    def release(self) -> None:
+        """The admitted call ended without a provider outcome (e.g. it never got a scheduler slot)."""
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._probe_out = False
+
+    def p95(self, min_samples: int) -> Optional[float]:
+        with self._lock:
+            if len(self._latencies) < max(1, min_samples):
+                return None
+            ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            n = len(self._outcomes)
+            return {
+                "state": self._state,
+                "window_calls": n,
+                "failure_ratio": round(sum(self._outcomes) / n, 3) if n else 0.0,
+                "trips": self.trips,
+                "rejected": self.rejected,
+                "hedges": self.hedges,
+            }
+
+    def _trip(self) -> None:
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+        self.trips += 1
+
+
+class BreakerRegistry:
+    def __init__(self) -> None:
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, op: str) -> CircuitBreaker:
+        with self._lock:
+            b = self._breakers.get(op)
+            if b is None:
+                b = self._breakers[op] = CircuitBreaker(
+                    op,
+                    window=settings.LLM_BREAKER_WINDOW,
+                    min_calls=settings.LLM_BREAKER_MIN_CALLS,
+                    failure_ratio=settings.LLM_BREAKER_FAILURE_RATIO,
+                    slow_seconds=settings.LLM_BREAKER_SLOW_SECONDS,
+                    open_seconds=settings.LLM_BREAKER_OPEN_SECONDS,
+                    enabled=settings.LLM_BREAKER_ENABLED,
+                )
+            return b
+
+    def reset(self) -> None:
+        with self._lock:
+            self._breakers.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            items = list(self._breakers.items())
+        return {op: b.stats() for op, b in items}
+
+
+breakers = BreakerRegistry()
@@ -1,8 +1,11 @@
 import os
 import json
-from typing import Any, Dict
+from typing import Any, Dict, Optional
+
+from fastapi import HTTPException
 
 from app.core.config import settings
+from app.services import gemini_provider
 
 try:
     import google.generativeai as genai  # type: ignore
@@ -21,31 +24,40 @@ SCHEMA_PROMPT = (
 )
 
 
-def extract_from_email(subject: str, body: str) -> Dict[str, Any]:
-    """Use Gemini to extract structured fields from an email.
-    Falls back to a heuristic when DEV_FAKE_LLM is set or Gemini is unavailable.
-    """
-    if settings.DEV_FAKE_LLM or genai is None or not settings.GEMINI_API_KEY:
-        # Heuristic fallback for dev/demo
-        low = (subject + "\n" + body).lower()
-        kind = "homework" if any(k in low for k in ["due", "deadline", "assignment"]) else "meeting"
-        title = subject[:140] or ("Homework" if kind == "homework" else "Meeting")
-        return {"type": kind, "title": title, "confidence": 0.4}
+def _keyword_guess(subject: str, body: str) -> Dict[str, Any]:
+    low = (subject + "\n" + body).lower()
+    kind = "homework" if any(k in low for k in ["due", "deadline", "assignment"]) else "meeting"
+    title = subject[:140] or ("Homework" if kind == "homework" else "Meeting")
+    return {"type": kind, "title": title, "confidence": 0.4}
+
 
+def _heuristic(subject: str, body: str) -> Optional[Dict[str, Any]]:
+    """Heuristic result when DEV_FAKE_LLM is set or Gemini is unavailable, else None."""
+    if settings.DEV_FAKE_LLM:
+        return _keyword_guess(subject, body)
+    if settings.LLM_SIM:
+        # The provider answers from the latency simulator; no SDK or key needed
+        return None
+    if genai is None or not settings.GEMINI_API_KEY:
+        # Heuristic fallback for dev/demo
+        return _keyword_guess(subject, body)
     if not hasattr(genai, "GenerativeModel"):
         # Safety fallback if SDK shape is unexpected
         return {"type": "meeting", "title": subject[:140], "confidence": 0.5}
+    return None
 
-    # Configure and call Gemini
-    try:
-        if hasattr(genai, "configure"):
-            genai.configure(api_key=settings.GEMINI_API_KEY)  # type: ignore[attr-defined]
-    except Exception:
-        pass
-    prompt = f"Subject: {subject}\n\nBody:\n{body}\n\n{SCHEMA_PROMPT}"
-    model = genai.GenerativeModel(MODEL)  # type: ignore[attr-defined]
-    resp = model.generate_content(prompt, request_options={"timeout": settings.REQUEST_TIMEOUT_SECONDS or 30})
-    text = (getattr(resp, "text", None) or "").strip()
+
+def _prompt(subject: str, body: str) -> str:
+    return f"Subject: {subject}\n\nBody:\n{body}\n\n{SCHEMA_PROMPT}"
+
+
+def _unavailable(exc: HTTPException) -> bool:
+    """Circuit breaker open: degrade to the keyword heuristic instead of failing the email."""
+    return isinstance(exc.detail, dict) and exc.detail.get("code") == "llm_unavailable"
+
+
+def _parse(subject: str, text: str) -> Dict[str, Any]:
+    text = text.strip()
     if text.startswith("```"):
         try:
             text = text.split("```")[-2]
@@ -59,3 +71,34 @@ def extract_from_email(subject: str, body: str) -> Dict[str, Any]:
     except Exception:
         # very defensive fallback
         return {"type": "meeting", "title": subject[:140], "confidence": 0.5}
+
+
+def extract_from_email(subject: str, body: str) -> Dict[str, Any]:
+    """Use Gemini to extract structured fields from an email.
+    Falls back to a heuristic when DEV_FAKE_LLM is set, Gemini is unavailable,
+    or the email circuit breaker is open.
+    """
+    fallback = _heuristic(subject, body)
+    if fallback is not None:
+        return fallback
+    # The shared provider configures the SDK once, not per email
+    try:
+        text = gemini_provider.generate_text("email", _prompt(subject, body), model_name=MODEL, timeout=settings.REQUEST_TIMEOUT_SECONDS or 30)
+    except HTTPException as exc:
+        if _unavailable(exc):
+            return _keyword_guess(subject, body)
+        raise
+    return _parse(subject, text)
+
+
+async def extract_from_email_async(subject: str, body: str) -> Dict[str, Any]:
+    fallback = _heuristic(subject, body)
+    if fallback is not None:
+        return fallback
+    try:
+        text = await gemini_provider.generate_text_async("email", _prompt(subject, body), model_name=MODEL, timeout=settings.REQUEST_TIMEOUT_SECONDS or 30)
+    except HTTPException as exc:
+        if _unavailable(exc):
+            return _keyword_guess(subject, body)
+        raise
+    return _parse(subject, text)
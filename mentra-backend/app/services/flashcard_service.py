@@ -1,21 +1,78 @@
-from typing import List, Optional, Sequence, cast as _cast
+from typing import Any, Dict, List, Optional, Sequence, cast as _cast
 from sqlalchemy.orm import Session
 from uuid import uuid4
-from ..models.entities import Flashcard, Session as SessionModel, TranscriptChunk
+from ..core.config import settings
+from ..db.session import get_async_session
+from ..models.entities import Flashcard, FlashcardCourse, Session as SessionModel, SessionCourse
 import json as _json
 from . import llm_service
+from .retrieval import relevant_context_async
+from .single_flight import flight_key, single_flight
+from .transcript_cache import transcript_cache
+from .transcript_service import pinned_texts
 
 
 def get_session_transcript(db: Session, session_id: str) -> str:
-    chunks = (
-        db.query(TranscriptChunk)
-        .filter(TranscriptChunk.session_id == session_id)
-        .order_by(TranscriptChunk.ts_start.asc())
-        .all()
+    return transcript_cache.get(db, session_id)
+
+
+def _save_generated(db: Session, session_id: str, cards: Dict[str, List[Dict[str, Any]]]) -> None:
+    if not db.get(SessionModel, session_id):
+        # Create a placeholder session so future artifacts can attach safely
+        db.add(SessionModel(id=session_id, title="Imported", is_active=True))
+        db.flush()
+    # If session has an assigned course, link generated flashcards to that course
+    assigned_course_id: Optional[str] = None
+    sc = db.query(SessionCourse).filter(SessionCourse.session_id == session_id).first()
+    if sc:
+        assigned_course_id = sc.course_id
+    for t, items in cards.items():
+        for it in items:
+            ans = it["answer"]
+            ans_str = _json.dumps(ans) if isinstance(ans, dict) else str(ans)
+            fc = Flashcard(
+                session_id=session_id,
+                type=t,
+                question=it.get("question", ""),
+                answer=ans_str,
+                source_ts=it.get("source_ts"),
+            )
+            db.add(fc)
+            db.flush()
+            if assigned_course_id:
+                db.add(FlashcardCourse(flashcard_id=fc.id, course_id=assigned_course_id))
+
+
+async def generate_session_flashcards(
+    session_id: str, types: Sequence[str], max_per_type: int, topic: Optional[str] = None
+) -> Optional[Dict[str, List[Dict[str, Any]]]]:
+    """Generate and persist flashcards from the session transcript; None when there is no transcript.
+
+    With ``topic``, only the transcript chunks most relevant to it are sent (falling
+    back to the whole transcript when nothing matches). No DB connection is held
+    while the LLM call is in flight. Identical concurrent requests share one
+    generation, so cards are only saved once.
+    """
+    key = flight_key("flashcards", session_id, {"types": list(types), "max_per_type": max_per_type, "topic": topic})
+    return await single_flight.do(key, lambda: _generate_and_save(session_id, types, max_per_type, topic))
+
+
+async def _generate_and_save(session_id: str, types: Sequence[str], max_per_type: int, topic: Optional[str]) -> Optional[Dict[str, List[Dict[str, Any]]]]:
+    transcript_text = await relevant_context_async(session_id, topic, k=settings.RETRIEVAL_TOP_K * 2) if topic else None
+    pinned: List[str] = []
+    if transcript_text is None:
+        async with get_async_session() as adb:
+            transcript_text = await adb.run_sync(transcript_cache.get, session_id)
+            pinned = await adb.run_sync(pinned_texts, session_id, transcript_text)
+    if not transcript_text.strip():
+        return None
+    cards = await llm_service.generate_flashcards_async(
+        transcript_text, _cast(List[llm_service.FlashcardType], list(types)), max_per_type, pinned=pinned
     )
-    # Ensure we join actual strings to satisfy type checkers
-    texts = [str(getattr(c, "text", "")) for c in chunks]
-    return "\n".join(texts)
+    async with get_async_session() as adb:
+        await adb.run_sync(_save_generated, session_id, cards)
+        await adb.commit()
+    return cards
 
 
 def create_flashcards_for_session(db: Session, session_id: str, types: Sequence[llm_service.FlashcardType], max_per_type: int):
@@ -0,0 +1,382 @@
+"""Shared Gemini provider used by the LLM, transcription, vision and email services.
+
+Configures ``google.generativeai`` once per API key and pools ``GenerativeModel``
+instances keyed by (model name, generation config), so requests reuse a model
+instead of building one per call. ``generate_content_async`` awaits the SDK's
+native coroutine so async handlers don't hold a threadpool slot for the round trip.
+Every call is admitted through ``llm_scheduler`` (rate limit, in-flight cap, and
+priority by ``op``); the request timeout starts once the call is admitted. A
+per-op circuit breaker (``circuit_breaker.breakers``) fails calls fast with
+``503 llm_unavailable`` while the provider is failing or too slow.
+``generate_text``/``generate_text_async`` add the llm_cache lookup in front;
+``stream_text_async`` yields text as the model produces it (``stream=True``).
+"""
+from __future__ import annotations
+
+import asyncio
+import inspect
+import json
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+
+from fastapi import HTTPException
+
+from ..core import config as _config
+from ..core.security import api_error
+from .circuit_breaker import CircuitBreaker, breakers
+from .llm_cache import cache_key, llm_cache
+from .llm_scheduler import llm_scheduler
+from .sim_llm import SimClient
+
+
+JSON_CONFIG: Dict[str, Any] = {"response_mime_type": "application/json"}
+
+T = TypeVar("T")
+
+
+@dataclass
+class _PooledModel:
+    model: Any
+    # Set when the model class doesn't take generation_config at construction;
+    # it is then passed on every call instead
+    call_config: Optional[Dict[str, Any]]
+
+
+_lock = threading.Lock()
+_client: Any = None
+_client_key: Optional[str] = None
+_models: Dict[Tuple[str, str], _PooledModel] = {}
+
+
+def _settings():
+    # Read through the module so tests that reload app.core.config are honoured
+    return _config.settings
+
+
+def default_model() -> str:
+    return _settings().MODEL or "gemini-1.5-pro"
+
+
+def get_client(api_key: Optional[str] = None) -> Any:
+    """The configured SDK module; configure() runs only when the module or key changes.
+
+    With LLM_SIM set this is the in-process latency simulator instead (no key needed).
+    """
+    global _client, _client_key
+    if _settings().LLM_SIM:
+        with _lock:
+            if not isinstance(_client, SimClient):
+                _client, _client_key = SimClient(_settings()), None
+                _models.clear()
+            return _client
+    try:
+        import google.generativeai as genai  # type: ignore[import-not-found]
+    except Exception as e:
+        api_error(f"Gemini client import failed: {e}", code="llm_import", status_code=500)
+    key = api_key or _settings().GOOGLE_API_KEY
+    if not key:
+        api_error("GOOGLE_API_KEY is required for Gemini", code="llm_config", status_code=500)
+    with _lock:
+        if genai is not _client or key != _client_key:
+            _configure = getattr(genai, "configure", None)
+            if callable(_configure):
+                _configure(api_key=key)
+            _client, _client_key = genai, key
+            _models.clear()
+    return genai
+
+
+def get_model(model_name: Optional[str] = None, generation_config: Optional[Dict[str, Any]] = None) -> _PooledModel:
+    genai = get_client()
+    name = model_name or default_model()
+    pool_key = (name, json.dumps(generation_config or {}, sort_keys=True))
+    with _lock:
+        pooled = _models.get(pool_key)
+        if pooled is not None:
+            return pooled
+    factory = getattr(genai, "GenerativeModel", None)
+    if not callable(factory):
+        api_error("Gemini client missing GenerativeModel", code="llm_import", status_code=500)
+    if generation_config:
+        try:
+            pooled = _PooledModel(factory(name, generation_config=generation_config), None)
+        except TypeError:
+            pooled = _PooledModel(factory(name), generation_config)
+    else:
+        pooled = _PooledModel(factory(name), None)
+    with _lock:
+        return _models.setdefault(pool_key, pooled)
+
+
+def reset() -> None:
+    """Drop pooled models and force reconfiguration on next use."""
+    global _client, _client_key
+    with _lock:
+        _models.clear()
+        _client, _client_key = None, None
+
+
+def sim_stats() -> Optional[Dict[str, Any]]:
+    """Simulator call counts when LLM_SIM is active, else None."""
+    client = _client
+    return client.stats() if isinstance(client, SimClient) else None
+
+
+def is_timeout(exc: BaseException) -> bool:
+    return isinstance(exc, TimeoutError) or type(exc).__name__ == "DeadlineExceeded"
+
+
+def _call_kwargs(pooled: _PooledModel, timeout: Optional[float]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    base: Dict[str, Any] = {}
+    if pooled.call_config:
+        base["generation_config"] = pooled.call_config
+    return {**base, "request_options": {"timeout": timeout}}, base
+
+
+def generate_content(
+    parts: Any,
+    *,
+    op: str = "default",
+    model_name: Optional[str] = None,
+    generation_config: Optional[Dict[str, Any]] = None,
+    timeout: Optional[float] = None,
+) -> Any:
+    """Blocking generate_content on a pooled model (for sync callers such as MCP tools)."""
+    breaker = breakers.get(op)
+    breaker.before_call()
+    try:
+        pooled = get_model(model_name, generation_config)
+        with_opts, without_opts = _call_kwargs(pooled, timeout or _settings().REQUEST_TIMEOUT_SECONDS)
+        with llm_scheduler.slot(op):
+            started = time.monotonic()
+            try:
+                resp = pooled.model.generate_content(parts, **with_opts)
+            except TypeError:
+                # Older SDKs/fakes may not accept request_options
+                resp = pooled.model.generate_content(parts, **without_opts)
+    except HTTPException:
+        # Config error or scheduler rejection: no provider outcome to record
+        breaker.release()
+        raise
+    except Exception:
+        breaker.record(False)
+        raise
+    breaker.record(True, time.monotonic() - started)
+    return resp
+
+
+async def generate_content_async(
+    parts: Any,
+    *,
+    op: str = "default",
+    model_name: Optional[str] = None,
+    generation_config: Optional[Dict[str, Any]] = None,
+    timeout: Optional[float] = None,
+) -> Any:
+    """Awaitable generate_content; bounded by ``timeout`` (raises TimeoutError).
+
+    Uses the SDK's native ``generate_content_async`` when the model has one,
+    otherwise runs the blocking call in a worker thread. For operations listed in
+    LLM_HEDGE_OPS a second attempt is started once the first has run longer than the
+    operation's recent p95 latency; the first answer wins and the other is cancelled.
+    """
+    breaker = breakers.get(op)
+    breaker.before_call()
+    try:
+        pooled = get_model(model_name, generation_config)
+    except HTTPException:
+        breaker.release()
+        raise
+    timeout = timeout or _settings().REQUEST_TIMEOUT_SECONDS
+    with_opts, without_opts = _call_kwargs(pooled, timeout)
+    native = getattr(pooled.model, "generate_content_async", None)
+
+    async def _call(kwargs: Dict[str, Any]) -> Any:
+        if native is not None and inspect.iscoroutinefunction(native):
+            return await native(parts, **kwargs)
+        return await asyncio.to_thread(pooled.model.generate_content, parts, **kwargs)
+
+    async def _with_fallback() -> Any:
+        try:
+            return await _call(with_opts)
+        except TypeError:
+            return await _call(without_opts)
+
+    async def _attempt() -> Tuple[Any, float]:
+        async with llm_scheduler.slot_async(op):
+            started = time.monotonic()
+            resp = await asyncio.wait_for(_with_fallback(), timeout)
+            return resp, time.monotonic() - started
+
+    try:
+        resp, latency = await _hedged(_attempt, _hedge_delay(op, breaker), breaker)
+    except HTTPException:
+        breaker.release()
+        raise
+    except Exception:
+        breaker.record(False)
+        raise
+    except BaseException:
+        breaker.release()
+        raise
+    breaker.record(True, latency)
+    return resp
+
+
+def _hedge_delay(op: str, breaker: CircuitBreaker) -> Optional[float]:
+    cfg = _settings()
+    if op not in cfg.LLM_HEDGE_OPS:
+        return None
+    p95 = breaker.p95(cfg.LLM_HEDGE_MIN_SAMPLES)
+    return None if p95 is None else max(cfg.LLM_HEDGE_MIN_DELAY_SECONDS, p95)
+
+
+async def _hedged(attempt: Callable[[], Awaitable[T]], delay: Optional[float], breaker: CircuitBreaker) -> T:
+    """Run ``attempt``; if it hasn't finished after ``delay`` seconds start a second one
+    and return whichever succeeds first (the error of the last one if both fail)."""
+    if delay is None:
+        return await attempt()
+    pending = {asyncio.ensure_future(attempt())}
+    try:
+        done, pending = await asyncio.wait(pending, timeout=delay)
+        if not done:
+            breaker.hedges += 1
+            pending.add(asyncio.ensure_future(attempt()))
+        else:
+            pending = done
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for t in done:
+                if t.exception() is None:
+                    return t.result()
+                error = t.exception()
+        assert error is not None
+        raise error
+    finally:
+        for t in pending:
+            t.cancel()
+
+
+def _cacheable(text: str, generation_config: Optional[Dict[str, Any]]) -> bool:
+    if not text:
+        return False
+    if (generation_config or {}).get("response_mime_type") == "application/json":
+        # Never pin a malformed JSON answer in the cache
+        try:
+            json.loads(text)
+        except ValueError:
+            return False
+    return True
+
+
+def generate_text(
+    op: str, parts: Any, *, model_name: Optional[str] = None, generation_config: Optional[Dict[str, Any]] = None, timeout: Optional[float] = None
+) -> str:
+    """generate_content returning ``response.text``, served from llm_cache when the
+    same (op, model, parts, generation config) was answered within the op's TTL."""
+    name = model_name or default_model()
+    key = cache_key(op, name, parts, generation_config)
+    cached = llm_cache.get(op, key)
+    if cached is not None:
+        return cached
+    resp = generate_content(parts, op=op, model_name=name, generation_config=generation_config, timeout=timeout)
+    text = getattr(resp, "text", None) or ""
+    if _cacheable(text, generation_config):
+        llm_cache.set(op, key, text)
+    return text
+
+
+async def generate_text_async(
+    op: str, parts: Any, *, model_name: Optional[str] = None, generation_config: Optional[Dict[str, Any]] = None, timeout: Optional[float] = None
+) -> str:
+    name = model_name or default_model()
+    key = cache_key(op, name, parts, generation_config)
+    cached = await llm_cache.aget(op, key)
+    if cached is not None:
+        return cached
+    resp = await generate_content_async(parts, op=op, model_name=name, generation_config=generation_config, timeout=timeout)
+    text = getattr(resp, "text", None) or ""
+    if _cacheable(text, generation_config):
+        await llm_cache.aset(op, key, text)
+    return text
+
+
+def _piece_text(chunk: Any) -> str:
+    try:
+        return getattr(chunk, "text", None) or ""
+    except ValueError:
+        # The SDK raises for chunks without text parts (e.g. a bare finish reason)
+        return ""
+
+
+_END = object()
+
+
+async def _stream_pieces(pooled: _PooledModel, parts: Any, timeout: float) -> AsyncIterator[str]:
+    kwargs: Dict[str, Any] = {"stream": True}
+    if pooled.call_config:
+        kwargs["generation_config"] = pooled.call_config
+    native = getattr(pooled.model, "generate_content_async", None)
+    if native is not None and inspect.iscoroutinefunction(native):
+        resp = await asyncio.wait_for(native(parts, **kwargs), timeout)
+        chunks = resp.__aiter__()
+        while True:
+            try:
+                chunk = await asyncio.wait_for(chunks.__anext__(), timeout)
+            except StopAsyncIteration:
+                return
+            yield _piece_text(chunk)
+    else:
+        it = await asyncio.wait_for(asyncio.to_thread(lambda: iter(pooled.model.generate_content(parts, **kwargs))), timeout)
+        while True:
+            chunk = await asyncio.wait_for(asyncio.to_thread(next, it, _END), timeout)
+            if chunk is _END:
+                return
+            yield _piece_text(chunk)
+
+
+async def stream_text_async(
+    op: str, parts: Any, *, model_name: Optional[str] = None, generation_config: Optional[Dict[str, Any]] = None, timeout: Optional[float] = None
+) -> AsyncIterator[str]:
+    """Yield response text pieces as they are generated.
+
+    A cached answer is replayed as one piece, and a completed stream is cached like
+    generate_text_async. ``timeout`` bounds the wait for each piece rather than the
+    whole stream. The scheduler slot is held until the stream ends or is closed.
+    """
+    name = model_name or default_model()
+    key = cache_key(op, name, parts, generation_config)
+    cached = await llm_cache.aget(op, key)
+    if cached is not None:
+        yield cached
+        return
+    breaker = breakers.get(op)
+    breaker.before_call()
+    timeout = timeout or _settings().REQUEST_TIMEOUT_SECONDS
+    pieces = []
+    started = time.monotonic()
+    try:
+        pooled = get_model(name, generation_config)
+        async with llm_scheduler.slot_async(op):
+            started = time.monotonic()
+            async for piece in _stream_pieces(pooled, parts, timeout):
+                if piece:
+                    pieces.append(piece)
+                    yield piece
+    except HTTPException:
+        breaker.release()
+        raise
+    except Exception:
+        breaker.record(False)
+        raise
+    except BaseException:
+        # Consumer went away (GeneratorExit) or the task was cancelled
+        breaker.release()
+        raise
+    breaker.record(True, time.monotonic() - started)
+    text = "".join(pieces)
+    if _cacheable(text, generation_config):
+        await llm_cache.aset(op, key, text)
@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import List, Sequence
+
+from sqlalchemy import select
+
+from ..core.config import settings
+from ..core.schemas import WebhookChunk
+from ..db.session import get_session
+from ..models.entities import Session
+from .transcript_service import bulk_insert_chunks
+
+
+log = logging.getLogger(__name__)
+
+
+@dataclass
+class _Batch:
+    session_id: str
+    chunks: Sequence[WebhookChunk]
+
+
+_STOP = object()
+
+
+class IngestQueue:
+    """Write-behind queue for transcript chunks with group commit.
+
+    Producers (the webhook threadpool and the live-audio socket) call enqueue() and
+    return immediately; a single writer thread drains the queue and commits once
+    ``max_rows`` chunks are pending or ``max_delay_ms`` has passed since the first one,
+    so many requests share one transaction (and one fsync).
+
+    If a group fails to commit, it is rolled back and each batch is retried on its own
+    (up to ``retry_attempts`` times with backoff; chunk ids make retries idempotent),
+    so one bad batch cannot take unrelated requests down with it. Batches that still
+    fail are kept in ``failed`` and retried after every later group.
+    """
+
+    def __init__(self, max_rows: int, max_delay_ms: int, max_batches: int, retry_attempts: int = 3, retry_backoff_ms: int = 100) -> None:
+        self.max_rows = max(1, int(max_rows))
+        self.max_delay = max(0, int(max_delay_ms)) / 1000.0
+        self.retry_attempts = max(1, int(retry_attempts))
+        self.retry_backoff = max(0, int(retry_backoff_ms)) / 1000.0
+        self.failed: List[_Batch] = []
+        self._q: queue.Queue = queue.Queue(maxsize=max(0, int(max_batches)))
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        with self._lock:
+            if self.running:
+                return
+            self._thread = threading.Thread(target=self._run, name="ingest-writer", daemon=True)
+            self._thread.start()
+
+    def enqueue(self, session_id: str, chunks: Sequence[WebhookChunk]) -> bool:
+        """Queue chunks for the writer. Returns False when the queue is full so the
+        caller can fall back to a synchronous write."""
+        if not chunks:
+            return True
+        self.start()
+        try:
+            self._q.put_nowait(_Batch(session_id, list(chunks)))
+        except queue.Full:
+            return False
+        return True
+
+    def flush(self) -> None:
+        """Block until everything enqueued so far has been committed (or set aside in ``failed``)."""
+        if self.running:
+            self._q.join()
+
+    def stop(self, timeout: float | None = None) -> None:
+        """Drain pending chunks, then stop the writer (called from app shutdown)."""
+        with self._lock:
+            thread = self._thread
+            if thread is None or not thread.is_alive():
+                return
+            self._q.put(_STOP)
+        thread.join(timeout)
+        with self._lock:
+            self._thread = None
+        if self.failed:
+            log.error("ingest writer stopped with %d uncommitted batches", len(self.failed))
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            item = self._q.get()
+            if item is _STOP:
+                self._q.task_done()
+                break
+            group: List[_Batch] = [item]
+            rows = len(item.chunks)
+            deadline = time.monotonic() + self.max_delay
+            while rows < self.max_rows:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    nxt = self._q.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if nxt is _STOP:
+                    self._q.task_done()
+                    stopping = True
+                    break
+                group.append(nxt)
+                rows += len(nxt.chunks)
+            try:
+                self._commit(group, rows)
+            finally:
+                for _ in group:
+                    self._q.task_done()
+
+    def _commit(self, group: List[_Batch], rows: int) -> None:
+        earlier, self.failed = self.failed, []
+        try:
+            self._write_group(group)
+        except Exception:
+            log.exception("ingest writer failed to commit %d chunks; retrying batches one by one", rows)
+            self.failed = [batch for batch in group if not self._retry(batch)]
+        # Batches set aside earlier get another chance with every group
+        self.failed = [batch for batch in earlier if not self._try_write(batch)] + self.failed
+
+    def _retry(self, batch: _Batch) -> bool:
+        for attempt in range(self.retry_attempts):
+            if attempt:
+                time.sleep(self.retry_backoff * 2 ** (attempt - 1))
+            if self._try_write(batch):
+                return True
+        log.error("ingest writer kept %d chunks for session %s after %d failed attempts", len(batch.chunks), batch.session_id, self.retry_attempts)
+        return False
+
+    def _try_write(self, batch: _Batch) -> bool:
+        try:
+            self._write_group([batch])
+        except Exception:
+            log.warning("ingest writer failed to commit a batch for session %s", batch.session_id, exc_info=True)
+            return False
+        return True
+
+    def _write_group(self, group: Sequence[_Batch]) -> None:
+        with get_session() as db:
+            try:
+                sids = {b.session_id for b in group}
+                existing = set(db.scalars(select(Session.id).where(Session.id.in_(sids))))
+                for sid in sids - existing:
+                    db.add(Session(id=sid, title="Imported", is_active=True))
+                db.flush()
+                for b in group:
+                    bulk_insert_chunks(db, b.session_id, b.chunks)
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+
+
+ingest_queue = IngestQueue(
+    max_rows=settings.INGEST_GROUP_MAX_ROWS,
+    max_delay_ms=settings.INGEST_GROUP_MAX_DELAY_MS,
+    max_batches=settings.INGEST_QUEUE_MAX_BATCHES,
+    retry_attempts=settings.INGEST_RETRY_ATTEMPTS,
+    retry_backoff_ms=settings.INGEST_RETRY_BACKOFF_MS,
+)
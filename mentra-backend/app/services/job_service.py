@@ -0,0 +1,168 @@
+"""In-process background jobs for slow LLM generations.
+
+Jobs are persisted in the ``job`` table and run as tasks on the server's event loop,
+at most ``JOB_MAX_CONCURRENCY`` at a time. Completion (or failure) is announced on
+the event bus, so clients can follow ``/ws/notify`` instead of polling ``/jobs/{id}``.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+
+from fastapi import HTTPException
+from sqlalchemy import func, select, update
+
+from ..core.config import settings
+from ..core.events import build_event, event_bus
+from ..core.security import api_error
+from ..db.session import get_async_session
+from ..models.entities import Job
+from . import flashcard_service, summary_service
+
+
+log = logging.getLogger(__name__)
+
+JobHandler = Callable[[str, Dict[str, Any]], Awaitable[Any]]
+
+
+async def _run_flashcards(session_id: str, params: Dict[str, Any]) -> Any:
+    cards = await flashcard_service.generate_session_flashcards(
+        session_id, params.get("types") or ["qa"], int(params.get("max_per_type", 1)), topic=params.get("topic")
+    )
+    if cards is None:
+        return {"qa": [], "cloze": [], "mc": []}
+    await event_bus.broadcast(build_event("flashcards.generated", session_id, "Flashcards generated", {"counts": {k: len(v) for k, v in cards.items()}}))
+    return cards
+
+
+async def _run_summary(session_id: str, params: Dict[str, Any]) -> Any:
+    summary = await summary_service.generate_session_summary(session_id, incremental=params.get("mode") == "incremental")
+    await event_bus.broadcast(build_event("summary.generated", session_id, "Summary generated"))
+    return summary
+
+
+HANDLERS: Dict[str, JobHandler] = {"flashcards": _run_flashcards, "summary": _run_summary}
+
+ACTIVE_STATUSES = ("queued", "running")
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def job_view(job: Job) -> Dict[str, Any]:
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "session_id": job.session_id,
+        "status": job.status,
+        "result": json.loads(job.result_json) if job.result_json else None,
+        "error": json.loads(job.error_json) if job.error_json else None,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+    }
+
+
+class JobRunner:
+    def __init__(self, max_concurrency: int, max_pending: int) -> None:
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.max_pending = max(1, int(max_pending))
+        self._tasks: Set[asyncio.Task] = set()
+        self._sem: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._sem is None or self._loop is not loop:
+            self._sem, self._loop = asyncio.Semaphore(self.max_concurrency), loop
+            self._tasks = {t for t in self._tasks if not t.done()}
+        return self._sem
+
+    @property
+    def pending(self) -> int:
+        return sum(1 for t in self._tasks if not t.done())
+
+    async def submit(self, kind: str, session_id: Optional[str], params: Dict[str, Any]) -> Job:
+        """Persist a queued job and schedule it; 503 when too many are already pending."""
+        if kind not in HANDLERS:
+            api_error(f"Unknown job kind: {kind}", code="invalid_job_kind")
+        sem = self._semaphore()
+        if self.pending >= self.max_pending:
+            api_error("Too many pending jobs; retry later", code="jobs_busy", status_code=503)
+        job = Job(kind=kind, session_id=session_id, status="queued", params_json=json.dumps(params))
+        async with get_async_session() as adb:
+            adb.add(job)
+            await adb.commit()
+        task = asyncio.create_task(self._run(job.id, kind, session_id, params, sem), name=f"job-{job.id}")
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    async def _run(self, job_id: str, kind: str, session_id: Optional[str], params: Dict[str, Any], sem: asyncio.Semaphore) -> None:
+        async with sem:
+            await self._update(job_id, status="running", started_at=_now())
+            try:
+                result = await HANDLERS[kind](session_id or "", params)
+            except asyncio.CancelledError:
+                await self._finish(job_id, kind, session_id, "failed", error={"detail": "Job cancelled at shutdown", "code": "job_cancelled"})
+                raise
+            except HTTPException as e:
+                detail = e.detail if isinstance(e.detail, dict) else {"detail": str(e.detail), "code": "job_error"}
+                await self._finish(job_id, kind, session_id, "failed", error=detail)
+            except Exception as e:
+                log.exception("job %s (%s) failed", job_id, kind)
+                await self._finish(job_id, kind, session_id, "failed", error={"detail": str(e), "code": "internal_error"})
+            else:
+                await self._finish(job_id, kind, session_id, "succeeded", result=result)
+
+    async def _update(self, job_id: str, **values: Any) -> None:
+        async with get_async_session() as adb:
+            await adb.execute(update(Job).where(Job.id == job_id).values(**values))
+            await adb.commit()
+
+    async def _finish(self, job_id: str, kind: str, session_id: Optional[str], status: str, result: Any = None, error: Any = None) -> None:
+        await self._update(
+            job_id,
+            status=status,
+            finished_at=_now(),
+            result_json=json.dumps(result) if result is not None else None,
+            error_json=json.dumps(error) if error is not None else None,
+        )
+        data = {"job_id": job_id, "kind": kind, "status": status}
+        if error is not None:
+            data["error"] = error
+        await event_bus.broadcast(build_event(f"job.{status}", session_id, f"{kind} job {status}", data))
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        async with get_async_session() as adb:
+            return await adb.get(Job, job_id)
+
+    async def recover(self) -> int:
+        """Fail jobs left queued/running by a previous process (they can't resume)."""
+        async with get_async_session() as adb:
+            n = await adb.scalar(select(func.count()).select_from(Job).where(Job.status.in_(ACTIVE_STATUSES)))
+            if n:
+                await adb.execute(
+                    update(Job)
+                    .where(Job.status.in_(ACTIVE_STATUSES))
+                    .values(status="failed", finished_at=_now(), error_json=json.dumps({"detail": "Server restarted", "code": "job_interrupted"}))
+                )
+                await adb.commit()
+        return int(n or 0)
+
+    async def shutdown(self, timeout: float = 10.0) -> None:
+        """Let running jobs finish for up to ``timeout`` seconds, then cancel the rest."""
+        tasks = [t for t in self._tasks if not t.done()]
+        if not tasks:
+            return
+        _, still = await asyncio.wait(tasks, timeout=timeout)
+        for t in still:
+            t.cancel()
+        await asyncio.gather(*still, return_exceptions=True)
+
+
+job_runner = JobRunner(max_concurrency=settings.JOB_MAX_CONCURRENCY, max_pending=settings.JOB_MAX_PENDING)
@@ -0,0 +1,88 @@
+"""Incremental scanner for a JSON object streamed in arbitrary text pieces.
+
+Used for streamed summaries: ``feed()`` returns each element of a top-level array
+field (``bullets``, ``sections``, ``keywords``) as soon as that element is complete,
+long before the whole object parses. Text outside the top-level object (e.g. a
+stray code fence) is ignored; ``text`` holds everything fed so far for the final
+full parse.
+"""
+from __future__ import annotations
+
+import json
+from typing import Any, List, Optional, Tuple
+
+
+class JSONItemStream:
+    def __init__(self) -> None:
+        self._text = ""
+        self._pos = 0
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._str_start = 0
+        self._item_start: Optional[int] = None
+        self._expect_key = False
+        self._key: Optional[str] = None
+
+    @property
+    def text(self) -> str:
+        return self._text
+
+    def feed(self, piece: str) -> List[Tuple[str, Any]]:
+        """Consume ``piece``; return ``(field, element)`` for array elements completed by it."""
+        self._text += piece
+        out: List[Tuple[str, Any]] = []
+        text = self._text
+        for i in range(self._pos, len(text)):
+            c = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    self._on_string(text[self._str_start : i + 1], out)
+                continue
+            if c == '"':
+                self._in_string = True
+                self._str_start = i
+            elif c in "{[":
+                if self._in_top_array():
+                    self._item_start = i
+                self._stack.append(c)
+                if len(self._stack) == 1:
+                    self._expect_key = c == "{"
+            elif c in "}]":
+                if self._stack:
+                    self._stack.pop()
+                if self._in_top_array() and self._item_start is not None:
+                    self._emit(text[self._item_start : i + 1], out)
+                    self._item_start = None
+            elif len(self._stack) == 1:
+                if c == ":":
+                    self._expect_key = False
+                elif c == ",":
+                    self._expect_key = True
+        self._pos = len(text)
+        return out
+
+    def _in_top_array(self) -> bool:
+        return len(self._stack) == 2 and self._stack[0] == "{" and self._stack[1] == "["
+
+    def _on_string(self, raw: str, out: List[Tuple[str, Any]]) -> None:
+        if len(self._stack) == 1 and self._expect_key:
+            try:
+                self._key = json.loads(raw)
+            except ValueError:
+                self._key = None
+        elif self._in_top_array():
+            self._emit(raw, out)
+
+    def _emit(self, raw: str, out: List[Tuple[str, Any]]) -> None:
+        if self._key is None:
+            return
+        try:
+            out.append((self._key, json.loads(raw)))
+        except ValueError:
+            pass
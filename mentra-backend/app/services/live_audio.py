@@ -0,0 +1,150 @@
+"""Per-socket live-audio transcription pipeline.
+
+The live-audio WebSocket hands each audio window to ``LiveTranscriber.submit``, which
+starts transcription as its own task and returns, so the socket keeps receiving
+frames while earlier windows are still with the LLM. A single sender task delivers
+results strictly in submission order. At most ``max_in_flight`` windows per socket
+are outstanding (transcribing or waiting to be sent); ``submit`` waits for a free
+slot, which stops the receive loop and lets TCP flow control push back on a client
+that sends audio faster than it can be transcribed. Provider concurrency across
+sockets is bounded separately by ``llm_scheduler``.
+"""
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+from fastapi import HTTPException
+
+from .audio_stream import dedupe_seam
+
+
+Transcribe = Callable[[bytes], Awaitable[str]]
+Send = Callable[[Dict[str, Any]], Awaitable[None]]
+Persist = Callable[[str], Awaitable[None]]
+
+
+@dataclass
+class _Item:
+    result: "asyncio.Future[str]"
+    final: bool = False
+    persist: Optional[Persist] = None
+    message: Optional[Dict[str, Any]] = None
+    slot: bool = False
+    seam: bool = False
+    meta: Optional[Dict[str, Any]] = None
+
+
+class LiveTranscriber:
+    def __init__(self, transcribe: Transcribe, send: Send, max_in_flight: int = 2) -> None:
+        self._transcribe = transcribe
+        self._send = send
+        self._slots = asyncio.Semaphore(max(1, max_in_flight))
+        self._queue: "asyncio.Queue[Optional[_Item]]" = asyncio.Queue()
+        self._pending: Deque[_Item] = deque()
+        self._sender = asyncio.create_task(self._run())
+        self._closed = False
+        self._send_failed = False
+        self._last_text = ""
+
+    async def submit(
+        self, audio: Optional[bytes], final: bool = False, persist: Optional[Persist] = None, seam: bool = False, meta: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """Queue ``audio`` for transcription; waits while the socket is at its in-flight limit.
+
+        ``final`` windows are sent with ``"final": true`` after ``persist(text)`` ran; a
+        final without audio answers with an empty transcript, still in order. ``seam``
+        marks audio that overlaps the previous window: words repeating the end of the
+        previous transcript are dropped. ``meta`` is merged into the transcript message.
+        """
+        if audio:
+            await self._slots.acquire()
+            result: "asyncio.Future[str]" = asyncio.ensure_future(self._transcribe(audio))
+            self._put(_Item(result, final, persist, slot=True, seam=seam, meta=meta))
+        else:
+            self._put(_Item(self._done(""), final, persist))
+
+    def send(self, message: Dict[str, Any]) -> None:
+        """Send a non-transcript message behind any results still pending."""
+        self._put(_Item(self._done(""), message=message))
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._pending)
+
+    async def close(self) -> None:
+        """Stop accepting work. Interim windows still transcribing are cancelled; final
+        windows finish so their transcript is persisted even if the client has gone."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put_nowait(None)
+        for item in self._pending:
+            if not item.final:
+                item.result.cancel()
+        await self._sender
+
+    def _put(self, item: _Item) -> None:
+        self._pending.append(item)
+        self._queue.put_nowait(item)
+
+    @staticmethod
+    def _done(text: str) -> "asyncio.Future[str]":
+        fut: "asyncio.Future[str]" = asyncio.get_running_loop().create_future()
+        fut.set_result(text)
+        return fut
+
+    async def _run(self) -> None:
+        while True:
+            item = await self._queue.get()
+            if item is None:
+                return
+            try:
+                await self._deliver(item)
+            finally:
+                self._pending.popleft()
+                if item.slot:
+                    self._slots.release()
+
+    async def _deliver(self, item: _Item) -> None:
+        if item.message is not None:
+            await self._emit(item.message)
+            return
+        try:
+            text = await item.result
+        except asyncio.CancelledError:
+            if item.result.cancelled():
+                return
+            raise
+        except HTTPException as e:
+            detail = e.detail if isinstance(e.detail, dict) else {"detail": str(e.detail), "code": "llm_error"}
+            await self._emit({"transcript": "", "error": detail.get("detail"), "code": detail.get("code"), **({"final": True} if item.final else {})})
+            return
+        except Exception as e:
+            await self._emit({"transcript": "", "error": str(e), "code": "llm_error", **({"final": True} if item.final else {})})
+            return
+        if item.seam:
+            text = dedupe_seam(self._last_text, text)
+        if text:
+            self._last_text = text
+        if item.persist is not None:
+            try:
+                await item.persist(text)
+            except Exception:
+                # Non-fatal for WS response
+                pass
+        message: Dict[str, Any] = {"transcript": text, **(item.meta or {})}
+        if item.final:
+            message["final"] = True
+        await self._emit(message)
+
+    async def _emit(self, message: Dict[str, Any]) -> None:
+        if self._send_failed:
+            return
+        try:
+            await self._send(message)
+        except Exception:
+            # Client went away; keep draining so final windows are still persisted
+            self._send_failed = True
@@ -0,0 +1,161 @@
+"""Content-addressed cache for LLM responses.
+
+Keys are a SHA-256 over (operation, model, generation config, prompt parts), so a
+regenerate with an identical prompt is served locally. Two tiers: an in-process
+LRU with per-entry expiry, and an optional shared backend (Redis when
+LLM_CACHE_REDIS_URL is set). Each operation has its own TTL from LLM_CACHE_TTLS.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Any, Dict, Optional, Protocol, Tuple
+
+from ..core.config import settings
+
+
+log = logging.getLogger(__name__)
+
+
+class CacheBackend(Protocol):
+    """Shared second tier; redis.Redis satisfies this directly."""
+
+    def get(self, key: str) -> Optional[bytes]: ...
+
+    def set(self, key: str, value: bytes, ex: Optional[int] = None) -> Any: ...
+
+
+def cache_key(op: str, model: str, parts: Any, generation_config: Optional[Dict[str, Any]] = None) -> str:
+    raw = json.dumps([op, model, generation_config or {}, parts], sort_keys=True, separators=(",", ":"), default=str)
+    return f"llm:{op}:" + hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    def __init__(self, max_entries: int, ttls: Dict[str, int], default_ttl: int, backend: Optional[CacheBackend] = None) -> None:
+        self.max_entries = max(0, int(max_entries))
+        self.ttls = dict(ttls)
+        self.default_ttl = int(default_ttl)
+        self.backend = backend
+        self._lru: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[str, int]] = defaultdict(lambda: {"hits": 0, "backend_hits": 0, "misses": 0, "stores": 0})
+
+    def ttl_for(self, op: str) -> int:
+        return int(self.ttls.get(op, self.default_ttl))
+
+    def get(self, op: str, key: str) -> Optional[str]:
+        value = self._get_local(op, key)
+        if value is not None:
+            return value
+        value = self._get_backend(key)
+        self._record_backend(op, key, value)
+        return value
+
+    async def aget(self, op: str, key: str) -> Optional[str]:
+        value = self._get_local(op, key)
+        if value is not None:
+            return value
+        # Network tier off the event loop
+        value = await asyncio.to_thread(self._get_backend, key) if self.backend is not None else None
+        self._record_backend(op, key, value)
+        return value
+
+    def set(self, op: str, key: str, value: str) -> None:
+        ttl = self.ttl_for(op)
+        if ttl <= 0:
+            return
+        self._set_local(op, key, value, ttl)
+        self._set_backend(key, value, ttl)
+
+    async def aset(self, op: str, key: str, value: str) -> None:
+        ttl = self.ttl_for(op)
+        if ttl <= 0:
+            return
+        self._set_local(op, key, value, ttl)
+        if self.backend is not None:
+            await asyncio.to_thread(self._set_backend, key, value, ttl)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._lru.clear()
+            self._counters.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"entries": len(self._lru), "ops": {op: dict(c) for op, c in self._counters.items()}}
+
+    # -- tiers --
+
+    def _get_local(self, op: str, key: str) -> Optional[str]:
+        now = time.monotonic()
+        with self._lock:
+            item = self._lru.get(key)
+            if item is not None and item[0] <= now:
+                del self._lru[key]
+                item = None
+            if item is not None:
+                self._lru.move_to_end(key)
+                self._counters[op]["hits"] += 1
+                return item[1]
+        return None
+
+    def _set_local(self, op: str, key: str, value: str, ttl: int) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._lru[key] = (time.monotonic() + ttl, value)
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.max_entries:
+                self._lru.popitem(last=False)
+            self._counters[op]["stores"] += 1
+
+    def _record_backend(self, op: str, key: str, value: Optional[str]) -> None:
+        with self._lock:
+            self._counters[op]["backend_hits" if value is not None else "misses"] += 1
+        if value is not None:
+            # Promote to the local tier for the rest of the op's TTL window
+            self._set_local(op, key, value, self.ttl_for(op))
+
+    def _get_backend(self, key: str) -> Optional[str]:
+        if self.backend is None:
+            return None
+        try:
+            raw = self.backend.get(key)
+        except Exception as e:  # backend outage degrades to a miss
+            log.warning("llm cache backend get failed: %s", e)
+            return None
+        if raw is None:
+            return None
+        return raw.decode("utf-8") if isinstance(raw, (bytes, bytearray)) else str(raw)
+
+    def _set_backend(self, key: str, value: str, ttl: int) -> None:
+        if self.backend is None:
+            return
+        try:
+            self.backend.set(key, value.encode("utf-8"), ex=ttl)
+        except Exception as e:
+            log.warning("llm cache backend set failed: %s", e)
+
+
+def _redis_backend(url: Optional[str]) -> Optional[CacheBackend]:
+    if not url:
+        return None
+    try:
+        import redis  # type: ignore[import-not-found]
+    except Exception as e:  # pragma: no cover - optional at runtime
+        log.warning("LLM_CACHE_REDIS_URL set but redis is unavailable: %s", e)
+        return None
+    return redis.Redis.from_url(url, socket_timeout=0.25, socket_connect_timeout=0.25)
+
+
+llm_cache = LLMCache(
+    max_entries=settings.LLM_CACHE_MAX_ENTRIES if settings.LLM_CACHE_ENABLED else 0,
+    ttls=settings.LLM_CACHE_TTLS if settings.LLM_CACHE_ENABLED else {},
+    default_ttl=settings.LLM_CACHE_DEFAULT_TTL_SECONDS if settings.LLM_CACHE_ENABLED else 0,
+    backend=_redis_backend(settings.LLM_CACHE_REDIS_URL) if settings.LLM_CACHE_ENABLED else None,
+)
@@ -0,0 +1,216 @@
+"""Process-wide admission control for LLM calls.
+
+Every provider call passes through ``llm_scheduler``: a max-in-flight limit, a
+token-bucket request rate, and priority classes so interactive work (live
+transcription, explain) is admitted ahead of batch generations (summaries,
+flashcards). Waiters are served FIFO within a class; a lower class that has
+waited longer than LLM_STARVATION_SECONDS goes next regardless. Works for both
+threads and coroutines.
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from enum import IntEnum
+from typing import Any, Deque, Dict, Iterator, AsyncIterator, List, Optional
+
+from ..core.config import settings
+from ..core.security import api_error
+
+
+class Priority(IntEnum):
+    INTERACTIVE = 0
+    DEFAULT = 1
+    BATCH = 2
+
+
+OP_PRIORITY: Dict[str, Priority] = {
+    "transcribe": Priority.INTERACTIVE,
+    "explain": Priority.INTERACTIVE,
+    "vision": Priority.DEFAULT,
+    "email": Priority.DEFAULT,
+    "summary": Priority.BATCH,
+    "flashcards": Priority.BATCH,
+}
+
+
+def priority_for(op: str) -> Priority:
+    return OP_PRIORITY.get(op, Priority.DEFAULT)
+
+
+class _Waiter:
+    __slots__ = ("priority", "enqueued_at", "event", "loop", "future", "granted", "cancelled")
+
+    def __init__(self, priority: Priority, loop: Optional[asyncio.AbstractEventLoop] = None) -> None:
+        self.priority = priority
+        self.enqueued_at = time.monotonic()
+        self.loop = loop
+        self.future: Optional[asyncio.Future] = loop.create_future() if loop is not None else None
+        self.event: Optional[threading.Event] = None if loop is not None else threading.Event()
+        self.granted = False
+        self.cancelled = False
+
+
+class LLMScheduler:
+    def __init__(self, max_in_flight: int, rate_per_sec: float, burst: int, queue_timeout: float, starvation_seconds: float) -> None:
+        self.max_in_flight = max(1, int(max_in_flight))
+        self.rate = max(0.0, float(rate_per_sec))  # 0 disables the rate limit
+        self.burst = max(1, int(burst))
+        self.queue_timeout = float(queue_timeout)
+        self.starvation = float(starvation_seconds)
+        self._lock = threading.Lock()
+        self._queues: Dict[Priority, Deque[_Waiter]] = {p: deque() for p in Priority}
+        self._in_flight = 0
+        self._tokens = float(self.burst)
+        self._refilled_at = time.monotonic()
+        self._timer: Optional[threading.Timer] = None
+        self._stats: Dict[Priority, Dict[str, float]] = {p: {"granted": 0, "timeouts": 0, "wait_total": 0.0, "wait_max": 0.0} for p in Priority}
+
+    # -- public API --
+
+    @contextmanager
+    def slot(self, op: str) -> Iterator[None]:
+        """Block the calling thread until the call is admitted."""
+        w = _Waiter(priority_for(op))
+        self._enqueue(w)
+        assert w.event is not None
+        if not w.event.wait(self.queue_timeout):
+            with self._lock:
+                if not w.granted:
+                    w.cancelled = True
+                    self._stats[w.priority]["timeouts"] += 1
+            if not w.granted:
+                api_error("LLM capacity exhausted; retry later", code="llm_busy", status_code=503)
+        try:
+            yield
+        finally:
+            self._release()
+
+    @asynccontextmanager
+    async def slot_async(self, op: str) -> AsyncIterator[None]:
+        """Await admission without blocking the event loop."""
+        w = _Waiter(priority_for(op), asyncio.get_running_loop())
+        self._enqueue(w)
+        assert w.future is not None
+        try:
+            await asyncio.wait_for(asyncio.shield(w.future), self.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            with self._lock:
+                granted = w.granted
+                if not granted:
+                    w.cancelled = True
+                    if isinstance(e, asyncio.TimeoutError):
+                        self._stats[w.priority]["timeouts"] += 1
+            if granted:
+                self._release()
+            if isinstance(e, asyncio.TimeoutError):
+                api_error("LLM capacity exhausted; retry later", code="llm_busy", status_code=503)
+            raise
+        try:
+            yield
+        finally:
+            self._release()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._refill()
+            now = time.monotonic()
+            out: Dict[str, Any] = {"in_flight": self._in_flight, "max_in_flight": self.max_in_flight, "tokens": round(self._tokens, 2), "classes": {}}
+            for p in Priority:
+                q = [w for w in self._queues[p] if not w.cancelled]
+                s = self._stats[p]
+                out["classes"][p.name.lower()] = {
+                    "queue_depth": len(q),
+                    "oldest_wait_ms": round((now - q[0].enqueued_at) * 1000, 1) if q else 0.0,
+                    "granted": int(s["granted"]),
+                    "timeouts": int(s["timeouts"]),
+                    "avg_wait_ms": round(s["wait_total"] / s["granted"] * 1000, 1) if s["granted"] else 0.0,
+                    "max_wait_ms": round(s["wait_max"] * 1000, 1),
+                }
+            return out
+
+    # -- internals --
+
+    def _enqueue(self, w: _Waiter) -> None:
+        with self._lock:
+            self._queues[w.priority].append(w)
+        self._dispatch()
+
+    def _release(self) -> None:
+        with self._lock:
+            self._in_flight -= 1
+        self._dispatch()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        if self.rate > 0:
+            self._tokens = min(float(self.burst), self._tokens + (now - self._refilled_at) * self.rate)
+        else:
+            self._tokens = float(self.burst)
+        self._refilled_at = now
+
+    def _next(self, now: float) -> Optional[_Waiter]:
+        heads: List[_Waiter] = []
+        for p in Priority:
+            q = self._queues[p]
+            while q and q[0].cancelled:
+                q.popleft()
+            if q:
+                heads.append(q[0])
+        if not heads:
+            return None
+        starving = [w for w in heads if now - w.enqueued_at >= self.starvation]
+        pick = min(starving, key=lambda w: w.enqueued_at) if starving else heads[0]
+        self._queues[pick.priority].popleft()
+        return pick
+
+    def _dispatch(self) -> None:
+        grants: List[_Waiter] = []
+        with self._lock:
+            self._refill()
+            now = time.monotonic()
+            while self._in_flight < self.max_in_flight and self._tokens >= 1:
+                w = self._next(now)
+                if w is None:
+                    break
+                w.granted = True
+                self._in_flight += 1
+                self._tokens -= 1
+                waited = now - w.enqueued_at
+                s = self._stats[w.priority]
+                s["granted"] += 1
+                s["wait_total"] += waited
+                s["wait_max"] = max(s["wait_max"], waited)
+                grants.append(w)
+            blocked_on_tokens = self._tokens < 1 and self._in_flight < self.max_in_flight and any(self._queues[p] for p in Priority)
+            if blocked_on_tokens and self._timer is None and self.rate > 0:
+                self._timer = threading.Timer((1 - self._tokens) / self.rate, self._on_timer)
+                self._timer.daemon = True
+                self._timer.start()
+        for w in grants:
+            if w.event is not None:
+                w.event.set()
+            elif w.loop is not None and w.future is not None:
+                w.loop.call_soon_threadsafe(_resolve, w.future)
+
+    def _on_timer(self) -> None:
+        with self._lock:
+            self._timer = None
+        self._dispatch()
+
+
+def _resolve(fut: asyncio.Future) -> None:
+    if not fut.done():
+        fut.set_result(None)
+
+
+llm_scheduler = LLMScheduler(
+    max_in_flight=settings.LLM_MAX_IN_FLIGHT,
+    rate_per_sec=settings.LLM_RATE_PER_SEC,
+    burst=settings.LLM_RATE_BURST,
+    queue_timeout=settings.LLM_QUEUE_TIMEOUT_SECONDS,
+    starvation_seconds=settings.LLM_STARVATION_SECONDS,
+)
@@ -1,28 +1,67 @@
-from typing import List, Literal, Any, cast, Dict
+from typing import AsyncIterator, Awaitable, Callable, List, Literal, Any, Sequence, Tuple, TypeVar, cast, Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import copy
 import json
-import httpx
+import re
+from fastapi import HTTPException
 from ..core.config import settings
 from ..core.security import api_error
+from . import gemini_provider
+from .json_stream import JSONItemStream
+from .transcript_packer import CHARS_PER_TOKEN as _CHARS_PER_TOKEN, estimate_tokens, pack_text
 
 
 FlashcardType = Literal["qa", "cloze", "mc"]
+T = TypeVar("T")
+R = TypeVar("R")
 
+def split_windows(text: str, max_tokens: int) -> List[str]:
+    """Split a transcript into consecutive windows of at most ``max_tokens`` (estimated),
+    breaking on chunk (line) boundaries where possible."""
+    max_chars = max(1, int(max_tokens)) * _CHARS_PER_TOKEN
+    windows: List[str] = []
+    cur: List[str] = []
+    cur_len = 0
+    for line in text.split("\n"):
+        while len(line) > max_chars:
+            if cur:
+                windows.append("\n".join(cur))
+                cur, cur_len = [], 0
+            windows.append(line[:max_chars])
+            line = line[max_chars:]
+        if cur and cur_len + 1 + len(line) > max_chars:
+            windows.append("\n".join(cur))
+            cur, cur_len = [], 0
+        cur_len += len(line) + (1 if cur else 0)
+        cur.append(line)
+    if cur:
+        windows.append("\n".join(cur))
+    return [w for w in windows if w.strip()] or [text]
 
-_gemini_client: Any = None
 
-def _ensure_clients():
-    global _gemini_client
-    if _gemini_client is None:
-        try:
-            import google.generativeai as genai  # type: ignore[import-not-found]
-        except Exception as e:
-            api_error(f"Gemini client import failed: {e}", code="llm_import")
-        if not settings.GOOGLE_API_KEY:
-            api_error("GOOGLE_API_KEY is required for Gemini", code="llm_config")
-        _configure = getattr(genai, "configure", None)
-        if callable(_configure):
-            _configure(api_key=settings.GOOGLE_API_KEY)
-        _gemini_client = genai
+def _pack(transcript_text: str, pinned: Sequence[str]) -> str:
+    """Drop filler/duplicate chunks and, if LLM_PROMPT_TOKEN_BUDGET is set, fit it keeping
+    ``pinned`` (bookmarked) and image-notes chunks first; see transcript_packer. Runs
+    before windowing, so the budget caps the whole map-reduce input (off by default)."""
+    return pack_text(transcript_text, settings.LLM_PROMPT_TOKEN_BUDGET, pinned)
+
+
+def _map_sync(fn: Callable[[T], R], items: Sequence[T]) -> List[R]:
+    if len(items) == 1:
+        return [fn(items[0])]
+    with ThreadPoolExecutor(max_workers=max(1, settings.LLM_MAP_CONCURRENCY)) as pool:
+        return list(pool.map(fn, items))
+
+
+async def _map_async(fn: Callable[[T], Awaitable[R]], items: Sequence[T]) -> List[R]:
+    sem = asyncio.Semaphore(max(1, settings.LLM_MAP_CONCURRENCY))
+
+    async def run(item: T) -> R:
+        async with sem:
+            return await fn(item)
+
+    return list(await asyncio.gather(*(run(i) for i in items)))
 
 
 def _flashcards_system_prompt() -> str:
@@ -34,117 +73,181 @@ def _flashcards_system_prompt() -> str:
     )
 
 
-def generate_flashcards(transcript_text: str, types: List[FlashcardType], max_per_type: int):
-    # Dev-mode: bypass external calls and return deterministic content
-    if getattr(settings, "DEV_FAKE_LLM", False):
-        demo = {
-            "qa": [
-                {"question": "What is Newton's First Law?", "answer": "An object in motion stays in motion unless acted upon by a net external force.", "source_ts": 0}
-            ],
-            "cloze": [
-                {"question": "An object in ____ stays in ____ unless acted upon by a ____.", "answer": "motion; motion; net external force", "source_ts": 10}
-            ],
-            "mc": [
-                {"question": "Which best describes inertia?", "answer": {"correct": "Resistance to change in motion", "choices": ["Resistance to change in motion", "Increase in speed", "Decrease in mass", "Change in direction only"]}, "source_ts": 20}
-            ],
-        }
-        out = {"qa": [], "cloze": [], "mc": []}
-        for t in ["qa", "cloze", "mc"]:
-            if t in types:
-                out[t] = demo[t][: max(0, int(max_per_type))]
-        return out
+def _call(op: str, parts: List[Any], generation_config: Optional[Dict[str, Any]] = None) -> str:
+    try:
+        return gemini_provider.generate_text(op, parts, generation_config=generation_config)
+    except HTTPException:
+        # Import/config errors from the provider keep their own codes
+        raise
+    except Exception as e:
+        _raise_llm_error(e)
+    return ""
 
-    prompt = (
-        "Transcript:\n" + transcript_text[:12000] + "\n\n"  # limit size for demo
-        + f"Types: {','.join(types)}; Max per type: {max_per_type}.\n"
-        + "Respond with strict JSON: {\n  \"qa\": [{\"question\": str, \"answer\": str, \"source_ts\": number|null}],\n"
-        + "  \"cloze\": [{\"question\": str, \"answer\": str, \"source_ts\": number|null}],\n"
-        + "  \"mc\": [{\"question\": str, \"answer\": {\"correct\": str, \"choices\": [str, str, str, str]}, \"source_ts\": number|null}]\n}"
-    )
 
-    _ensure_clients()
-    content = None
+async def _call_async(op: str, parts: List[Any], generation_config: Optional[Dict[str, Any]] = None) -> str:
     try:
-        with httpx.Client(timeout=settings.REQUEST_TIMEOUT_SECONDS) as _:
-            # Gemini JSON output
-            model_name = settings.MODEL or "gemini-1.5-pro"
-            gen_model_factory = getattr(_gemini_client, "GenerativeModel", None)
-            if not callable(gen_model_factory):
-                api_error("Gemini client missing GenerativeModel", code="llm_import")
-            gen_model = cast(Any, gen_model_factory)(model_name)
-            try:
-                response = gen_model.generate_content(
-                    [
-                        _flashcards_system_prompt(),
-                        prompt,
-                    ],
-                    generation_config={"response_mime_type": "application/json"},
-                    request_options={"timeout": settings.REQUEST_TIMEOUT_SECONDS},
-                )
-            except TypeError:
-                # Older fakes/SDKs may not accept request_options; try without it
-                response = gen_model.generate_content(
-                    [
-                        _flashcards_system_prompt(),
-                        prompt,
-                    ],
-                    generation_config={"response_mime_type": "application/json"},
-                )
-            content = getattr(response, "text", None)
-    except httpx.TimeoutException:
-        api_error("LLM timeout", code="LLM_TIMEOUT", status_code=504)
+        return await gemini_provider.generate_text_async(op, parts, generation_config=generation_config)
+    except HTTPException:
+        raise
+    except Exception as e:
+        _raise_llm_error(e)
+    return ""
+
+
+async def _stream_async(op: str, parts: List[Any], generation_config: Optional[Dict[str, Any]] = None) -> AsyncIterator[str]:
+    try:
+        async for piece in gemini_provider.stream_text_async(op, parts, generation_config=generation_config):
+            yield piece
+    except HTTPException:
+        raise
     except Exception as e:
-        api_error(f"LLM request failed: {e}", code="llm_error", status_code=502)
+        _raise_llm_error(e)
+
+
+def _fake_pieces(text: str) -> List[str]:
+    # Word-sized pieces, so dev mode exercises the same streaming path
+    return re.findall(r"\S+\s*", text) or [text]
+
+
+def _raise_llm_error(e: Exception):
+    if gemini_provider.is_timeout(e):
+        api_error("LLM timeout", code="LLM_TIMEOUT", status_code=504)
+    api_error(f"LLM request failed: {e}", code="llm_error", status_code=502)
+
+
+def _parse_json(content: str) -> Any:
     if not content:
         api_error("Empty LLM response", code="llm_empty", status_code=502)
-
     try:
-        data = json.loads(str(content))
+        return json.loads(str(content))
     except Exception:
         api_error("LLM output not valid JSON", code="LLM_BAD_FORMAT", status_code=502)
 
+
+def _fake_flashcards(types: List[FlashcardType], max_per_type: int):
+    demo = {
+        "qa": [
+            {"question": "What is Newton's First Law?", "answer": "An object in motion stays in motion unless acted upon by a net external force.", "source_ts": 0}
+        ],
+        "cloze": [
+            {"question": "An object in ____ stays in ____ unless acted upon by a ____.", "answer": "motion; motion; net external force", "source_ts": 10}
+        ],
+        "mc": [
+            {"question": "Which best describes inertia?", "answer": {"correct": "Resistance to change in motion", "choices": ["Resistance to change in motion", "Increase in speed", "Decrease in mass", "Change in direction only"]}, "source_ts": 20}
+        ],
+    }
+    out = {"qa": [], "cloze": [], "mc": []}
+    for t in ["qa", "cloze", "mc"]:
+        if t in types:
+            out[t] = demo[t][: max(0, int(max_per_type))]
+    return out
+
+
+def _flashcards_parts(transcript_text: str, types: List[FlashcardType], max_per_type: int) -> List[Any]:
+    prompt = (
+        "Transcript:\n" + transcript_text + "\n\n"
+        + f"Types: {','.join(types)}; Max per type: {max_per_type}.\n"
+        + "Respond with strict JSON: {\n  \"qa\": [{\"question\": str, \"answer\": str, \"source_ts\": number|null}],\n"
+        + "  \"cloze\": [{\"question\": str, \"answer\": str, \"source_ts\": number|null}],\n"
+        + "  \"mc\": [{\"question\": str, \"answer\": {\"correct\": str, \"choices\": [str, str, str, str]}, \"source_ts\": number|null}]\n}"
+    )
+    return [_flashcards_system_prompt(), prompt]
+
+
+def _parse_flashcards(content: str, types: List[FlashcardType], max_per_type: int):
+    data = _parse_json(content)
     out = {"qa": [], "cloze": [], "mc": []}
     for t in ["qa", "cloze", "mc"]:
         if t in types and isinstance(data.get(t), list):
             out[t] = data[t][: max(0, int(max_per_type))]
+    return out
+
 
+def _merge_flashcards(per_window: List[Dict[str, List[Any]]], max_per_type: int):
+    """Round-robin across windows so cards cover the whole lecture; drop repeated questions."""
+    out: Dict[str, List[Any]] = {"qa": [], "cloze": [], "mc": []}
+    for t in out:
+        seen = set()
+        queues = [list(w.get(t, [])) for w in per_window]
+        while len(out[t]) < max(0, int(max_per_type)) and any(queues):
+            for q in queues:
+                if q and len(out[t]) < max_per_type:
+                    card = q.pop(0)
+                    key = str(card.get("question", "")).strip().lower() if isinstance(card, dict) else str(card)
+                    if key not in seen:
+                        seen.add(key)
+                        out[t].append(card)
     return out
 
 
-def explain_topic(topic: str, mode: Literal["eli5","technical","analogy"]) -> str:
+def generate_flashcards(transcript_text: str, types: List[FlashcardType], max_per_type: int, pinned: Sequence[str] = ()):
+    # Dev-mode: bypass external calls and return deterministic content
+    if getattr(settings, "DEV_FAKE_LLM", False):
+        return _fake_flashcards(types, max_per_type)
+    transcript_text = _pack(transcript_text, pinned)
+    if not transcript_text:
+        return {"qa": [], "cloze": [], "mc": []}
+
+    def one(window: str):
+        content = _call("flashcards", _flashcards_parts(window, types, max_per_type), gemini_provider.JSON_CONFIG)
+        return _parse_flashcards(content, types, max_per_type)
+
+    return _merge_flashcards(_map_sync(one, split_windows(transcript_text, settings.LLM_WINDOW_TOKENS)), max_per_type)
+
+
+async def generate_flashcards_async(transcript_text: str, types: List[FlashcardType], max_per_type: int, pinned: Sequence[str] = ()):
     if getattr(settings, "DEV_FAKE_LLM", False):
-        if mode == "eli5":
-            return f"{topic}: It's like a toy car that keeps rolling until something stops it."
-        if mode == "analogy":
-            return f"{topic}: Think of it like riding a bike—balance and motion work together."
-        return f"{topic}: A concise technical explanation goes here."
+        return _fake_flashcards(types, max_per_type)
+    transcript_text = _pack(transcript_text, pinned)
+    if not transcript_text:
+        return {"qa": [], "cloze": [], "mc": []}
+
+    async def one(window: str):
+        content = await _call_async("flashcards", _flashcards_parts(window, types, max_per_type), gemini_provider.JSON_CONFIG)
+        return _parse_flashcards(content, types, max_per_type)
+
+    return _merge_flashcards(await _map_async(one, split_windows(transcript_text, settings.LLM_WINDOW_TOKENS)), max_per_type)
+
 
-    _ensure_clients()
+def _fake_explanation(topic: str, mode: str) -> str:
+    if mode == "eli5":
+        return f"{topic}: It's like a toy car that keeps rolling until something stops it."
+    if mode == "analogy":
+        return f"{topic}: Think of it like riding a bike—balance and motion work together."
+    return f"{topic}: A concise technical explanation goes here."
+
+
+def _explain_parts(topic: str, mode: str, context: Optional[str] = None) -> List[Any]:
     prompt = (
         "Explain the following topic in the requested style. Be concise.\n"
         f"Mode: {mode}\n"
         f"Topic: {topic}\n"
     )
-    try:
-        with httpx.Client(timeout=settings.REQUEST_TIMEOUT_SECONDS) as _:
-            model_name = settings.MODEL or "gemini-1.5-pro"
-            gen_model_factory = getattr(_gemini_client, "GenerativeModel", None)
-            if not callable(gen_model_factory):
-                api_error("Gemini client missing GenerativeModel", code="llm_import")
-            gen_model = cast(Any, gen_model_factory)(model_name)
-            try:
-                response = gen_model.generate_content(
-                    [prompt],
-                    request_options={"timeout": settings.REQUEST_TIMEOUT_SECONDS},
-                )
-            except TypeError:
-                response = gen_model.generate_content([prompt])
-            return getattr(response, "text", "") or ""
-    except httpx.TimeoutException:
-        api_error("LLM timeout", code="LLM_TIMEOUT", status_code=504)
-    except Exception as e:
-        api_error(f"LLM request failed: {e}", code="llm_error", status_code=502)
-    return ""
+    if context:
+        prompt += f"Ground the explanation in these excerpts from the lecture:\n{context}\n"
+    return [prompt]
+
+
+def explain_topic(topic: str, mode: Literal["eli5","technical","analogy"], context: Optional[str] = None) -> str:
+    if getattr(settings, "DEV_FAKE_LLM", False):
+        return _fake_explanation(topic, mode)
+    return _call("explain", _explain_parts(topic, mode, context))
+
+
+async def explain_topic_async(topic: str, mode: Literal["eli5","technical","analogy"], context: Optional[str] = None) -> str:
+    if getattr(settings, "DEV_FAKE_LLM", False):
+        return _fake_explanation(topic, mode)
+    return await _call_async("explain", _explain_parts(topic, mode, context))
+
+
+async def explain_topic_stream(topic: str, mode: Literal["eli5","technical","analogy"], context: Optional[str] = None) -> AsyncIterator[str]:
+    """Yield the explanation as the model generates it."""
+    if getattr(settings, "DEV_FAKE_LLM", False):
+        for piece in _fake_pieces(_fake_explanation(topic, mode)):
+            yield piece
+        return
+    async for piece in _stream_async("explain", _explain_parts(topic, mode, context)):
+        yield piece
 
 
 def generate_from_image(image_text: str, types: List[FlashcardType], max_per_type: int):
@@ -152,57 +255,168 @@ def generate_from_image(image_text: str, types: List[FlashcardType], max_per_typ
     return generate_flashcards(image_text, types, max_per_type)
 
 
-def generate_summary(text: str) -> Dict[str, Any]:
-    if getattr(settings, "DEV_FAKE_LLM", False):
-        return {
-            "bullets": [
-                "Newton's First Law: inertia and motion.",
-                "Key terms: inertia, net external force.",
-            ],
-            "sections": [
-                {"title": "Inertia", "points": ["Resistance to change in motion."]},
-                {"title": "Applications", "points": ["Everyday examples of inertia."]},
-            ],
-            "keywords": ["inertia", "motion", "force"],
-        }
-
-    _ensure_clients()
-    prompt = (
+_FAKE_SUMMARY: Dict[str, Any] = {
+    "bullets": [
+        "Newton's First Law: inertia and motion.",
+        "Key terms: inertia, net external force.",
+    ],
+    "sections": [
+        {"title": "Inertia", "points": ["Resistance to change in motion."]},
+        {"title": "Applications", "points": ["Everyday examples of inertia."]},
+    ],
+    "keywords": ["inertia", "motion", "force"],
+}
+
+
+def _empty_summary() -> Dict[str, Any]:
+    return {"bullets": [], "sections": [], "keywords": []}
+
+
+_SUMMARY_SCHEMA = "{ bullets: [string], sections: [{title: string, points: [string]}], keywords: [string] }"
+
+
+def _summary_parts(text: str) -> List[Any]:
+    return [
         "Create a structured summary in strict JSON with keys: "
-        "{ bullets: [string], sections: [{title: string, points: [string]}], keywords: [string] }.\n"
+        f"{_SUMMARY_SCHEMA}.\n"
         "Avoid any non-JSON preamble.\n"
-        f"Transcript:\n{text[:12000]}\n"
-    )
+        f"Transcript:\n{text}\n"
+    ]
 
-    content = None
-    try:
-        with httpx.Client(timeout=settings.REQUEST_TIMEOUT_SECONDS) as _:
-            model_name = settings.MODEL or "gemini-1.5-pro"
-            gen_model_factory = getattr(_gemini_client, "GenerativeModel", None)
-            if not callable(gen_model_factory):
-                api_error("Gemini client missing GenerativeModel", code="llm_import")
-            gen_model = cast(Any, gen_model_factory)(model_name)
-            try:
-                response = gen_model.generate_content(
-                    [prompt],
-                    generation_config={"response_mime_type": "application/json"},
-                    request_options={"timeout": settings.REQUEST_TIMEOUT_SECONDS},
-                )
-            except TypeError:
-                response = gen_model.generate_content(
-                    [prompt],
-                    generation_config={"response_mime_type": "application/json"},
-                )
-            content = getattr(response, "text", None)
-    except httpx.TimeoutException:
-        api_error("LLM timeout", code="LLM_TIMEOUT", status_code=504)
-    except Exception as e:
-        api_error(f"LLM request failed: {e}", code="llm_error", status_code=502)
-    if not content:
-        api_error("Empty LLM response", code="llm_empty", status_code=502)
 
-    try:
-        return cast(Dict[str, Any], json.loads(str(content)))
-    except Exception:
-        api_error("LLM output not valid JSON", code="LLM_BAD_FORMAT", status_code=502)
-    return {}
+def _reduce_parts(partials: List[Dict[str, Any]]) -> List[Any]:
+    return [
+        "Merge these partial summaries of consecutive parts of one lecture into a single structured summary "
+        f"in strict JSON with keys: {_SUMMARY_SCHEMA}.\n"
+        "Keep chronological order, merge duplicate points and keywords. Avoid any non-JSON preamble.\n"
+        f"Partial summaries:\n{json.dumps(partials, ensure_ascii=False)}\n"
+    ]
+
+
+def _reduce_groups(partials: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+    """Group partial summaries into reduce inputs within the window budget (at least two
+    per group, so every round shrinks the tree)."""
+    budget = max(1, settings.LLM_WINDOW_TOKENS)
+    groups: List[List[Dict[str, Any]]] = []
+    cur: List[Dict[str, Any]] = []
+    cur_tokens = 0
+    for p in partials:
+        tokens = estimate_tokens(json.dumps(p, ensure_ascii=False))
+        if len(cur) >= 2 and cur_tokens + tokens > budget:
+            groups.append(cur)
+            cur, cur_tokens = [], 0
+        cur.append(p)
+        cur_tokens += tokens
+    if cur:
+        groups.append(cur)
+    return groups
+
+
+def _as_summary(content: str) -> Dict[str, Any]:
+    data = _parse_json(content)
+    if not isinstance(data, dict):
+        api_error("LLM output not a JSON object", code="LLM_BAD_FORMAT", status_code=502)
+    return cast(Dict[str, Any], data)
+
+
+def generate_summary(text: str, pinned: Sequence[str] = ()) -> Dict[str, Any]:
+    if getattr(settings, "DEV_FAKE_LLM", False):
+        return copy.deepcopy(_FAKE_SUMMARY)
+    text = _pack(text, pinned)
+    if not text:
+        return _empty_summary()
+
+    def summarize(parts: List[Any]) -> Dict[str, Any]:
+        return _as_summary(_call("summary", parts, gemini_provider.JSON_CONFIG))
+
+    partials = _map_sync(summarize, [_summary_parts(w) for w in split_windows(text, settings.LLM_WINDOW_TOKENS)])
+    while len(partials) > 1:
+        groups = _reduce_groups(partials)
+        partials = _map_sync(lambda g: summarize(_reduce_parts(g)) if len(g) > 1 else g[0], groups)
+    return partials[0]
+
+
+async def generate_summary_async(text: str, pinned: Sequence[str] = ()) -> Dict[str, Any]:
+    """Map-reduce summary: windows are summarized concurrently (bounded by
+    LLM_MAP_CONCURRENCY), then partials are merged level by level, so latency grows
+    with tree depth rather than transcript length."""
+    if getattr(settings, "DEV_FAKE_LLM", False):
+        return copy.deepcopy(_FAKE_SUMMARY)
+    text = _pack(text, pinned)
+    if not text:
+        return _empty_summary()
+
+    partials = await _map_async(_summarize_async, [_summary_parts(w) for w in split_windows(text, settings.LLM_WINDOW_TOKENS)])
+    while len(partials) > 1:
+        partials = await _map_async(_reduce_async, _reduce_groups(partials))
+    return partials[0]
+
+
+async def _summarize_async(parts: List[Any]) -> Dict[str, Any]:
+    return _as_summary(await _call_async("summary", parts, gemini_provider.JSON_CONFIG))
+
+
+async def _reduce_async(group: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return await _summarize_async(_reduce_parts(group)) if len(group) > 1 else group[0]
+
+
+def _summary_items(summary: Dict[str, Any]) -> List[Tuple[str, Any]]:
+    return [(field, item) for field in ("bullets", "sections", "keywords") for item in summary.get(field) or []]
+
+
+async def generate_summary_stream(text: str, pinned: Sequence[str] = ()) -> AsyncIterator[Tuple[str, Any]]:
+    """Streaming generate_summary_async: yields ``("item", {"field", "value"})`` as each
+    bullet, section or keyword of the final model call completes, then ``("done", summary)``.
+
+    Long transcripts still map-reduce first; only the last merge is streamed.
+    """
+    if getattr(settings, "DEV_FAKE_LLM", False):
+        summary = copy.deepcopy(_FAKE_SUMMARY)
+        for field, value in _summary_items(summary):
+            yield "item", {"field": field, "value": value}
+        yield "done", summary
+        return
+    text = _pack(text, pinned)
+    if not text:
+        yield "done", _empty_summary()
+        return
+    windows = split_windows(text, settings.LLM_WINDOW_TOKENS)
+    if len(windows) == 1:
+        parts = _summary_parts(windows[0])
+    else:
+        partials = await _map_async(_summarize_async, [_summary_parts(w) for w in windows])
+        while len(groups := _reduce_groups(partials)) > 1:
+            partials = await _map_async(_reduce_async, groups)
+        parts = _reduce_parts(partials)
+    acc = JSONItemStream()
+    async for piece in _stream_async("summary", parts, gemini_provider.JSON_CONFIG):
+        for field, value in acc.feed(piece):
+            yield "item", {"field": field, "value": value}
+    yield "done", _as_summary(acc.text)
+
+
+def _union_summaries(partials: List[Dict[str, Any]]) -> Dict[str, Any]:
+    # Deterministic merge for dev mode: ordered, de-duplicated union
+    out: Dict[str, Any] = {"bullets": [], "sections": [], "keywords": []}
+    sections: Dict[str, Dict[str, Any]] = {}
+    for p in partials:
+        for key in ("bullets", "keywords"):
+            for item in p.get(key) or []:
+                if item not in out[key]:
+                    out[key].append(item)
+        for sec in p.get("sections") or []:
+            title = sec.get("title", "")
+            if title not in sections:
+                sections[title] = {"title": title, "points": []}
+                out["sections"].append(sections[title])
+            for pt in sec.get("points") or []:
+                if pt not in sections[title]["points"]:
+                    sections[title]["points"].append(pt)
+    return out
+
+
+async def merge_summaries_async(partials: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Merge summaries of consecutive transcript spans (e.g. stored summary + delta)."""
+    if getattr(settings, "DEV_FAKE_LLM", False):
+        return _union_summaries(partials)
+    return _as_summary(await _call_async("summary", _reduce_parts(partials), gemini_provider.JSON_CONFIG))
@@ -0,0 +1,228 @@
+"""Per-session vector index over transcript chunks, for grounding prompts.
+
+Each session's chunks are embedded into a NumPy matrix of L2-normalised rows; a
+query is answered by cosine similarity (one matrix-vector product) and top-k
+selection. Indexes are kept in an LRU of sessions and resynced when the
+transcript cache reports a committed change; only new or edited chunks are
+re-embedded.
+
+The embedder is pluggable (anything with ``name`` and ``embed(texts, query=False)``):
+``HashingEmbedder`` is deterministic and local (hashed word unigrams + bigrams),
+``GeminiEmbedder`` calls the Gemini embedding API. Select with RETRIEVAL_EMBEDDER.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Protocol, Sequence
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..db.session import get_session
+from ..models.entities import TranscriptChunk
+from .transcript_cache import transcript_cache
+
+
+class Embedder(Protocol):
+    name: str
+
+    def embed(self, texts: Sequence[str], query: bool = False) -> np.ndarray:
+        """Return a (len(texts), dim) float32 matrix of L2-normalised rows."""
+        ...
+
+
+def _normalize(m: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(m, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (m / norms).astype(np.float32, copy=False)
+
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have in is it its of on or so that the this to was were what when which who will with".split()
+)
+
+
+class HashingEmbedder:
+    """Signed feature hashing of word unigrams and bigrams (sublinear tf)."""
+
+    name = "hashing"
+
+    def __init__(self, dim: int = 1024) -> None:
+        self.dim = max(16, int(dim))
+
+    def _features(self, text: str) -> List[str]:
+        words = [w for w in _TOKEN.findall(text.lower()) if w not in _STOPWORDS]
+        return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+    def embed(self, texts: Sequence[str], query: bool = False) -> np.ndarray:
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            counts: Dict[int, float] = {}
+            for feat in self._features(text):
+                h = int.from_bytes(hashlib.blake2b(feat.encode("utf-8"), digest_size=8).digest(), "little")
+                col = (h >> 1) % self.dim
+                counts[col] = counts.get(col, 0.0) + (1.0 if h & 1 else -1.0)
+            for col, v in counts.items():
+                out[row, col] = np.sign(v) * (1.0 + np.log(abs(v))) if v else 0.0
+        return _normalize(out)
+
+
+class GeminiEmbedder:
+    """Gemini embedding API (``genai.embed_content``), batched, through the LLM scheduler."""
+
+    name = "gemini"
+    batch_size = 100
+
+    def __init__(self, model: str) -> None:
+        self.model = model
+
+    def embed(self, texts: Sequence[str], query: bool = False) -> np.ndarray:
+        from . import gemini_provider
+        from .llm_scheduler import llm_scheduler
+
+        genai = gemini_provider.get_client()
+        rows: List[List[float]] = []
+        for i in range(0, len(texts), self.batch_size):
+            with llm_scheduler.slot("embed"):
+                resp = genai.embed_content(
+                    model=self.model,
+                    content=list(texts[i : i + self.batch_size]),
+                    task_type="retrieval_query" if query else "retrieval_document",
+                )
+            rows.extend(resp["embedding"])
+        return _normalize(np.asarray(rows, dtype=np.float32))
+
+
+def make_embedder(kind: Optional[str] = None) -> Embedder:
+    kind = (kind or settings.RETRIEVAL_EMBEDDER).lower()
+    if kind == "gemini" and not settings.DEV_FAKE_LLM:
+        return GeminiEmbedder(settings.RETRIEVAL_EMBED_MODEL)
+    return HashingEmbedder(settings.RETRIEVAL_HASH_DIM)
+
+
+@dataclass
+class Hit:
+    id: str
+    ts_start: Optional[float]
+    text: str
+    score: float
+
+
+@dataclass
+class _SessionIndex:
+    version: int
+    ids: List[str]
+    ts: List[Optional[float]]
+    texts: List[str]
+    matrix: np.ndarray
+
+
+class ChunkIndex:
+    def __init__(self, embedder: Embedder, max_sessions: int) -> None:
+        self.embedder = embedder
+        self.max_sessions = max(1, int(max_sessions))
+        self._indexes: "OrderedDict[str, _SessionIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.builds = 0
+        self.embedded = 0
+
+    def search(self, db: Session, session_id: str, query: str, k: int) -> List[Hit]:
+        """Top-``k`` chunks by cosine similarity to ``query``, best first (score > 0 only)."""
+        idx = self._index(db, session_id)
+        if not idx.ids or not query.strip() or k <= 0:
+            return []
+        q = self.embedder.embed([query], query=True)[0]
+        scores = idx.matrix @ q
+        k = min(int(k), len(idx.ids))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [Hit(idx.ids[i], idx.ts[i], idx.texts[i], float(scores[i])) for i in top if scores[i] > 0]
+
+    def invalidate(self, session_id: str) -> None:
+        with self._lock:
+            self._indexes.pop(session_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._indexes.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"embedder": self.embedder.name, "sessions": len(self._indexes), "builds": self.builds, "embedded": self.embedded}
+
+    def _index(self, db: Session, session_id: str) -> _SessionIndex:
+        version = transcript_cache.version(session_id)
+        with self._lock:
+            cur = self._indexes.get(session_id)
+            if cur is not None:
+                self._indexes.move_to_end(session_id)
+                if cur.version == version:
+                    return cur
+        fresh = self._build(db, session_id, version, cur)
+        with self._lock:
+            self._indexes[session_id] = fresh
+            self._indexes.move_to_end(session_id)
+            while len(self._indexes) > self.max_sessions:
+                self._indexes.popitem(last=False)
+        return fresh
+
+    def _build(self, db: Session, session_id: str, version: int, prev: Optional[_SessionIndex]) -> _SessionIndex:
+        c = TranscriptChunk.__table__.c
+        rows = [
+            r
+            for r in db.execute(
+                select(c.id, c.ts_start, c.text).where(c.session_id == session_id).order_by(c.ts_start.asc().nulls_first(), c.id.asc())
+            ).all()
+            if (r.text or "").strip()
+        ]
+        # Reuse vectors of unchanged chunks from the previous build
+        old = {cid: (text, i) for i, (cid, text) in enumerate(zip(prev.ids, prev.texts))} if prev is not None else {}
+        reuse: List[Optional[int]] = []
+        for r in rows:
+            hit = old.get(r.id)
+            reuse.append(hit[1] if hit is not None and hit[0] == r.text else None)
+        missing = [i for i, j in enumerate(reuse) if j is None]
+        new_vecs = self.embedder.embed([rows[i].text for i in missing]) if missing else None
+        if rows:
+            dim = new_vecs.shape[1] if new_vecs is not None else prev.matrix.shape[1]  # type: ignore[union-attr]
+            matrix = np.zeros((len(rows), dim), dtype=np.float32)
+            if new_vecs is not None:
+                matrix[missing] = new_vecs
+            kept = [(i, j) for i, j in enumerate(reuse) if j is not None]
+            if kept:
+                matrix[[i for i, _ in kept]] = prev.matrix[[j for _, j in kept]]  # type: ignore[union-attr]
+        else:
+            matrix = np.zeros((0, 0), dtype=np.float32)
+        self.builds += 1
+        self.embedded += len(missing)
+        return _SessionIndex(version, [r.id for r in rows], [r.ts_start for r in rows], [r.text for r in rows], matrix)
+
+
+chunk_index = ChunkIndex(make_embedder(), settings.RETRIEVAL_MAX_SESSIONS)
+
+
+def relevant_context(db: Session, session_id: str, query: str, k: Optional[int] = None) -> Optional[str]:
+    """Top-k chunks for ``query`` joined in timeline order; None when nothing matches."""
+    hits = chunk_index.search(db, session_id, query, k or settings.RETRIEVAL_TOP_K)
+    if not hits:
+        return None
+    hits.sort(key=lambda h: (h.ts_start is not None, h.ts_start or 0.0))
+    return "\n".join(h.text for h in hits)
+
+
+async def relevant_context_async(session_id: str, query: str, k: Optional[int] = None) -> Optional[str]:
+    """relevant_context in a worker thread (embedding may be CPU- or network-bound)."""
+
+    def run() -> Optional[str]:
+        with get_session() as db:
+            return relevant_context(db, session_id, query, k)
+
+    return await asyncio.to_thread(run)
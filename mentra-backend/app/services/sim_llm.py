@@ -0,0 +1,316 @@
+"""Latency-simulating stand-in for the ``google.generativeai`` client, for offline load tests.
+
+With LLM_SIM=1 (and DEV_FAKE_LLM=0) ``gemini_provider.get_client()`` returns a
+``SimClient`` instead of the SDK. Every call still goes through the scheduler, cache,
+circuit breakers and the real response parsing in llm_service / transcribe_service /
+vision_service / email_extract, but is answered in-process:
+
+- time to first token is drawn per operation around LLM_SIM_LATENCY_MS (median) from
+  LLM_SIM_LATENCY_DIST: ``lognormal`` (shape LLM_SIM_LATENCY_SIGMA), ``exponential``
+  or ``constant``;
+- prompt tokens are read at LLM_SIM_PREFILL_TOKENS_PER_SEC and output tokens are
+  generated at LLM_SIM_TOKENS_PER_SEC; streamed responses arrive at that rate;
+- LLM_SIM_ERROR_RATE of calls fail with a 500, and calls beyond
+  LLM_SIM_MAX_CONCURRENCY in flight are rejected with a 429 like a quota limit;
+- the ``request_options`` timeout is honoured (raises ``DeadlineExceeded``).
+
+Responses are shaped by the prompt (flashcard / summary / email JSON, a transcript for
+audio, notes for images, prose otherwise) so callers parse them like real output.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import math
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+from .transcript_packer import estimate_tokens
+
+
+# Gemini bills ~32 tokens per second of audio and 258 per image
+AUDIO_TOKENS_PER_SEC = 32
+IMAGE_TOKENS = 258
+# 16 kHz mono 16-bit PCM, the live-audio format
+_PCM_BYTES_PER_SEC = 32000
+_WORDS_PER_AUDIO_SEC = 2.5
+_PIECE_WORDS = 6
+
+_VOCAB = (
+    "energy force motion inertia mass acceleration velocity momentum friction gravity field "
+    "charge current voltage resistance circuit wave frequency amplitude photon electron atom "
+    "molecule reaction enzyme cell membrane protein gene equation derivative integral vector "
+    "matrix function limit theorem proof example system model experiment result"
+).split()
+
+
+class ResourceExhausted(Exception):
+    """Simulated 429: more concurrent calls than LLM_SIM_MAX_CONCURRENCY."""
+
+
+class InternalServerError(Exception):
+    """Simulated 500 (LLM_SIM_ERROR_RATE)."""
+
+
+class DeadlineExceeded(Exception):
+    """Simulated request timeout; ``gemini_provider.is_timeout`` recognises the name."""
+
+
+@dataclass
+class _Response:
+    text: str
+
+
+@dataclass
+class _Plan:
+    kind: str
+    text: str
+    first_token: float
+    per_token: float
+    fail: bool
+
+    @property
+    def total(self) -> float:
+        return self.first_token + estimate_tokens(self.text) * self.per_token
+
+
+def _flatten(parts: Any) -> Iterator[Tuple[str, str, int]]:
+    """Yield (text, mime_type, inline data length) for every part, whatever the SDK shape."""
+    if isinstance(parts, (str, bytes)) or not isinstance(parts, (list, tuple)):
+        parts = [parts]
+    for part in parts:
+        if isinstance(part, str):
+            yield part, "", 0
+        elif isinstance(part, dict):
+            if "parts" in part:
+                yield from _flatten(part["parts"])
+            elif "inline_data" in part:
+                yield from _flatten([part["inline_data"]])
+            elif "text" in part:
+                yield str(part["text"]), "", 0
+            else:
+                yield "", str(part.get("mime_type") or ""), len(part.get("data") or b"")
+
+
+def classify(parts: Any) -> Tuple[str, str, float]:
+    """(operation kind, prompt text, prompt tokens) inferred from the request parts."""
+    texts: List[str] = []
+    kind = ""
+    tokens = 0.0
+    for text, mime, size in _flatten(parts):
+        if text:
+            texts.append(text)
+            tokens += estimate_tokens(text)
+        if mime.startswith("audio/"):
+            kind = "transcribe"
+            # base64 inline data: 4 characters per 3 bytes
+            tokens += size * 3 / 4 / _PCM_BYTES_PER_SEC * AUDIO_TOKENS_PER_SEC
+        elif mime.startswith("image/"):
+            kind = kind or "vision"
+            tokens += IMAGE_TOKENS
+    prompt = "\n".join(texts)
+    if not kind:
+        if "'qa', 'cloze', 'mc'" in prompt:
+            kind = "flashcards"
+        elif "bullets: [string]" in prompt:
+            kind = "summary"
+        elif '"type":"meeting|homework"' in prompt:
+            kind = "email"
+        else:
+            kind = "explain"
+    return kind, prompt, tokens
+
+
+class SimClient:
+    """Module-shaped like ``google.generativeai``: ``configure``, ``GenerativeModel``, ``embed_content``."""
+
+    def __init__(self, cfg: Any) -> None:
+        self.latency_ms: Dict[str, float] = dict(cfg.LLM_SIM_LATENCY_MS)
+        self.dist = cfg.LLM_SIM_LATENCY_DIST.lower()
+        self.sigma = float(cfg.LLM_SIM_LATENCY_SIGMA)
+        self.tokens_per_sec = float(cfg.LLM_SIM_TOKENS_PER_SEC)
+        self.prefill_tokens_per_sec = float(cfg.LLM_SIM_PREFILL_TOKENS_PER_SEC)
+        self.error_rate = float(cfg.LLM_SIM_ERROR_RATE)
+        self.max_concurrency = int(cfg.LLM_SIM_MAX_CONCURRENCY)
+        self._rng = random.Random(cfg.LLM_SIM_SEED)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.calls = 0
+        self.rejected = 0
+
+    def configure(self, api_key: Optional[str] = None) -> None:  # noqa: ARG002 - SDK signature
+        return None
+
+    def GenerativeModel(self, model_name: str, generation_config: Optional[Dict[str, Any]] = None) -> "SimModel":  # noqa: N802 - SDK name
+        return SimModel(self, model_name, generation_config)
+
+    def embed_content(self, model: str, content: Any, task_type: Optional[str] = None) -> Dict[str, Any]:  # noqa: ARG002
+        from .retrieval import HashingEmbedder
+
+        texts = [content] if isinstance(content, str) else list(content)
+        self._admit()
+        try:
+            time.sleep(self._latency("embed") + sum(estimate_tokens(t) for t in texts) / self.prefill_tokens_per_sec)
+        finally:
+            self._release()
+        rows = HashingEmbedder(768).embed(texts).tolist()
+        return {"embedding": rows[0] if isinstance(content, str) else rows}
+
+    # --- timing -------------------------------------------------------------------------
+
+    def _latency(self, kind: str) -> float:
+        median = self.latency_ms.get(kind, self.latency_ms.get("default", 1000.0)) / 1000.0
+        with self._lock:
+            if self.dist == "constant":
+                return median
+            if self.dist == "exponential":
+                return self._rng.expovariate(math.log(2) / median) if median > 0 else 0.0
+            return median * math.exp(self.sigma * self._rng.gauss(0.0, 1.0))
+
+    def plan(self, parts: Any) -> _Plan:
+        kind, prompt, prompt_tokens = classify(parts)
+        with self._lock:
+            fail = self._rng.random() < self.error_rate
+            text = _respond(self._rng, kind, parts)
+        first = self._latency(kind) + prompt_tokens / self.prefill_tokens_per_sec
+        return _Plan(kind, text, first, 1.0 / self.tokens_per_sec, fail)
+
+    def _admit(self) -> None:
+        with self._lock:
+            if self.max_concurrency and self.in_flight >= self.max_concurrency:
+                self.rejected += 1
+                raise ResourceExhausted("429 Resource has been exhausted (simulated concurrency limit)")
+            self.in_flight += 1
+            self.calls += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def _release(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"in_flight": self.in_flight, "peak_in_flight": self.peak_in_flight, "calls": self.calls, "rejected": self.rejected}
+
+
+def _pieces(text: str) -> List[str]:
+    words = re.findall(r"\S+\s*", text) or [text]
+    return ["".join(words[i : i + _PIECE_WORDS]) for i in range(0, len(words), _PIECE_WORDS)]
+
+
+def _timeout(request_options: Optional[Dict[str, Any]]) -> Optional[float]:
+    t = (request_options or {}).get("timeout")
+    return float(t) if t else None
+
+
+class SimModel:
+    def __init__(self, client: SimClient, model_name: str, generation_config: Optional[Dict[str, Any]] = None) -> None:
+        self.client = client
+        self.model_name = model_name
+        self.generation_config = generation_config
+
+    def generate_content(self, parts: Any, generation_config: Any = None, request_options: Any = None, stream: bool = False) -> Any:  # noqa: ARG002
+        plan = self.client.plan(parts)
+        if stream:
+            return self._stream_sync(plan)
+        self.client._admit()
+        try:
+            timeout = _timeout(request_options)
+            if timeout is not None and plan.total > timeout:
+                time.sleep(timeout)
+                raise DeadlineExceeded(f"504 Deadline Exceeded (simulated {plan.total:.2f}s > {timeout}s)")
+            if plan.fail:
+                time.sleep(plan.first_token)
+                raise InternalServerError("500 An internal error has occurred (simulated)")
+            time.sleep(plan.total)
+            return _Response(plan.text)
+        finally:
+            self.client._release()
+
+    async def generate_content_async(self, parts: Any, generation_config: Any = None, request_options: Any = None, stream: bool = False) -> Any:  # noqa: ARG002
+        plan = self.client.plan(parts)
+        if stream:
+            return self._stream_async(plan)
+        self.client._admit()
+        try:
+            timeout = _timeout(request_options)
+            if timeout is not None and plan.total > timeout:
+                await asyncio.sleep(timeout)
+                raise DeadlineExceeded(f"504 Deadline Exceeded (simulated {plan.total:.2f}s > {timeout}s)")
+            if plan.fail:
+                await asyncio.sleep(plan.first_token)
+                raise InternalServerError("500 An internal error has occurred (simulated)")
+            await asyncio.sleep(plan.total)
+            return _Response(plan.text)
+        finally:
+            self.client._release()
+
+    def _stream_sync(self, plan: _Plan) -> Iterator[_Response]:
+        self.client._admit()
+        try:
+            time.sleep(plan.first_token)
+            if plan.fail:
+                raise InternalServerError("500 An internal error has occurred (simulated)")
+            for piece in _pieces(plan.text):
+                time.sleep(estimate_tokens(piece) * plan.per_token)
+                yield _Response(piece)
+        finally:
+            self.client._release()
+
+    async def _stream_async(self, plan: _Plan) -> AsyncIterator[_Response]:
+        self.client._admit()
+        try:
+            await asyncio.sleep(plan.first_token)
+            if plan.fail:
+                raise InternalServerError("500 An internal error has occurred (simulated)")
+            for piece in _pieces(plan.text):
+                await asyncio.sleep(estimate_tokens(piece) * plan.per_token)
+                yield _Response(piece)
+        finally:
+            self.client._release()
+
+
+# --- responses ---------------------------------------------------------------------------
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    text = " ".join(rng.choice(_VOCAB) for _ in range(max(1, words)))
+    return text[0].upper() + text[1:] + "."
+
+
+def _audio_seconds(parts: Any) -> float:
+    size = sum(n for _, mime, n in _flatten(parts) if mime.startswith("audio/"))
+    return size * 3 / 4 / _PCM_BYTES_PER_SEC
+
+
+def _respond(rng: random.Random, kind: str, parts: Any) -> str:
+    if kind == "transcribe":
+        n = max(1, round(_audio_seconds(parts) * _WORDS_PER_AUDIO_SEC))
+        return " ".join(rng.choice(_VOCAB) for _ in range(n))
+    if kind == "vision":
+        return "Whiteboard notes: " + " ".join(_sentence(rng, 8) for _ in range(3))
+    if kind == "flashcards":
+        def card(i: int) -> Dict[str, Any]:
+            return {"question": _sentence(rng, 8)[:-1] + "?", "answer": _sentence(rng, 12), "source_ts": i}
+
+        mc = [
+            {"question": _sentence(rng, 8)[:-1] + "?", "answer": {"correct": c, "choices": [c] + rng.sample(_VOCAB, 3)}, "source_ts": i}
+            for i, c in enumerate(rng.sample(_VOCAB, 2))
+        ]
+        return json.dumps({"qa": [card(0), card(1)], "cloze": [card(2), card(3)], "mc": mc})
+    if kind == "summary":
+        return json.dumps(
+            {
+                "bullets": [_sentence(rng, 10) for _ in range(4)],
+                "sections": [{"title": _sentence(rng, 3)[:-1], "points": [_sentence(rng, 8) for _ in range(3)]} for _ in range(2)],
+                "keywords": rng.sample(_VOCAB, 5),
+            }
+        )
+    if kind == "email":
+        return json.dumps({"type": "meeting", "title": _sentence(rng, 4)[:-1], "duration_min": 30, "confidence": 0.8})
+    return " ".join(_sentence(rng, 12) for _ in range(6))
@@ -0,0 +1,53 @@
+"""Coalesce identical concurrent generations into one in-flight call.
+
+A double-click, or several clients opening the same session, would otherwise send
+the same summary/flashcards/explain request to the LLM once per caller (and, for
+flashcards, persist duplicate rows). ``single_flight.do(key, fn)`` runs ``fn`` once
+per key while it is in flight; every concurrent caller awaits the same task and
+gets the same result or exception. A caller that disconnects doesn't cancel the
+shared task.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+from typing import Any, Awaitable, Callable, Dict, Hashable, Mapping, Optional, Tuple, TypeVar
+
+
+T = TypeVar("T")
+
+
+def flight_key(op: str, session_id: str, params: Optional[Mapping[str, Any]] = None) -> Tuple[str, str, str]:
+    return (op, session_id, json.dumps(params or {}, sort_keys=True, default=str))
+
+
+class SingleFlight:
+    def __init__(self) -> None:
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+        self.started = 0
+        self.joined = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        loop = asyncio.get_running_loop()
+        task = self._calls.get(key)
+        if task is None or task.done() or task.get_loop() is not loop:
+            task = loop.create_task(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda t, k=key: self._forget(k, t))
+            self.started += 1
+        else:
+            self.joined += 1
+        return await asyncio.shield(task)
+
+    def in_flight(self) -> int:
+        return sum(1 for t in self._calls.values() if not t.done())
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # Mark the exception retrieved even if every caller went away
+            task.exception()
+
+
+single_flight = SingleFlight()
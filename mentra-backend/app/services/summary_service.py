@@ -0,0 +1,108 @@
+"""Session summaries: full, or incremental from the stored chunk watermark.
+
+The watermark (Session.summary_cursor / summary_chunk_count) records the last chunk,
+in timeline order, that summary_json covers. Incremental runs summarize only the
+chunks after it and merge the result into the stored summary; if chunks arrived
+behind the watermark (count mismatch) the session is re-summarized in full.
+"""
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session as OrmSession
+
+from ..db.session import get_async_session
+from ..models.entities import Session
+from . import llm_service
+from .single_flight import flight_key, single_flight
+from .transcript_cache import transcript_cache
+from .transcript_service import chunk_watermark, count_through, pinned_texts, text_after
+
+
+@dataclass
+class _Plan:
+    text: str
+    # Stored summary to merge the delta into; None for a full run
+    base: Optional[Dict[str, Any]]
+    cursor: Optional[str]
+    count: int
+    # Bookmarked chunk texts the packer keeps first when over budget
+    pinned: List[str]
+
+
+def _load(summary_json: Optional[str]) -> Optional[Dict[str, Any]]:
+    try:
+        data = json.loads(summary_json or "")
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def _plan(db: OrmSession, session_id: str, incremental: bool) -> _Plan:
+    ses = db.get(Session, session_id)
+    if incremental and ses is not None and ses.summary_cursor:
+        base = _load(ses.summary_json)
+        if base is not None and count_through(db, session_id, ses.summary_cursor) == ses.summary_chunk_count:
+            text, cursor, n = text_after(db, session_id, ses.summary_cursor)
+            return _Plan(text, base, cursor, ses.summary_chunk_count + n, pinned_texts(db, session_id, text))
+    # Watermark first: a chunk landing in between is summarized again next time, never skipped
+    cursor, count = chunk_watermark(db, session_id)
+    text = transcript_cache.get(db, session_id)
+    return _Plan(text, None, cursor, count, pinned_texts(db, session_id, text))
+
+
+async def generate_session_summary(session_id: str, incremental: bool = False) -> Dict[str, Any]:
+    """Generate (and persist, when the session exists) the session summary.
+
+    Concurrent calls for the same session and mode share one generation.
+    """
+    key = flight_key("summary", session_id, {"incremental": incremental})
+    return await single_flight.do(key, lambda: _generate(session_id, incremental))
+
+
+async def _generate(session_id: str, incremental: bool) -> Dict[str, Any]:
+    async with get_async_session() as adb:
+        plan = await adb.run_sync(_plan, session_id, incremental)
+    if plan.base is not None and not plan.text.strip():
+        # Nothing new since the last run
+        return plan.base
+    summary = await llm_service.generate_summary_async(plan.text, pinned=plan.pinned)
+    if plan.base is not None:
+        summary = await llm_service.merge_summaries_async([plan.base, summary])
+    await _save(session_id, plan, summary)
+    return summary
+
+
+async def stream_session_summary(session_id: str, incremental: bool = False) -> AsyncIterator[Tuple[str, Any]]:
+    """Streaming generate_session_summary: ``("item", ...)`` events as the model emits
+    them, then ``("done", summary)`` once persisted. Incremental runs stream the items
+    of the new chunks' summary; ``done`` carries the merged result.
+    """
+    async with get_async_session() as adb:
+        plan = await adb.run_sync(_plan, session_id, incremental)
+    if plan.base is not None and not plan.text.strip():
+        yield "done", plan.base
+        return
+    summary: Dict[str, Any] = {}
+    async for event, data in llm_service.generate_summary_stream(plan.text, pinned=plan.pinned):
+        if event == "done":
+            summary = data
+        else:
+            yield event, data
+    if plan.base is not None:
+        summary = await llm_service.merge_summaries_async([plan.base, summary])
+    await _save(session_id, plan, summary)
+    yield "done", summary
+
+
+async def _save(session_id: str, plan: _Plan, summary: Dict[str, Any]) -> None:
+    async with get_async_session() as adb:
+        ses = await adb.get(Session, session_id)
+        if ses:
+            # Persist as JSON string in DB, but return dict in response
+            ses.summary_json = json.dumps(summary)
+            ses.summary_cursor = plan.cursor
+            ses.summary_chunk_count = plan.count
+            await adb.commit()
@@ -1,28 +1,33 @@
 from __future__ import annotations
 
 import base64
-from typing import Any
+from typing import Any, List
 
-from fastapi import HTTPException, status
+from fastapi import HTTPException
 from ..core.config import settings
+from . import gemini_provider
 
 
-_gemini_client: Any = None
+_DEFAULT_PROMPT = "Transcribe this audio to plain text."
 
 
-def _ensure_clients():
-    global _gemini_client
-    if _gemini_client is None:
-        try:
-            import google.generativeai as genai  # type: ignore[import-not-found]
-        except Exception as e:
-            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail={"detail": f"Gemini client import failed: {e}", "code": "llm_import"})
-        if not settings.GOOGLE_API_KEY:
-            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail={"detail": "GOOGLE_API_KEY is required for Gemini", "code": "llm_config"})
-        _configure = getattr(genai, "configure", None)
-        if callable(_configure):
-            _configure(api_key=settings.GOOGLE_API_KEY)
-        _gemini_client = genai
+def _parts(wav_bytes: bytes, prompt: str | None, mime: str) -> List[Any]:
+    b64 = base64.b64encode(wav_bytes).decode("ascii")
+    return [prompt or _DEFAULT_PROMPT, {"mime_type": mime, "data": b64}]
+
+
+def _content_parts(wav_bytes: bytes, prompt: str | None, mime: str) -> List[Any]:
+    # Older SDK may require parts as dicts in 'contents'
+    b64 = base64.b64encode(wav_bytes).decode("ascii")
+    return [
+        {
+            "role": "user",
+            "parts": [
+                {"text": prompt or _DEFAULT_PROMPT},
+                {"inline_data": {"mime_type": mime, "data": b64}},
+            ],
+        }
+    ]
 
 
 def transcribe_wav_bytes(wav_bytes: bytes, prompt: str | None = None, mime: str = "audio/wav") -> str:
@@ -30,36 +35,31 @@ def transcribe_wav_bytes(wav_bytes: bytes, prompt: str | None = None, mime: str
         # Simple deterministic output for development
         return "(fake) hello world"
 
-    _ensure_clients()
-    gen_model_factory = getattr(_gemini_client, "GenerativeModel", None)
-    if not callable(gen_model_factory):
-        raise HTTPException(status_code=500, detail={"detail": "Gemini client missing GenerativeModel", "code": "llm_import"})
-    model_name = settings.MODEL or "gemini-1.5-pro"
-    model = gen_model_factory(model_name)
-    b64 = base64.b64encode(wav_bytes).decode("ascii")
     try:
-        resp = model.generate_content(
-            [
-                prompt or "Transcribe this audio to plain text.",
-                {"mime_type": mime, "data": b64},
-            ],
-            request_options={"timeout": settings.REQUEST_TIMEOUT_SECONDS},
-        )
-        txt = getattr(resp, "text", "") or ""
-    except TypeError:
-        # Older SDK may require parts as dicts in 'contents'
-        resp = model.generate_content(
-            contents=[
-                {
-                    "role": "user",
-                    "parts": [
-                        {"text": prompt or "Transcribe this audio to plain text."},
-                        {"inline_data": {"mime_type": mime, "data": b64}},
-                    ],
-                }
-            ]
-        )
-        txt = getattr(resp, "text", "") or ""
+        try:
+            txt = gemini_provider.generate_text("transcribe", _parts(wav_bytes, prompt, mime))
+        except TypeError:
+            txt = gemini_provider.generate_text("transcribe", _content_parts(wav_bytes, prompt, mime))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=502, detail={"detail": f"LLM error: {e}", "code": "llm_error"})
+    return txt.strip()
+
+
+async def transcribe_wav_bytes_async(wav_bytes: bytes, prompt: str | None = None, mime: str = "audio/wav") -> str:
+    if getattr(settings, "DEV_FAKE_LLM", False):
+        return "(fake) hello world"
+
+    try:
+        try:
+            txt = await gemini_provider.generate_text_async("transcribe", _parts(wav_bytes, prompt, mime))
+        except TypeError:
+            txt = await gemini_provider.generate_text_async("transcribe", _content_parts(wav_bytes, prompt, mime))
+    except HTTPException:
+        raise
     except Exception as e:
+        if gemini_provider.is_timeout(e):
+            raise HTTPException(status_code=504, detail={"detail": "LLM timeout", "code": "LLM_TIMEOUT"})
         raise HTTPException(status_code=502, detail={"detail": f"LLM error: {e}", "code": "llm_error"})
     return txt.strip()
@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..models.entities import TranscriptChunk
+
+
+# Sort key matching the rebuild query: ts_start NULLS FIRST, then id
+_Key = Tuple[int, float, str]
+
+
+def _key(ts_start: Optional[float], chunk_id: str) -> _Key:
+    return (0, 0.0, chunk_id) if ts_start is None else (1, float(ts_start), chunk_id)
+
+
+@dataclass
+class _Entry:
+    text: str
+    last_key: Optional[_Key]
+
+
+class TranscriptCache:
+    """Per-session joined transcript ("\\n".join of chunk texts in timeline order).
+
+    An in-memory LRU bounded by total cached characters. Committed chunk inserts are
+    appended incrementally when they sort after the cached tail; anything else
+    (out-of-order inserts, text edits, deletes) invalidates the session's entry,
+    which is rebuilt from a text-only projection on the next read.
+    """
+
+    def __init__(self, max_chars: int) -> None:
+        self.max_chars = max(0, int(max_chars))
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._versions: Dict[str, int] = {}
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, db: Session, session_id: str) -> str:
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is not None:
+                self._entries.move_to_end(session_id)
+                self.hits += 1
+                return entry.text
+            self.misses += 1
+            version = self._versions.get(session_id, 0)
+        c = TranscriptChunk.__table__.c
+        rows = db.execute(
+            select(c.id, c.ts_start, c.text)
+            .where(c.session_id == session_id)
+            .order_by(c.ts_start.asc().nulls_first(), c.id.asc())
+        ).all()
+        text = "\n".join(str(r.text or "") for r in rows)
+        last_key = _key(rows[-1].ts_start, rows[-1].id) if rows else None
+        with self._lock:
+            # Skip storing if a commit touched this session while we were reading
+            if self._versions.get(session_id, 0) == version:
+                self._store(session_id, _Entry(text, last_key))
+        return text
+
+    def append(self, session_id: str, rows: Iterable[Tuple[Optional[float], str, str]]) -> None:
+        """Apply committed inserts given as (ts_start, id, text)."""
+        new = sorted(((_key(ts, cid), t) for ts, cid, t in rows), key=lambda kv: kv[0])
+        if not new:
+            return
+        with self._lock:
+            self._bump(session_id)
+            entry = self._entries.get(session_id)
+            if entry is None:
+                return
+            if entry.last_key is not None and new[0][0] <= entry.last_key:
+                self._drop(session_id)
+                return
+            parts = [t or "" for _, t in new]
+            text = "\n".join(parts) if entry.last_key is None else entry.text + "\n" + "\n".join(parts)
+            self._drop(session_id)
+            self._store(session_id, _Entry(text, new[-1][0]))
+
+    def version(self, session_id: str) -> int:
+        """Bumped on every committed change to the session's chunks (for derived caches)."""
+        with self._lock:
+            return self._versions.get(session_id, 0)
+
+    def invalidate(self, session_id: str) -> None:
+        with self._lock:
+            self._bump(session_id)
+            self._drop(session_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            for sid in list(self._entries):
+                self._bump(sid)
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"entries": len(self._entries), "chars": self._size, "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+    # -- internals (call with lock held) --
+
+    def _bump(self, session_id: str) -> None:
+        self._versions[session_id] = self._versions.get(session_id, 0) + 1
+
+    def _drop(self, session_id: str) -> None:
+        entry = self._entries.pop(session_id, None)
+        if entry is not None:
+            self._size -= len(entry.text)
+
+    def _store(self, session_id: str, entry: _Entry) -> None:
+        if len(entry.text) > self.max_chars:
+            return
+        self._entries[session_id] = entry
+        self._size += len(entry.text)
+        while self._size > self.max_chars and self._entries:
+            _, old = self._entries.popitem(last=False)
+            self._size -= len(old.text)
+            self.evictions += 1
+
+
+transcript_cache = TranscriptCache(settings.TRANSCRIPT_CACHE_MAX_CHARS)
+
+
+# ----------------------
+# Commit hooks: changes are staged on Session.info and applied only after commit
+# ----------------------
+
+_PENDING = "transcript_cache_pending"
+
+
+def note_inserted(db: Session, session_id: str, rows: Iterable[Tuple[Optional[float], str, str]]) -> None:
+    """Stage Core-inserted chunks (ts_start, id, text) for append once ``db`` commits."""
+    db.info.setdefault(_PENDING, []).append(("append", session_id, list(rows)))
+
+
+@event.listens_for(Session, "after_flush")
+def _track_orm_changes(db: Session, _flush_context: Any) -> None:
+    pending: List[Tuple[str, str, Any]] = db.info.setdefault(_PENDING, [])
+    for obj in db.new:
+        if isinstance(obj, TranscriptChunk):
+            pending.append(("append", obj.session_id, [(obj.ts_start, obj.id, obj.text)]))
+    for obj in list(db.dirty) + list(db.deleted):
+        if isinstance(obj, TranscriptChunk):
+            state = inspect(obj)
+            if obj in db.deleted or any(state.attrs[a].history.has_changes() for a in ("text", "ts_start", "session_id")):
+                pending.append(("invalidate", obj.session_id, None))
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_pending(db: Session) -> None:
+    for op, sid, rows in db.info.pop(_PENDING, []):
+        if op == "append":
+            transcript_cache.append(sid, rows)
+        else:
+            transcript_cache.invalidate(sid)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(db: Session) -> None:
+    db.info.pop(_PENDING, None)
@@ -0,0 +1,114 @@
+"""Fit a session transcript into a prompt token budget.
+
+``pack_text`` works on the joined transcript (one chunk per line):
+
+- whitespace is normalised and filler chunks are dropped (empty, no letters or
+  digits, or the ``(fake)`` placeholder that dev-mode live audio emits);
+- a chunk repeating the previous one exactly (a re-sent window) is dropped, and a
+  chunk that starts with the tail of the previous one (overlapping live-audio
+  windows, at least MIN_OVERLAP_WORDS words) is trimmed to the new words; repeats
+  further apart are real content and kept, and pinned chunks are never dropped or
+  trimmed here;
+- if the result is still over ``budget_tokens``, pinned chunks (bookmarked, passed
+  in as ``pinned``, and ``[image-notes]``) are kept first and the remaining budget
+  is spread evenly over the other chunks, so every part of the lecture stays
+  represented. Output keeps timeline order.
+"""
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Iterable, List, Optional
+
+
+# Rough English-prose ratio; only used to size prompts, never for billing
+CHARS_PER_TOKEN = 4
+
+IMAGE_NOTES_PREFIX = "[image-notes]"
+FAKE_PREFIX = "(fake)"
+# Shortest word overlap between consecutive chunks treated as a live-audio seam
+MIN_OVERLAP_WORDS = 3
+_MAX_OVERLAP_WORDS = 64
+_WS = re.compile(r"\s+")
+_ALNUM = re.compile(r"\w")
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def normalize(text: str) -> str:
+    return _WS.sub(" ", text or "").strip()
+
+
+def is_filler(text: str) -> bool:
+    return not text or text.startswith(FAKE_PREFIX) or not _ALNUM.search(text)
+
+
+def _overlap(prev: List[str], cur: List[str]) -> int:
+    """Length of the longest suffix of ``prev`` that is a prefix of ``cur`` (in words)."""
+    for k in range(min(len(prev), len(cur), _MAX_OVERLAP_WORDS), MIN_OVERLAP_WORDS - 1, -1):
+        if prev[-k:] == cur[:k]:
+            return k
+    return 0
+
+
+@dataclass
+class _Piece:
+    text: str
+    tokens: int
+    pinned: bool
+
+
+def clean(lines: Iterable[str], pinned: Iterable[str] = ()) -> List[_Piece]:
+    pinned_keys = {normalize(p).lower() for text in pinned for p in (text or "").split("\n")}
+    pieces: List[_Piece] = []
+    prev_key = None
+    prev_words: List[str] = []
+    for line in lines:
+        text = normalize(line)
+        if is_filler(text):
+            continue
+        key = text.lower()
+        is_pinned = key in pinned_keys or text.startswith(IMAGE_NOTES_PREFIX)
+        if key == prev_key and not is_pinned:
+            continue
+        prev_key = key
+        words = text.split(" ")
+        k = 0 if is_pinned else _overlap(prev_words, [w.lower() for w in words])
+        if k:
+            text = " ".join(words[k:])
+        prev_words = [w.lower() for w in words]
+        if text:
+            pieces.append(_Piece(text, estimate_tokens(text) + 1, is_pinned))
+    return pieces
+
+
+def pack_text(text: str, budget_tokens: Optional[int], pinned: Iterable[str] = ()) -> str:
+    """Cleaned transcript within ``budget_tokens`` (estimated; <= 0 or None: no limit)."""
+    pieces = clean(text.split("\n"), pinned)
+    total = sum(p.tokens for p in pieces)
+    if not budget_tokens or budget_tokens <= 0 or total <= budget_tokens:
+        return "\n".join(p.text for p in pieces)
+
+    keep = [False] * len(pieces)
+    used = 0
+    for i, p in enumerate(pieces):
+        if p.pinned and used + p.tokens <= budget_tokens:
+            keep[i] = True
+            used += p.tokens
+    rest = [i for i, p in enumerate(pieces) if not p.pinned]
+    rest_total = sum(pieces[i].tokens for i in rest)
+    if rest_total and used < budget_tokens:
+        # Error-diffusion sampling: each chunk earns credit in proportion to the share of
+        # the budget left, so kept chunks are spread across the whole timeline
+        share = (budget_tokens - used) / rest_total
+        credit = 0.0
+        for i in rest:
+            tokens = pieces[i].tokens
+            credit += tokens * share
+            if credit >= tokens and used + tokens <= budget_tokens:
+                keep[i] = True
+                used += tokens
+                credit -= tokens
+    return "\n".join(p.text for i, p in enumerate(pieces) if keep[i])
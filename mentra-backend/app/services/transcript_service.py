@@ -0,0 +1,312 @@
+from __future__ import annotations
+
+import base64
+import binascii
+import hashlib
+import json
+import re
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+from uuid import uuid4
+
+from sqlalchemy import Select, and_, exists, func, insert, not_, or_, select, text, update
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..core.schemas import WebhookChunk
+from ..db import fts
+from ..models.entities import Bookmark, TranscriptChunk
+from .transcript_cache import note_inserted
+from .transcript_packer import estimate_tokens
+
+
+def chunk_key(session_id: str, chunk: WebhookChunk) -> str:
+    """Idempotency key for a chunk: the client id when supplied, else a content hash."""
+    if chunk.chunk_id:
+        return f"c:{chunk.chunk_id}"
+    raw = json.dumps([session_id, chunk.ts_start, chunk.ts_end, chunk.text], separators=(",", ":"))
+    return "h:" + hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _chunk_row(session_id: str, chunk: WebhookChunk) -> Dict[str, Any]:
+    return {
+        "id": str(uuid4()),
+        "session_id": session_id,
+        "text": chunk.text,
+        "ts_start": chunk.ts_start,
+        "ts_end": chunk.ts_end,
+        "bookmarked": chunk.bookmarked,
+        "chunk_key": chunk_key(session_id, chunk),
+    }
+
+
+def _insert_ignoring_duplicates(dialect_name: str):
+    table = TranscriptChunk.__table__
+    if dialect_name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    elif dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        return None
+    return dialect_insert(table).on_conflict_do_nothing(index_elements=["session_id", "chunk_key"])
+
+
+def bulk_insert_chunks(db: Session, session_id: str, chunks: Sequence[WebhookChunk]) -> List[str]:
+    """Insert validated chunks with Core INSERTs, bypassing the ORM unit of work.
+
+    Executes with a parameter list so SQLAlchemy's insertmanyvalues batching
+    renders multi-row ``INSERT ... VALUES`` statements (sized to the driver's
+    bind-parameter limit) from a single cached statement. Chunks whose
+    ``(session_id, chunk_key)`` is already stored are skipped with
+    ``ON CONFLICT DO NOTHING``, so webhook retries add no rows.
+
+    Returns the ids of the rows actually inserted (via RETURNING where the
+    dialect supports it) and stages them for the transcript cache, which
+    appends them once the caller commits. Does not commit.
+    """
+    if not chunks:
+        return []
+    table = TranscriptChunk.__table__
+    dialect = db.get_bind().dialect
+    rows = [_chunk_row(session_id, c) for c in chunks]
+    stmt = _insert_ignoring_duplicates(dialect.name)
+    if stmt is not None and getattr(dialect, "insert_returning", False):
+        ids = list(db.execute(stmt.returning(table.c.id), rows).scalars().all())
+        by_id = {r["id"]: r for r in rows}
+        note_inserted(db, session_id, [(by_id[i]["ts_start"], i, by_id[i]["text"]) for i in ids])
+        return ids
+
+    # No upsert/RETURNING support: drop keys that are already stored (or repeated) up front
+    keys = [r["chunk_key"] for r in rows]
+    seen = set(db.scalars(select(table.c.chunk_key).where(table.c.session_id == session_id, table.c.chunk_key.in_(keys))))
+    fresh: List[Dict[str, Any]] = []
+    for r in rows:
+        if r["chunk_key"] not in seen:
+            seen.add(r["chunk_key"])
+            fresh.append(r)
+    if fresh:
+        db.execute(stmt if stmt is not None else insert(table), fresh)
+        note_inserted(db, session_id, [(r["ts_start"], r["id"], r["text"]) for r in fresh])
+    return [r["id"] for r in fresh]
+
+
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_END = "</mark>"
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _fts5_query(q: str) -> str:
+    # Quote every word so user input can never be parsed as FTS5 syntax; words are ANDed
+    return " ".join(f'"{w}"' for w in _WORD_RE.findall(q))
+
+
+def search_chunks(db: Session, session_id: str, q: str, bookmarked: Optional[bool] = None, limit: int = 50) -> List[Dict[str, Any]]:
+    """Ranked full-text search over a session's chunks with highlighted snippets.
+
+    Uses the FTS5 / tsvector index from app.db.fts; falls back to a LIKE scan
+    (unranked, snippet = full text) when no full-text index is available.
+    """
+    dialect = db.get_bind().dialect.name
+    only_bm = " AND c.bookmarked = :bm" if bookmarked is True else ""
+    params: Dict[str, Any] = {"sid": session_id, "limit": int(limit), "bm": True}
+    if fts.enabled and dialect == "sqlite":
+        match = _fts5_query(q)
+        if not match:
+            return []
+        sql = (
+            f"SELECT c.id, c.text, c.bookmarked, c.ts_start, "
+            f"snippet({fts.FTS_TABLE}, 0, :hs, :he, '…', 16) AS snippet, bm25({fts.FTS_TABLE}) AS score "
+            f"FROM {fts.FTS_TABLE} JOIN {fts.FTS_KEY_TABLE} k ON k.fts_rowid = {fts.FTS_TABLE}.rowid "
+            f"JOIN transcript_chunk c ON c.id = k.chunk_id "
+            f"WHERE {fts.FTS_TABLE} MATCH :match AND c.session_id = :sid{only_bm} "
+            f"ORDER BY score LIMIT :limit"
+        )
+        params.update(match=match, hs=HIGHLIGHT_START, he=HIGHLIGHT_END)
+        rows = db.execute(text(sql), params).mappings().all()
+        # bm25() is lower-is-better; expose higher-is-better like ts_rank
+        return [{**r, "rank": -float(r["score"])} for r in rows]
+    if fts.enabled and dialect == "postgresql":
+        sql = (
+            "SELECT c.id, c.text, c.bookmarked, c.ts_start, "
+            "ts_headline('english', c.text, query, :opts) AS snippet, ts_rank(c.text_tsv, query) AS rank "
+            "FROM transcript_chunk c, websearch_to_tsquery('english', :q) query "
+            f"WHERE c.session_id = :sid AND c.text_tsv @@ query{only_bm} "
+            "ORDER BY rank DESC LIMIT :limit"
+        )
+        params.update(q=q, opts=f"StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_END}, MaxWords=16, MinWords=5")
+        return [dict(r) for r in db.execute(text(sql), params).mappings().all()]
+
+    stmt = select(TranscriptChunk).where(TranscriptChunk.session_id == session_id, TranscriptChunk.text.contains(q))
+    if bookmarked is True:
+        stmt = stmt.where(TranscriptChunk.bookmarked.is_(True))
+    rows = db.scalars(stmt.order_by(TranscriptChunk.ts_start).limit(limit)).all()
+    return [{"id": c.id, "text": c.text, "bookmarked": c.bookmarked, "ts_start": c.ts_start, "snippet": c.text, "rank": None} for c in rows]
+
+
+# Columns the timeline may project; id and ts_start are always read for the cursor
+TIMELINE_FIELDS = ("id", "text", "bookmarked", "ts_start", "ts_end", "created_at")
+DEFAULT_TIMELINE_FIELDS = ("id", "text", "bookmarked")
+
+
+class CursorError(ValueError):
+    pass
+
+
+def encode_cursor(ts_start: Optional[float], chunk_id: str) -> str:
+    raw = json.dumps([ts_start, chunk_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Optional[float], str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        ts, cid = json.loads(raw)
+        if not isinstance(cid, str) or not (ts is None or isinstance(ts, (int, float))):
+            raise ValueError("bad cursor shape")
+        return (float(ts) if ts is not None else None), cid
+    except (binascii.Error, ValueError, TypeError) as e:
+        raise CursorError(str(e)) from e
+
+
+def parse_fields(fields: Optional[str]) -> Tuple[str, ...]:
+    if not fields:
+        return DEFAULT_TIMELINE_FIELDS
+    wanted = tuple(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+    unknown = [f for f in wanted if f not in TIMELINE_FIELDS]
+    if unknown:
+        raise ValueError(f"unknown fields: {', '.join(unknown)}")
+    return wanted
+
+
+def timeline_stmt(
+    session_id: str, fields: Sequence[str], cursor: Optional[str] = None, bookmarked: Optional[bool] = None, tag: Optional[str] = None
+) -> Select:
+    """Projected chunk query in ``(ts_start NULLS FIRST, id)`` order, resuming after ``cursor``.
+
+    Only the requested columns are selected, so ``fields=id,bookmarked`` never
+    loads chunk text. Keyset pagination walks the (session_id, ts_start) index
+    instead of paying OFFSET's cost on deep pages.
+    """
+    c = TranscriptChunk.__table__.c
+    cols = [c[f] for f in dict.fromkeys(("id", "ts_start", *fields))]
+    stmt = select(*cols).where(c.session_id == session_id)
+    if bookmarked is True:
+        stmt = stmt.where(c.bookmarked.is_(True))
+    if tag:
+        # Chunks inside any range bookmarked with this tag
+        b = Bookmark.__table__.c
+        stmt = stmt.where(exists().where(b.session_id == session_id, b.tag == tag, b.ts_start <= c.ts_start, b.ts_end >= c.ts_end))
+    if cursor:
+        stmt = stmt.where(_after_cursor(cursor))
+    return stmt.order_by(c.ts_start.asc().nulls_first(), c.id.asc())
+
+
+def _after_cursor(cursor: str):
+    """Chunks strictly after ``cursor`` in ``(ts_start NULLS FIRST, id)`` order."""
+    c = TranscriptChunk.__table__.c
+    ts, cid = decode_cursor(cursor)
+    if ts is None:
+        return or_(c.ts_start.is_not(None), and_(c.ts_start.is_(None), c.id > cid))
+    return or_(c.ts_start > ts, and_(c.ts_start == ts, c.id > cid))
+
+
+def timeline_page(
+    db: Session,
+    session_id: str,
+    fields: Sequence[str],
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    bookmarked: Optional[bool] = None,
+    tag: Optional[str] = None,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """One page of projected chunks plus the cursor for the next page (None when done)."""
+    stmt = timeline_stmt(session_id, fields, cursor, bookmarked, tag)
+    if limit is not None:
+        stmt = stmt.limit(limit + 1)
+    rows = db.execute(stmt).mappings().all()
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]["ts_start"], rows[-1]["id"])
+    return [{f: r[f] for f in fields} for r in rows], next_cursor
+
+
+def iter_timeline(
+    db: Session, session_id: str, fields: Sequence[str], bookmarked: Optional[bool] = None, tag: Optional[str] = None, batch_size: int = 500
+) -> Iterator[Dict[str, Any]]:
+    """Stream projected chunks with a server-side cursor, ``batch_size`` rows at a time."""
+    stmt = timeline_stmt(session_id, fields, bookmarked=bookmarked, tag=tag).execution_options(yield_per=batch_size)
+    for r in db.execute(stmt).mappings():
+        yield {f: r[f] for f in fields}
+
+
+def bookmark_range(db: Session, session_id: str, ts_start: float, ts_end: float, tag: Optional[str] = None) -> Tuple[str, int]:
+    """Flag every chunk fully inside [ts_start, ts_end] with one set-based UPDATE
+    (served by the (session_id, ts_start) index) and record the range/tag.
+
+    Returns (bookmark id, chunks updated). Does not commit.
+    """
+    c = TranscriptChunk.__table__.c
+    res = db.execute(
+        update(TranscriptChunk.__table__)
+        .where(c.session_id == session_id, c.ts_start >= ts_start, c.ts_end <= ts_end)
+        .values(bookmarked=True)
+    )
+    bm = Bookmark(session_id=session_id, ts_start=ts_start, ts_end=ts_end, tag=tag)
+    db.add(bm)
+    db.flush()
+    return bm.id, int(res.rowcount or 0)
+
+
+def list_bookmarks(db: Session, session_id: str, tag: Optional[str] = None) -> List[Dict[str, Any]]:
+    q = db.query(Bookmark).filter(Bookmark.session_id == session_id)
+    if tag:
+        q = q.filter(Bookmark.tag == tag)
+    rows = q.order_by(Bookmark.ts_start.asc()).all()
+    return [{"id": b.id, "ts_start": b.ts_start, "ts_end": b.ts_end, "tag": b.tag} for b in rows]
+
+
+def pinned_texts(db: Session, session_id: str, transcript: str) -> List[str]:
+    """Bookmarked chunk texts to keep when packing ``transcript`` into the prompt budget.
+
+    Only queried when the transcript is over budget; below it nothing is cut anyway.
+    """
+    budget = settings.LLM_PROMPT_TOKEN_BUDGET
+    if budget <= 0 or estimate_tokens(transcript) <= budget:
+        return []
+    c = TranscriptChunk.__table__.c
+    return [t for t in db.scalars(select(c.text).where(c.session_id == session_id, c.bookmarked.is_(True))) if t]
+
+
+def audio_clock(db: Session, session_id: str) -> float:
+    """Where newly recorded audio continues on the session timeline: the end of the chunk
+    with the latest ``ts_start`` (one row off the (session_id, ts_start) index), or 0."""
+    c = TranscriptChunk.__table__.c
+    last = db.execute(
+        select(c.ts_start, c.ts_end).where(c.session_id == session_id, c.ts_start.is_not(None)).order_by(c.ts_start.desc()).limit(1)
+    ).first()
+    return max(float(last.ts_start), float(last.ts_end or 0.0)) if last else 0.0
+
+
+def chunk_watermark(db: Session, session_id: str) -> Tuple[Optional[str], int]:
+    """Cursor of the session's last chunk in timeline order, and its chunk count."""
+    c = TranscriptChunk.__table__.c
+    last = db.execute(
+        select(c.ts_start, c.id).where(c.session_id == session_id).order_by(c.ts_start.desc().nulls_last(), c.id.desc()).limit(1)
+    ).first()
+    count = db.scalar(select(func.count()).select_from(TranscriptChunk.__table__).where(c.session_id == session_id)) or 0
+    return (encode_cursor(last.ts_start, last.id) if last else None), int(count)
+
+
+def count_through(db: Session, session_id: str, cursor: str) -> int:
+    """Chunks at or before ``cursor``; differs from the count recorded with the cursor
+    when chunks arrived out of order behind it."""
+    c = TranscriptChunk.__table__.c
+    return int(db.scalar(select(func.count()).select_from(TranscriptChunk.__table__).where(c.session_id == session_id, not_(_after_cursor(cursor)))) or 0)
+
+
+def text_after(db: Session, session_id: str, cursor: str) -> Tuple[str, Optional[str], int]:
+    """Joined text of chunks after ``cursor``, the cursor of the last one, and how many there were."""
+    rows = db.execute(timeline_stmt(session_id, ("text",), cursor)).all()
+    if not rows:
+        return "", cursor, 0
+    return "\n".join(str(r.text or "") for r in rows), encode_cursor(rows[-1].ts_start, rows[-1].id), len(rows)
@@ -1,34 +1,59 @@
 from __future__ import annotations
 
+import asyncio
 import base64
-from typing import Any, Protocol, cast
+from typing import Any, List
 
-from fastapi import HTTPException, status
+from fastapi import HTTPException
 from ..core.config import settings
+from . import gemini_provider
 
 
-_gemini_client: Any = None
+_DEFAULT_PROMPT = "Extract clear, concise study notes from this image. If text is present, OCR and summarize it."
 
 
-class _SupportsGenerateContent(Protocol):
-    """Minimal protocol to satisfy type checking for Gemini model instances."""
+def _ocr(image_bytes: bytes) -> str:
+    import pytesseract  # type: ignore
+    from PIL import Image  # type: ignore
+    import io
+    img = Image.open(io.BytesIO(image_bytes))
+    return (pytesseract.image_to_string(img) or "").strip()
 
-    def generate_content(self, *args: Any, **kwargs: Any) -> Any: ...
 
+def _fake_analysis(image_bytes: bytes) -> str:
+    # Light OCR style fallback if available
+    try:
+        text = _ocr(image_bytes)
+        if text:
+            return f"(image-ocr) {text}"
+    except Exception:
+        pass
+    return "(fake-image) A photo with notes about the topic; bullet points and formulas visible."
 
-def _ensure_clients():
-    global _gemini_client
-    if _gemini_client is None:
-        try:
-            import google.generativeai as genai  # type: ignore[import-not-found]
-        except Exception as e:
-            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail={"detail": f"Gemini client import failed: {e}", "code": "llm_import"})
-        if not settings.GOOGLE_API_KEY:
-            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail={"detail": "GOOGLE_API_KEY is required for Gemini", "code": "llm_config"})
-        _configure = getattr(genai, "configure", None)
-        if callable(_configure):
-            _configure(api_key=settings.GOOGLE_API_KEY)
-        _gemini_client = genai
+
+def _ocr_fallback(image_bytes: bytes) -> str:
+    try:
+        return _ocr(image_bytes)
+    except Exception as e:
+        raise HTTPException(status_code=502, detail={"detail": f"Vision analysis failed: {e}", "code": "vision_error"})
+
+
+def _parts(image_bytes: bytes, mime: str, prompt: str | None) -> List[Any]:
+    b64 = base64.b64encode(image_bytes).decode("ascii")
+    return [prompt or _DEFAULT_PROMPT, {"mime_type": mime, "data": b64}]
+
+
+def _content_parts(image_bytes: bytes, mime: str, prompt: str | None) -> List[Any]:
+    b64 = base64.b64encode(image_bytes).decode("ascii")
+    return [
+        {
+            "role": "user",
+            "parts": [
+                {"text": prompt or _DEFAULT_PROMPT},
+                {"inline_data": {"mime_type": mime, "data": b64}},
+            ],
+        }
+    ]
 
 
 def analyze_image(image_bytes: bytes, mime: str = "image/png", prompt: str | None = None) -> str:
@@ -38,62 +63,31 @@ def analyze_image(image_bytes: bytes, mime: str = "image/png", prompt: str | Non
     """
     # Dev deterministic
     if getattr(settings, "DEV_FAKE_LLM", False):
-        # Light OCR style fallback if available
-        try:
-            import pytesseract  # type: ignore
-            from PIL import Image  # type: ignore
-            import io
-            img = Image.open(io.BytesIO(image_bytes))
-            text = pytesseract.image_to_string(img)
-            text = text.strip()
-            if text:
-                return f"(image-ocr) {text}"
-        except Exception:
-            pass
-        return "(fake-image) A photo with notes about the topic; bullet points and formulas visible."
+        return _fake_analysis(image_bytes)
 
     # Try Gemini multimodal
     try:
-        _ensure_clients()
-        gen_model_factory = getattr(_gemini_client, "GenerativeModel", None)
-        if not callable(gen_model_factory):
-            raise HTTPException(status_code=500, detail={"detail": "Gemini client missing GenerativeModel", "code": "llm_import"})
-        model_name = settings.MODEL or "gemini-1.5-pro"
-        # Cast to protocol so Pylance recognizes generate_content
-        model = cast(_SupportsGenerateContent, gen_model_factory(model_name))
-        b64 = base64.b64encode(image_bytes).decode("ascii")
         try:
-            resp = model.generate_content(
-                [
-                    prompt or "Extract clear, concise study notes from this image. If text is present, OCR and summarize it.",
-                    {"mime_type": mime, "data": b64},
-                ],
-                request_options={"timeout": settings.REQUEST_TIMEOUT_SECONDS},
-            )
-            txt = getattr(resp, "text", "") or ""
-            return txt.strip()
+            txt = gemini_provider.generate_text("vision", _parts(image_bytes, mime, prompt))
         except TypeError:
-            resp = model.generate_content(
-                contents=[
-                    {
-                        "role": "user",
-                        "parts": [
-                            {"text": prompt or "Extract clear, concise study notes from this image. If text is present, OCR and summarize it."},
-                            {"inline_data": {"mime_type": mime, "data": b64}},
-                        ],
-                    }
-                ]
-            )
-            txt = getattr(resp, "text", "") or ""
-            return txt.strip()
+            txt = gemini_provider.generate_text("vision", _content_parts(image_bytes, mime, prompt))
+        return txt.strip()
     except Exception:
-        # Fallback to OCR
+        return _ocr_fallback(image_bytes)
+
+
+async def analyze_image_async(image_bytes: bytes, mime: str = "image/png", prompt: str | None = None) -> str:
+    """Awaitable analyze_image; same OCR fallback."""
+    # OCR (pytesseract) is blocking; keep it off the event loop
+    if getattr(settings, "DEV_FAKE_LLM", False):
+        return await asyncio.to_thread(_fake_analysis, image_bytes)
+
+    try:
         try:
-            import pytesseract  # type: ignore
-            from PIL import Image  # type: ignore
-            import io
-            img = Image.open(io.BytesIO(image_bytes))
-            text = pytesseract.image_to_string(img)
-            return (text or "").strip()
-        except Exception as e:
-            raise HTTPException(status_code=502, detail={"detail": f"Vision analysis failed: {e}", "code": "vision_error"})
+            txt = await gemini_provider.generate_text_async("vision", _parts(image_bytes, mime, prompt))
+        except TypeError:
+            txt = await gemini_provider.generate_text_async("vision", _content_parts(image_bytes, mime, prompt))
+        return txt.strip()
+    except Exception:
+        # Includes the breaker being open (503 llm_unavailable)
+        return await asyncio.to_thread(_ocr_fallback, image_bytes)
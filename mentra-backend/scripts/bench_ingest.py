@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Benchmark transcript chunk ingest: per-row ORM adds (old webhook path) vs multi-row Core INSERT.
+
+Env vars:
+  BENCH_SQLITE_URL (default: a temporary SQLite file)
+  BENCH_PG_URL (optional, e.g. postgresql+psycopg://localhost/mentra_bench; skipped if unset)
+  BATCH (chunks per simulated webhook POST, default 500)
+  ROUNDS (POSTs per mode, default 20)
+"""
+import os, sys, time, tempfile, pathlib
+from uuid import uuid4
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+# app.core.config requires these; the benchmark never touches the app's own engine
+os.environ.setdefault("API_BEARER_TOKEN", "bench")
+os.environ.setdefault("WEBHOOK_TOKEN", "bench")
+os.environ.setdefault("DATABASE_URL", "sqlite+pysqlite:///:memory:")
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.base import Base
+from app.core.schemas import WebhookIn
+from app.models.entities import Session, TranscriptChunk
+from app.services.transcript_service import bulk_insert_chunks
+
+BATCH = int(os.environ.get("BATCH", "500"))
+ROUNDS = int(os.environ.get("ROUNDS", "20"))
+
+
+def make_payload(sid: str, rnd: int) -> WebhookIn:
+    return WebhookIn.model_validate({
+        "session_id": sid,
+        "chunks": [
+            {"text": f"chunk {rnd}.{i} about inertia and net external force", "ts_start": i, "ts_end": i + 1, "bookmarked": i % 10 == 0}
+            for i in range(BATCH)
+        ],
+    })
+
+
+def ingest_orm(db, payload: WebhookIn) -> None:
+    for c in payload.chunks:
+        db.add(TranscriptChunk(session_id=payload.session_id, text=c.text, ts_start=c.ts_start, ts_end=c.ts_end, bookmarked=c.bookmarked))
+    db.commit()
+
+
+def ingest_bulk(db, payload: WebhookIn) -> None:
+    bulk_insert_chunks(db, payload.session_id, payload.chunks)
+    db.commit()
+
+
+def run(url: str) -> None:
+    engine = create_engine(url, future=True)
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(bind=engine, expire_on_commit=False, future=True)
+    print(f"[{engine.dialect.name}] batch={BATCH} rounds={ROUNDS}")
+    results = {}
+    for name, fn in (("orm", ingest_orm), ("bulk", ingest_bulk)):
+        sid = str(uuid4())
+        with SessionLocal() as db:
+            db.add(Session(id=sid, title="bench", is_active=True))
+            db.commit()
+            payloads = [make_payload(sid, rnd) for rnd in range(ROUNDS)]
+            t0 = time.perf_counter()
+            for p in payloads:
+                fn(db, p)
+            elapsed = time.perf_counter() - t0
+        results[name] = BATCH * ROUNDS / elapsed
+        print(f"  {name:5s} {results[name]:>12,.0f} chunks/sec ({elapsed:.3f}s)")
+    print(f"  speedup x{results['bulk'] / results['orm']:.1f}")
+    engine.dispose()
+
+
+def main() -> None:
+    sqlite_url = os.environ.get("BENCH_SQLITE_URL")
+    if not sqlite_url:
+        tmpdir = tempfile.mkdtemp(prefix="bench_ingest_")
+        sqlite_url = f"sqlite+pysqlite:///{tmpdir}/bench.db"
+    run(sqlite_url)
+    pg_url = os.environ.get("BENCH_PG_URL")
+    if pg_url:
+        run(pg_url)
+    else:
+        print("[postgresql] skipped (set BENCH_PG_URL)")
+
+
+if __name__ == "__main__":
+    main()
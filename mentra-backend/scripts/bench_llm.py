@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Offline capacity test of LLM-bound endpoints against the latency simulator (app.services.sim_llm).
+
+Drives POST /sessions/{sid}/explain in-process through the full ASGI app (routes, scheduler,
+breakers, event loop and threadpool) with LLM_SIM=1, then prints latency percentiles,
+status codes and the /metrics/llm scheduler/simulator counters.
+
+Env vars (plus any LLM_SIM_* / LLM_* setting, e.g. LLM_SIM_LATENCY_DIST, LLM_MAX_IN_FLIGHT):
+  CONCURRENCY (concurrent clients, default 32)
+  REQUESTS (total requests, default 256)
+"""
+import asyncio, os, sys, time, tempfile, pathlib
+from collections import Counter
+from uuid import uuid4
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+os.environ.setdefault("API_BEARER_TOKEN", "bench")
+os.environ.setdefault("WEBHOOK_TOKEN", "bench")
+os.environ.setdefault("DATABASE_URL", f"sqlite+pysqlite:///{tempfile.mkdtemp(prefix='bench_llm_')}/bench.db")
+os.environ["LLM_SIM"] = "1"
+os.environ["DEV_FAKE_LLM"] = "0"
+
+import httpx
+
+from app.main import app
+
+CONCURRENCY = int(os.environ.get("CONCURRENCY", "32"))
+REQUESTS = int(os.environ.get("REQUESTS", "256"))
+AUTH = {"Authorization": f"Bearer {os.environ['API_BEARER_TOKEN']}"}
+
+
+def pct(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p / 100 * len(values)))] if values else 0.0
+
+
+async def main() -> None:
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            sid = str(uuid4())
+            chunks = [{"text": f"part {i}: inertia, net force and acceleration", "ts_start": i, "ts_end": i + 1} for i in range(200)]
+            r = await client.post("/webhooks/mentra", headers={"X-Webhook-Token": os.environ["WEBHOOK_TOKEN"]}, json={"session_id": sid, "chunks": chunks})
+            r.raise_for_status()
+
+            latencies, codes = [], Counter()
+            todo = iter(range(REQUESTS))
+
+            async def worker():
+                for i in todo:
+                    t0 = time.perf_counter()
+                    # Distinct topics: no cache hits or coalescing
+                    r = await client.post(f"/sessions/{sid}/explain", headers=AUTH, json={"topic": f"force example {i}", "mode": "technical"})
+                    latencies.append(time.perf_counter() - t0)
+                    codes[r.status_code] += 1
+
+            t0 = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(CONCURRENCY)))
+            elapsed = time.perf_counter() - t0
+            metrics = (await client.get("/metrics/llm", headers=AUTH)).json()
+
+    print(f"concurrency={CONCURRENCY} requests={REQUESTS} elapsed={elapsed:.2f}s throughput={REQUESTS / elapsed:.1f} req/s")
+    print(f"  latency p50={pct(latencies, 50) * 1000:.0f}ms p95={pct(latencies, 95) * 1000:.0f}ms p99={pct(latencies, 99) * 1000:.0f}ms")
+    print(f"  status {dict(codes)}")
+    print(f"  scheduler {metrics['scheduler']}")
+    print(f"  sim {metrics['sim']}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -10,10 +10,10 @@ Env vars:
   BASE (default http://127.0.0.1:8020)
   API_BEARER_TOKEN (default devsecret123)
   SID (optional; if not provided a new session is created)
-  AUDIO (optional path to .wav; if not provided, sends zeros to trigger transcription)
+  AUDIO (optional path to .wav; if not provided, sends a 1 s tone so voice detection cuts one utterance)
   IMAGE (optional path to image to upload)
 """
-import os, sys, time, json, pathlib
+import os, sys, time, json, math, pathlib, struct
 import requests, websockets, asyncio
 
 BASE = os.environ.get("BASE", "http://127.0.0.1:8020").rstrip("/")
@@ -35,7 +35,9 @@ async def stream_audio_ws(sid: str, audio_path: str | None = None):
         if audio_path and pathlib.Path(audio_path).exists():
             data = pathlib.Path(audio_path).read_bytes()
         else:
-            data = b"\x00" * 20000  # trigger threshold in server (>16000)
+            # 1 s tone then 1 s silence at 16 kHz: the server's VAD emits one segment
+            tone = [int(8000 * math.sin(2 * math.pi * 220 * n / 16000)) for n in range(16000)]
+            data = struct.pack(f"<{len(tone)}h", *tone) + b"\x00" * 32000
         # Send in chunks
         chunk = 4000
         for i in range(0, len(data), chunk):
@@ -0,0 +1,28 @@
+"""Synthetic 16-bit mono PCM for the live-audio and transcription tests."""
+import numpy as np
+
+
+RATE = 16000
+
+
+def tone_samples(seconds, amp=8000.0, rate=RATE):
+    """A 220 Hz sine as float samples (for mixing with noise before ``pcm``)."""
+    t = np.arange(int(seconds * rate)) / rate
+    return amp * np.sin(2 * np.pi * 220 * t)
+
+
+def pcm(samples):
+    return np.clip(samples, -32768, 32767).astype("<i2").tobytes()
+
+
+def tone(seconds, rate=RATE):
+    return pcm(tone_samples(seconds, rate=rate))
+
+
+def silence(seconds, rate=RATE):
+    return bytes(int(seconds * rate) * 2)
+
+
+def utterance(seconds=1.0, rate=RATE):
+    """A tone then a second of silence: one utterance for the voice activity detector."""
+    return tone(seconds, rate) + silence(1.0, rate)
@@ -1,11 +1,13 @@
 import os
 import sys
+import tempfile
 from pathlib import Path
 
 # Provide defaults for tests if not set
 os.environ.setdefault("API_BEARER_TOKEN", "devsecret123")
 os.environ.setdefault("WEBHOOK_TOKEN", "mentra_webhook_secret")
-os.environ.setdefault("DATABASE_URL", "sqlite+pysqlite:///./test.db")
+# Fresh SQLite file per run so schema changes never meet a stale test.db
+os.environ.setdefault("DATABASE_URL", f"sqlite+pysqlite:///{tempfile.mkdtemp(prefix='mentra-test-')}/test.db")
 os.environ.setdefault("DEV_FAKE_LLM", "1")
 
 # Add repo path to sys.path to import 'app'
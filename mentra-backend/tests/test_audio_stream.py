@@ -0,0 +1,140 @@
+import asyncio
+import io
+import wave
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services import audio_stream
+from app.services.audio_stream import AudioStream, dedupe_seam, wav_bytes
+from app.services.live_audio import LiveTranscriber
+
+from audio_utils import RATE, pcm, tone_samples
+
+
+client = TestClient(app)
+
+
+def _noise(seconds, amp, rate=RATE, seed=0):
+    return np.random.default_rng(seed).normal(0.0, amp, int(seconds * rate))
+
+
+def _feed(stream, data, step=3001):
+    # Odd-sized frames: samples straddle message boundaries
+    out = []
+    for i in range(0, len(data), step):
+        out.extend(stream.feed(data[i : i + step]))
+    return out
+
+
+def _read_wav(data):
+    with wave.open(io.BytesIO(data)) as w:
+        return w.getframerate(), w.getnchannels(), w.getsampwidth(), w.readframes(w.getnframes())
+
+
+def test_wav_framing_round_trips():
+    data = pcm(tone_samples(0.1))
+    assert _read_wav(wav_bytes(data, 22050)) == (22050, 1, 2, data)
+
+
+def test_vad_cuts_utterances_at_silence_with_preroll():
+    silence = np.zeros(int(0.5 * RATE))
+    gap = np.zeros(RATE)
+    audio = pcm(np.concatenate([silence, tone_samples(1.0), gap, tone_samples(0.6), gap]))
+    stream = AudioStream(RATE)
+    segs = _feed(stream, audio)
+    assert stream.flush() is None
+    assert len(segs) == 2
+    # Onset at 0.5 s minus 200 ms pre-roll; ends 200 ms after the last voiced frame
+    assert segs[0].start_seconds == pytest.approx(0.3, abs=0.04)
+    assert segs[0].end_seconds == pytest.approx(1.7, abs=0.04)
+    assert segs[1].start_seconds == pytest.approx(2.3, abs=0.04)
+    for seg in segs:
+        rate, channels, width, data = _read_wav(seg.wav)
+        assert (rate, channels, width) == (RATE, 1, 2)
+        assert len(data) == (seg.end - seg.start) * 2
+        assert data == audio[seg.start * 2 : seg.end * 2]
+    # Blips shorter than LIVE_SEGMENT_MIN_MS are dropped
+    assert _feed(AudioStream(RATE), pcm(np.concatenate([tone_samples(0.1), gap]))) == []
+
+
+def test_noise_floor_adapts_to_background():
+    noise = _noise(7.0, 500)  # about -36 dBFS, above LIVE_VAD_MIN_DBFS
+    noise[4 * RATE : 5 * RATE] += tone_samples(1.0)
+    stream = AudioStream(RATE)
+    segs = _feed(stream, pcm(noise))
+    speech = [s for s in segs if s.end_seconds > 3.0]
+    assert len(speech) == 1
+    assert speech[0].start_seconds == pytest.approx(3.8, abs=0.1)
+    assert speech[0].end_seconds == pytest.approx(5.2, abs=0.1)
+
+
+def test_long_utterance_is_cut_with_overlap(monkeypatch):
+    monkeypatch.setattr(audio_stream.settings, "LIVE_SEGMENT_MAX_SECONDS", 1.0)
+    stream = AudioStream(RATE)
+    segs = _feed(stream, pcm(tone_samples(2.4)))
+    last = stream.flush()
+    segs.append(last)
+    bounds = [(round(s.start_seconds, 2), round(s.end_seconds, 2), s.overlap) for s in segs]
+    assert bounds[0][2] == 0 and all(o == RATE // 2 for _, _, o in bounds[1:])
+    # Each continued segment starts 500 ms before the previous cut
+    for (_, prev_end, _), (start, _, _) in zip(bounds, bounds[1:]):
+        assert start == pytest.approx(prev_end - 0.5, abs=0.001)
+    assert bounds[-1][1] == pytest.approx(2.4, abs=0.001)
+
+
+def test_wav_header_frames_are_parsed_and_downmixed():
+    stereo = np.stack([tone_samples(1.0, rate=48000), tone_samples(1.0, rate=48000)], axis=1)
+    body = pcm(np.concatenate([stereo, np.zeros((48000, 2))]).reshape(-1))
+    header = (
+        b"RIFF" + (36 + len(body)).to_bytes(4, "little") + b"WAVE"
+        + b"fmt " + (16).to_bytes(4, "little") + (1).to_bytes(2, "little") + (2).to_bytes(2, "little")
+        + (48000).to_bytes(4, "little") + (48000 * 4).to_bytes(4, "little") + (4).to_bytes(2, "little") + (16).to_bytes(2, "little")
+        + b"data" + (0).to_bytes(4, "little")  # streaming writers leave the size unset
+    )
+    stream = AudioStream()
+    segs = stream.feed(header + body[:10000]) + _feed(stream, body[10000:])
+    assert stream.sample_rate == 48000 and len(segs) == 1
+    rate, channels, _, data = _read_wav(segs[0].wav)
+    assert (rate, channels) == (48000, 1)
+    assert len(data) == (segs[0].end - segs[0].start) * 2
+
+    with pytest.raises(ValueError):
+        AudioStream().feed(header.replace((16).to_bytes(2, "little") + b"data", (8).to_bytes(2, "little") + b"data") + body)
+
+
+def test_dedupe_seam():
+    assert dedupe_seam("so the force equals mass times", "Mass times acceleration.") == "acceleration."
+    assert dedupe_seam("the force", "acceleration is next") == "acceleration is next"
+    assert dedupe_seam("", "hello") == "hello"
+
+    async def main():
+        sent = []
+        texts = iter(["newton said force equals mass times", "mass times acceleration"])
+
+        async def transcribe(audio):
+            return next(texts)
+
+        async def send(msg):
+            sent.append(msg["transcript"])
+
+        live = LiveTranscriber(transcribe, send)
+        await live.submit(b"a")
+        await live.submit(b"b", seam=True)
+        await asyncio.sleep(0.01)
+        await live.close()
+        return sent
+
+    assert asyncio.run(main()) == ["newton said force equals mass times", "acceleration"]
+
+
+def test_unsupported_audio_reports_error_and_keeps_socket():
+    header = wav_bytes(b"", RATE).replace((16).to_bytes(2, "little") + b"data", (8).to_bytes(2, "little") + b"data")
+    with client.websocket_connect("/ws/sessions/audio-format/live-audio") as ws:
+        ws.send_bytes(header + bytes(100))
+        msg = ws.receive_json()
+        assert msg["code"] == "audio_format"
+        ws.send_text("flush")
+        assert ws.receive_json() == {"transcript": "", "final": True}
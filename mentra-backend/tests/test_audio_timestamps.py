@@ -0,0 +1,123 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api import routes
+from app.main import app
+from app.services.audio_stream import wav_bytes, wav_duration
+
+from audio_utils import RATE, silence, tone
+
+
+client = TestClient(app)
+AUTH = {"Authorization": "Bearer devsecret123"}
+
+
+@pytest.fixture
+def numbered(monkeypatch):
+    calls = {"n": 0}
+
+    async def transcribe(audio, mime="audio/wav"):
+        calls["n"] += 1
+        await asyncio.sleep(0)
+        return f"part {calls['n']}"
+
+    monkeypatch.setattr(routes, "transcribe_wav_bytes_async", transcribe)
+    return calls
+
+
+def _session():
+    return client.post("/sessions", headers=AUTH, json={"title": "Timed"}).json()["id"]
+
+
+def _chunks(sid):
+    r = client.get(f"/sessions/{sid}/timeline", headers=AUTH, params={"fields": "text,bookmarked,ts_start,ts_end"})
+    assert r.status_code == 200
+    return r.json()["chunks"]
+
+
+def test_live_segments_are_persisted_with_session_relative_times(numbered):
+    sid = _session()
+    with client.websocket_connect(f"/ws/sessions/{sid}/live-audio") as ws:
+        # 0.5 s silence, 1 s speech, 1 s silence, then 0.6 s speech flushed
+        ws.send_bytes(silence(0.5) + tone(1.0) + silence(1.0))
+        first = ws.receive_json()
+        ws.send_bytes(tone(0.6))
+        ws.send_text("flush")
+        final = ws.receive_json()
+    assert first["transcript"] == "part 1"
+    assert first["ts_start"] == pytest.approx(0.3, abs=0.04)
+    assert first["ts_end"] == pytest.approx(1.7, abs=0.04)
+    assert final["final"] is True and final["ts_start"] == pytest.approx(2.3, abs=0.04)
+    assert final["ts_end"] == pytest.approx(3.1, abs=0.001)
+
+    chunks = _chunks(sid)
+    assert [(c["text"], c["bookmarked"]) for c in chunks] == [("part 1", False), ("part 2", True)]
+    assert chunks[0]["ts_start"] == first["ts_start"] and chunks[1]["ts_end"] == final["ts_end"]
+
+    # A reconnecting client continues where the session's audio left off
+    with client.websocket_connect(f"/ws/sessions/{sid}/live-audio") as ws:
+        ws.send_bytes(tone(0.5))
+        ws.send_text("flush")
+        again = ws.receive_json()
+    assert again["ts_start"] == pytest.approx(final["ts_end"], abs=0.001)
+    assert again["ts_end"] == pytest.approx(final["ts_end"] + 0.5, abs=0.001)
+    assert [c["text"] for c in _chunks(sid)] == ["part 1", "part 2", "part 3"]
+
+
+def test_live_offset_query_and_bookmark_range(numbered):
+    sid = _session()
+    with client.websocket_connect(f"/ws/sessions/{sid}/live-audio?offset=60") as ws:
+        ws.send_bytes(tone(1.0) + silence(1.0))
+        ws.receive_json()
+        ws.send_text("flush")
+        ws.receive_json()
+    with client.websocket_connect(f"/ws/sessions/{sid}/live-audio?offset=abc") as ws:
+        with pytest.raises(Exception):
+            ws.receive_json()
+
+    (chunk,) = _chunks(sid)
+    assert chunk["ts_start"] == pytest.approx(60.0, abs=0.04) and not chunk["bookmarked"]
+    r = client.post(f"/sessions/{sid}/bookmark", headers=AUTH, data={"ts_start": "59", "ts_end": "62", "tag": "key"})
+    assert r.status_code == 200 and r.json()["updated"] == 1
+    # Outside the range: nothing matches
+    r = client.post(f"/sessions/{sid}/bookmark", headers=AUTH, data={"ts_start": "0", "ts_end": "30"})
+    assert r.json()["updated"] == 0
+
+
+def test_upload_spans_the_wav_duration(numbered):
+    sid = _session()
+    audio = wav_bytes(tone(2.5), RATE)
+    assert wav_duration(audio) == 2.5
+    assert wav_duration(b"not a wav") is None
+
+    def upload(data, **form):
+        r = client.post(f"/sessions/{sid}/transcribe", headers=AUTH, files={"file": ("a.wav", data, "audio/wav")}, data=form)
+        assert r.status_code == 200
+        return r.json()
+
+    assert upload(audio) == {"text": "part 1", "ts_start": 0.0, "ts_end": 2.5}
+    # Consecutive uploads continue the session clock
+    assert upload(audio) == {"text": "part 2", "ts_start": 2.5, "ts_end": 5.0}
+    assert upload(audio, offset="1.0") == {"text": "part 3", "ts_start": 1.0, "ts_end": 3.5}
+    assert [c["text"] for c in _chunks(sid)] == ["part 1", "part 3", "part 2"]
+
+    for bad in ("soon", "inf", "nan", "-Infinity"):
+        r = client.post(f"/sessions/{sid}/transcribe", headers=AUTH, files={"file": ("a.wav", audio, "audio/wav")}, data={"offset": bad})
+        assert r.status_code == 400 and r.json()["detail"]["code"] == "invalid_offset"
+
+
+def test_clock_counts_chunks_still_queued_for_write_behind(numbered, monkeypatch):
+    from app.core.schemas import WebhookChunk
+    from app.services import ingest_queue as iq
+
+    monkeypatch.setattr(routes.settings, "INGEST_WRITE_BEHIND", True)
+    q = iq.IngestQueue(max_rows=1000, max_delay_ms=300, max_batches=100)
+    monkeypatch.setattr(routes, "ingest_queue", q)
+    sid = _session()
+    assert q.enqueue(sid, [WebhookChunk(text="queued", ts_start=0.0, ts_end=4.0)])
+    audio = wav_bytes(tone(1.0), RATE)
+    r = client.post(f"/sessions/{sid}/transcribe", headers=AUTH, files={"file": ("a.wav", audio, "audio/wav")})
+    assert (r.json()["ts_start"], r.json()["ts_end"]) == (4.0, 5.0)
+    q.stop(timeout=5)
@@ -0,0 +1,156 @@
+import asyncio
+import time
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services import gemini_provider
+from app.services.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, breakers
+
+
+client = TestClient(app)
+AUTH = {"Authorization": "Bearer devsecret123"}
+
+
+@pytest.fixture(autouse=True)
+def _fresh_breakers():
+    breakers.reset()
+    yield
+    breakers.reset()
+
+
+def _breaker(op, **kw):
+    opts = dict(window=4, min_calls=4, failure_ratio=0.5, slow_seconds=10.0, open_seconds=0.05)
+    opts.update(kw)
+    b = breakers._breakers[op] = CircuitBreaker(op, **opts)
+    return b
+
+
+class _Resp:
+    def __init__(self, text):
+        self.text = text
+
+
+def _use_model(monkeypatch, model):
+    monkeypatch.setattr(gemini_provider, "get_model", lambda name=None, cfg=None: gemini_provider._PooledModel(model, None))
+
+
+def test_breaker_trips_fails_fast_and_recovers_via_probe(monkeypatch):
+    calls = []
+
+    class FlakyModel:
+        healthy = False
+
+        def generate_content(self, parts, **kwargs):  # noqa: ARG002
+            calls.append(parts)
+            if not self.healthy:
+                raise RuntimeError("provider down")
+            return _Resp("ok")
+
+    model = FlakyModel()
+    _use_model(monkeypatch, model)
+    b = _breaker("summary")
+    for _ in range(4):
+        with pytest.raises(RuntimeError):
+            gemini_provider.generate_content("p", op="summary")
+    assert b.state == OPEN and b.trips == 1
+
+    # Open: rejected without touching the provider
+    with pytest.raises(HTTPException) as exc:
+        gemini_provider.generate_content("p", op="summary")
+    assert exc.value.status_code == 503 and exc.value.detail["code"] == "llm_unavailable"
+    assert len(calls) == 4 and b.rejected == 1
+
+    # After the cool-down a single probe goes through; a failed probe re-opens
+    time.sleep(0.06)
+    with pytest.raises(RuntimeError):
+        gemini_provider.generate_content("p", op="summary")
+    assert b.state == OPEN and b.trips == 2
+
+    time.sleep(0.06)
+    model.healthy = True
+    assert gemini_provider.generate_content("p", op="summary").text == "ok"
+    assert b.state == CLOSED
+    # Other operations are unaffected
+    assert breakers.get("explain").state == CLOSED
+
+
+def test_half_open_admits_one_probe_and_slow_calls_count_as_failures():
+    b = CircuitBreaker("vision", window=2, min_calls=2, failure_ratio=1.0, slow_seconds=0.5, open_seconds=0.0)
+    b.record(True, 0.1)
+    b.record(True, 0.9)
+    assert b.state == CLOSED
+    b.record(True, 1.2)
+    assert b.state == OPEN
+
+    b.before_call()  # open_seconds elapsed: the probe
+    assert b.state == HALF_OPEN
+    with pytest.raises(HTTPException):
+        b.before_call()
+    b.release()  # probe never reached the provider; the next caller may probe
+    b.before_call()
+    b.record(True, 0.1)
+    assert b.state == CLOSED
+
+
+def test_hedged_request_returns_faster_attempt(monkeypatch):
+    attempts = []
+
+    class TailModel:
+        async def generate_content_async(self, parts, **kwargs):  # noqa: ARG002
+            attempts.append(time.monotonic())
+            # First attempt hits a latency tail, the hedge is fast
+            await asyncio.sleep(2.0 if parts == "p" and len(attempts) == 1 else 0.01)
+            return _Resp(f"attempt {len(attempts)}")
+
+    _use_model(monkeypatch, TailModel())
+    cfg = gemini_provider._settings()
+    monkeypatch.setattr(cfg, "LLM_HEDGE_OPS", ["explain"])
+    monkeypatch.setattr(cfg, "LLM_HEDGE_MIN_SAMPLES", 3)
+    monkeypatch.setattr(cfg, "LLM_HEDGE_MIN_DELAY_SECONDS", 0.05)
+    b = _breaker("explain")
+
+    # No latency history yet: no hedge
+    assert b.p95(3) is None
+    for _ in range(3):
+        b.record(True, 0.02)
+
+    started = time.monotonic()
+    resp = asyncio.run(gemini_provider.generate_content_async("p", op="explain", timeout=5))
+    assert resp.text == "attempt 2"
+    assert time.monotonic() - started < 1.0
+    assert len(attempts) == 2 and attempts[1] - attempts[0] >= 0.05
+    assert b.hedges == 1
+
+    # Ops not listed are never hedged
+    attempts.clear()
+    _breaker("summary")
+    for _ in range(3):
+        breakers.get("summary").record(True, 0.02)
+    assert asyncio.run(gemini_provider.generate_content_async("q", op="summary", timeout=5)).text == "attempt 1"
+    assert len(attempts) == 1
+
+
+def test_email_extract_falls_back_to_heuristic_when_open(monkeypatch):
+    from app.services import email_extract
+
+    monkeypatch.setattr(email_extract.settings, "DEV_FAKE_LLM", False)
+    monkeypatch.setattr(email_extract.settings, "GEMINI_API_KEY", "k")
+    monkeypatch.setattr(email_extract, "genai", type("G", (), {"GenerativeModel": object}))
+    b = _breaker("email", open_seconds=60)
+    b._trip()
+
+    out = email_extract.extract_from_email("Assignment 3 due Friday", "Submit via the portal")
+    assert out == {"type": "homework", "title": "Assignment 3 due Friday", "confidence": 0.4}
+    out = asyncio.run(email_extract.extract_from_email_async("Office hours", "Room 101"))
+    assert out["type"] == "meeting"
+    assert b.rejected == 2
+
+
+def test_llm_metrics_include_breakers():
+    _breaker("transcribe")
+    r = client.get("/metrics/llm", headers=AUTH)
+    assert r.status_code == 200
+    assert r.json()["breakers"]["transcribe"]["state"] == CLOSED
@@ -1,6 +1,8 @@
 from fastapi.testclient import TestClient
 from app.main import app
 
+from audio_utils import utterance
+
 
 client = TestClient(app)
 
@@ -14,8 +16,8 @@ def _create_session(title: str = "Glasses Test") -> str:
 def test_glasses_websocket_flush_returns_final_transcript():
     sid = _create_session()
     with client.websocket_connect(f"/ws/sessions/{sid}/live-audio") as ws:
-        # send enough bytes to trigger transcription callback
-        ws.send_bytes(b"\x00" * 20000)
+        # send an utterance followed by silence to trigger transcription
+        ws.send_bytes(utterance())
         msg = ws.receive_json()
         assert "transcript" in msg
         # flush
@@ -41,3 +43,43 @@ def test_glasses_upload_asset_and_timeline(tmp_path):
     data = r.json()
     assert isinstance(data.get("assets"), list)
     assert len(data.get("assets")) >= 1
+
+
+def test_asset_analysis_runs_without_holding_a_connection(monkeypatch):
+    from app.api import routes
+    from app.db.session import async_engine
+
+    seen = {}
+
+    async def analyze(raw, mime="image/png"):
+        seen["checked_out"] = async_engine.pool.checkedout()
+        return "whiteboard: F = ma"
+
+    monkeypatch.setattr(routes, "analyze_image_async", analyze)
+    sid = _create_session()
+    r = client.post(f"/sessions/{sid}/assets", headers={"Authorization": "Bearer devsecret123"}, files={"file": ("board.png", b"png", "image/png")})
+    assert r.status_code == 200
+    assert seen == {"checked_out": 0}
+    r = client.get(f"/sessions/{sid}/timeline", headers={"Authorization": "Bearer devsecret123"})
+    assert [c["text"] for c in r.json()["chunks"]] == ["[image-notes] whiteboard: F = ma"]
+
+
+def test_vision_ocr_fallback_runs_off_the_event_loop(monkeypatch):
+    import asyncio
+    import threading
+    from app.services import vision_service
+
+    threads = []
+
+    def ocr(image_bytes):
+        threads.append(threading.current_thread())
+        return "ocr text"
+
+    async def unavailable(*args, **kwargs):
+        raise RuntimeError("breaker open")
+
+    monkeypatch.setattr(vision_service.settings, "DEV_FAKE_LLM", False)
+    monkeypatch.setattr(vision_service, "_ocr_fallback", ocr)
+    monkeypatch.setattr(vision_service.gemini_provider, "generate_text_async", unavailable)
+    assert asyncio.run(vision_service.analyze_image_async(b"png")) == "ocr text"
+    assert threads and threads[0] is not threading.main_thread()
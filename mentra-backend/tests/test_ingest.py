@@ -0,0 +1,194 @@
+from fastapi.testclient import TestClient
+from uuid import uuid4
+from app.main import app
+
+
+client = TestClient(app)
+WEBHOOK_HEADERS = {"X-Webhook-Token": "mentra_webhook_secret"}
+
+
+def test_webhook_bulk_ingest_persists_all_chunks():
+    from app.db.session import get_session
+    from app.models.entities import TranscriptChunk
+
+    sid = str(uuid4())
+    n = 300  # spans several insertmanyvalues batches
+    body = {
+        "session_id": sid,
+        "chunks": [{"text": f"chunk {i}", "ts_start": i, "ts_end": i + 1, "bookmarked": i == 7} for i in range(n)],
+    }
+    r = client.post("/webhooks/mentra", headers=WEBHOOK_HEADERS, json=body)
+    assert r.status_code == 200
+    assert r.json() == {"ok": True, "count": n, "duplicates": 0}
+
+    with get_session() as db:
+        rows = db.query(TranscriptChunk).filter(TranscriptChunk.session_id == sid).order_by(TranscriptChunk.ts_start).all()
+        assert len(rows) == n
+        assert rows[7].bookmarked is True and rows[8].bookmarked is False
+        assert rows[-1].text == f"chunk {n - 1}"
+        assert all(r.created_at is not None for r in rows)
+
+
+def test_webhook_ingest_rejects_invalid_chunks():
+    body = {"session_id": str(uuid4()), "chunks": [{"text": "x", "ts_start": "not-a-number"}]}
+    r = client.post("/webhooks/mentra", headers=WEBHOOK_HEADERS, json=body)
+    assert r.status_code == 422
+    assert r.json()["detail"]["code"] == "invalid_payload"
+
+
+def test_webhook_ingest_without_session_id_creates_session():
+    r = client.post("/webhooks/mentra", headers=WEBHOOK_HEADERS, json={"chunks": [{"text": "orphan"}]})
+    assert r.status_code == 200
+    assert r.json()["count"] == 1
+
+
+def test_webhook_retry_is_idempotent():
+    from app.db.session import get_session
+    from app.models.entities import TranscriptChunk
+
+    sid = str(uuid4())
+    body = {
+        "session_id": sid,
+        "chunks": [
+            {"text": "hashed", "ts_start": 0, "ts_end": 1},
+            {"chunk_id": "glasses-42", "text": "client id", "ts_start": 1, "ts_end": 2},
+        ],
+    }
+    r1 = client.post("/webhooks/mentra", headers=WEBHOOK_HEADERS, json=body)
+    assert r1.json() == {"ok": True, "count": 2, "duplicates": 0}
+    # Retry, plus a re-sent client id whose text changed and a duplicate inside the batch
+    body["chunks"].append({"chunk_id": "glasses-42", "text": "client id (edited)", "ts_start": 1, "ts_end": 2})
+    body["chunks"].append({"text": "new", "ts_start": 2, "ts_end": 3})
+    body["chunks"].append({"text": "new", "ts_start": 2, "ts_end": 3})
+    r2 = client.post("/webhooks/mentra", headers=WEBHOOK_HEADERS, json=body)
+    assert r2.json() == {"ok": True, "count": 1, "duplicates": 4}
+
+    with get_session() as db:
+        texts = sorted(c.text for c in db.query(TranscriptChunk).filter(TranscriptChunk.session_id == sid))
+    assert texts == ["client id", "hashed", "new"]
+
+
+def test_write_behind_ingest_group_commits(monkeypatch):
+    from app.core.config import settings
+    from app.db.session import get_session
+    from app.models.entities import TranscriptChunk
+    from app.services.ingest_queue import ingest_queue
+
+    monkeypatch.setattr(settings, "INGEST_WRITE_BEHIND", True)
+    sid = str(uuid4())
+    for i in range(5):
+        r = client.post(
+            "/webhooks/mentra",
+            headers=WEBHOOK_HEADERS,
+            json={"session_id": sid, "chunks": [{"text": f"queued {i}", "ts_start": i, "ts_end": i + 1}]},
+        )
+        assert r.status_code == 200
+        assert r.json() == {"ok": True, "count": 1, "queued": True}
+
+    ingest_queue.flush()
+    with get_session() as db:
+        assert db.query(TranscriptChunk).filter(TranscriptChunk.session_id == sid).count() == 5
+
+
+def test_write_behind_queue_drains_on_stop():
+    from app.core.schemas import WebhookChunk
+    from app.db.session import get_session
+    from app.models.entities import TranscriptChunk
+    from app.services.ingest_queue import IngestQueue
+
+    q = IngestQueue(max_rows=1000, max_delay_ms=10_000, max_batches=100)
+    sid = str(uuid4())
+    assert q.enqueue(sid, [WebhookChunk(text="a"), WebhookChunk(text="b")])
+    assert q.enqueue(sid, [WebhookChunk(text="c")])
+    q.stop(timeout=5)
+    assert not q.running
+    with get_session() as db:
+        assert db.query(TranscriptChunk).filter(TranscriptChunk.session_id == sid).count() == 3
+
+
+def test_write_behind_failed_batch_does_not_drop_its_group(monkeypatch):
+    from app.core.schemas import WebhookChunk
+    from app.db.session import get_session
+    from app.models.entities import TranscriptChunk
+    from app.services import ingest_queue as iq
+
+    bad = str(uuid4())
+    broken = {"on": True}
+    real_insert = iq.bulk_insert_chunks
+
+    def flaky_insert(db, sid, chunks):
+        if sid == bad and broken["on"]:
+            raise RuntimeError("constraint violated")
+        return real_insert(db, sid, chunks)
+
+    monkeypatch.setattr(iq, "bulk_insert_chunks", flaky_insert)
+    q = iq.IngestQueue(max_rows=1000, max_delay_ms=200, max_batches=100, retry_attempts=2, retry_backoff_ms=0)
+    good = [str(uuid4()), str(uuid4())]
+    assert q.enqueue(good[0], [WebhookChunk(text="a")])
+    assert q.enqueue(bad, [WebhookChunk(text="b")])
+    assert q.enqueue(good[1], [WebhookChunk(text="c"), WebhookChunk(text="d")])
+    q.flush()
+
+    def count(sid):
+        with get_session() as db:
+            return db.query(TranscriptChunk).filter(TranscriptChunk.session_id == sid).count()
+
+    # The group was rolled back; its healthy batches were retried on their own
+    assert [count(sid) for sid in good] == [1, 2]
+    assert count(bad) == 0 and [b.session_id for b in q.failed] == [bad]
+
+    # The failed batch is kept and committed once writes succeed again
+    broken["on"] = False
+    assert q.enqueue(good[0], [WebhookChunk(text="e")])
+    q.stop(timeout=5)
+    assert count(bad) == 1 and count(good[0]) == 2 and q.failed == []
+
+
+def test_write_behind_queue_full_reports_backpressure():
+    from app.core.schemas import WebhookChunk
+    from app.services.ingest_queue import IngestQueue
+
+    q = IngestQueue(max_rows=1, max_delay_ms=0, max_batches=1)
+    q.start = lambda: None  # keep the writer idle so the queue stays full
+    sid = str(uuid4())
+    assert q.enqueue(sid, [WebhookChunk(text="a")])
+    assert q.enqueue(sid, [WebhookChunk(text="b")]) is False
+
+
+def test_ndjson_stream_ingest_flushes_in_batches(monkeypatch):
+    import json
+    from app.core.config import settings
+    from app.db.session import get_session
+    from app.models.entities import TranscriptChunk
+
+    monkeypatch.setattr(settings, "INGEST_STREAM_BATCH_ROWS", 100)
+    sid = str(uuid4())
+    lines = [json.dumps({"text": f"line {i}", "ts_start": i, "ts_end": i + 1}) for i in range(250)]
+    lines.insert(10, "{not json")
+    lines.insert(20, "")
+    lines.append(lines[0])  # retried line
+    body = "\n".join(lines).encode()
+
+    def body_iter():
+        # deliver in odd-sized pieces so lines straddle reads
+        for i in range(0, len(body), 777):
+            yield body[i : i + 777]
+
+    r = client.post(
+        f"/webhooks/mentra:ndjson?session_id={sid}",
+        headers={**WEBHOOK_HEADERS, "Content-Type": "application/x-ndjson"},
+        content=body_iter(),
+    )
+    assert r.status_code == 200
+    out = r.json()
+    assert out["session_id"] == sid
+    assert out["lines"] == 252 and out["invalid"] == 1
+    assert out["count"] == 250 and out["duplicates"] == 1
+    assert out["batches"] == 3
+    with get_session() as db:
+        assert db.query(TranscriptChunk).filter(TranscriptChunk.session_id == sid).count() == 250
+
+
+def test_ndjson_stream_ingest_requires_ndjson_content_type():
+    r = client.post("/webhooks/mentra:ndjson", headers=WEBHOOK_HEADERS, json={"chunks": []})
+    assert r.status_code == 415
@@ -0,0 +1,97 @@
+import time
+from uuid import uuid4
+
+from fastapi.testclient import TestClient
+from app.main import app
+
+
+AUTH = {"Authorization": "Bearer devsecret123"}
+WEBHOOK_HEADERS = {"X-Webhook-Token": "mentra_webhook_secret"}
+
+
+def _wait(client, job_id, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        r = client.get(f"/jobs/{job_id}", headers=AUTH)
+        assert r.status_code == 200
+        if r.json()["status"] in ("succeeded", "failed"):
+            return r.json()
+        time.sleep(0.02)
+    raise AssertionError("job did not finish")
+
+
+def _stub_llm(monkeypatch):
+    from app.services import llm_service
+
+    async def cards(text, types, max_per_type, pinned=()):
+        return {"qa": [{"question": "What is inertia?", "answer": "Resistance to change in motion", "source_ts": 0}], "cloze": [], "mc": []}
+
+    async def summary(text, pinned=()):
+        return {"bullets": text.splitlines(), "sections": [], "keywords": []}
+
+    monkeypatch.setattr(llm_service, "generate_flashcards_async", cards)
+    monkeypatch.setattr(llm_service, "generate_summary_async", summary)
+
+
+def test_flashcard_and_summary_jobs_complete_in_background(monkeypatch):
+    _stub_llm(monkeypatch)
+    sid = str(uuid4())
+    # Context manager keeps one event loop alive across requests, as under uvicorn
+    with TestClient(app) as client:
+        client.post("/webhooks/mentra", headers=WEBHOOK_HEADERS, json={"session_id": sid, "chunks": [{"text": "inertia", "ts_start": 0, "ts_end": 1}]})
+
+        r = client.post(f"/sessions/{sid}/flashcards:generate", headers=AUTH, json={"types": ["qa"], "max_per_type": 1})
+        assert r.status_code == 202
+        assert r.json()["status"] == "queued"
+        job = _wait(client, r.json()["job_id"])
+        assert job["status"] == "succeeded" and job["kind"] == "flashcards"
+        assert job["result"]["qa"][0]["question"] == "What is inertia?"
+        assert job["started_at"] and job["finished_at"]
+        assert [c["question"] for c in client.get(f"/sessions/{sid}/flashcards", headers=AUTH).json()] == ["What is inertia?"]
+
+        r = client.post(f"/sessions/{sid}/summary:generate?mode=incremental", headers=AUTH)
+        assert r.status_code == 202
+        job = _wait(client, r.json()["job_id"])
+        assert job["status"] == "succeeded"
+        assert job["result"]["bullets"] == ["inertia"]
+
+
+def test_failed_job_records_error(monkeypatch):
+    from app.core.security import api_error
+    from app.services import llm_service
+
+    async def boom(text, pinned=()):
+        api_error("LLM request failed: boom", code="llm_error", status_code=502)
+
+    monkeypatch.setattr(llm_service, "generate_summary_async", boom)
+    sid = str(uuid4())
+    with TestClient(app) as client:
+        r = client.post(f"/sessions/{sid}/summary:generate", headers=AUTH)
+        job = _wait(client, r.json()["job_id"])
+        assert job["status"] == "failed"
+        assert job["error"]["code"] == "llm_error"
+
+
+def test_job_submission_backpressure_and_lookup(monkeypatch):
+    from app.services.job_service import job_runner
+
+    with TestClient(app) as client:
+        assert client.get(f"/jobs/{uuid4()}", headers=AUTH).status_code == 404
+        monkeypatch.setattr(job_runner, "max_pending", 0)
+        r = client.post(f"/sessions/{uuid4()}/summary:generate", headers=AUTH)
+        assert r.status_code == 503
+        assert r.json()["detail"]["code"] == "jobs_busy"
+
+
+def test_recover_fails_orphaned_jobs():
+    import asyncio
+    from app.db.session import get_session
+    from app.models.entities import Job
+    from app.services.job_service import job_runner
+
+    with get_session() as db:
+        db.add(Job(id="orphan-" + str(uuid4()), kind="summary", status="running"))
+        db.commit()
+    assert asyncio.run(job_runner.recover()) >= 1
+    with get_session() as db:
+        assert db.query(Job).filter(Job.status.in_(["queued", "running"])).count() == 0
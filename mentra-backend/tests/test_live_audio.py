@@ -0,0 +1,111 @@
+import asyncio
+import time
+
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from app.api import routes
+from app.main import app
+from app.services.live_audio import LiveTranscriber
+
+from audio_utils import utterance
+
+
+client = TestClient(app)
+AUTH = {"Authorization": "Bearer devsecret123"}
+
+
+def test_windows_transcribe_concurrently_and_arrive_in_order(monkeypatch):
+    running = {"now": 0, "peak": 0, "calls": 0}
+
+    async def transcribe(audio):
+        running["calls"] += 1
+        n = running["calls"]
+        running["now"] += 1
+        running["peak"] = max(running["peak"], running["now"])
+        # Earlier windows take longer, so completion order is reversed
+        await asyncio.sleep(0.05 * (4 - n))
+        running["now"] -= 1
+        return f"window {n}"
+
+    monkeypatch.setattr(routes, "transcribe_wav_bytes_async", transcribe)
+    monkeypatch.setattr(routes.settings, "LIVE_AUDIO_MAX_IN_FLIGHT", 3)
+    sid = client.post("/sessions", headers=AUTH, json={"title": "Live"}).json()["id"]
+    with client.websocket_connect(f"/ws/sessions/{sid}/live-audio") as ws:
+        for _ in range(3):
+            ws.send_bytes(utterance(0.5))
+        ws.send_text("ping")
+        ws.send_text("flush")
+        got = [ws.receive_json() for _ in range(5)]
+    for msg in got[:3]:
+        # Session-relative position of each utterance (1.5 s of audio per send)
+        assert msg.pop("ts_end") > msg.pop("ts_start") >= 0
+    assert got == [
+        {"transcript": "window 1"},
+        {"transcript": "window 2"},
+        {"transcript": "window 3"},
+        {"ok": True},
+        {"transcript": "", "final": True},
+    ]
+    assert running["peak"] == 3
+
+
+def test_in_flight_limit_applies_backpressure():
+    release = {}
+
+    async def main():
+        sent = []
+
+        async def transcribe(audio):
+            await release[audio].wait()
+            return audio.decode()
+
+        async def send(msg):
+            sent.append(msg)
+
+        release.update({b"a": asyncio.Event(), b"b": asyncio.Event()})
+        live = LiveTranscriber(transcribe, send, max_in_flight=1)
+        await live.submit(b"a")
+        blocked = asyncio.create_task(live.submit(b"b"))
+        await asyncio.sleep(0.05)
+        assert not blocked.done() and live.in_flight == 1
+        release[b"a"].set()
+        await asyncio.wait_for(blocked, 1)
+        release[b"b"].set()
+        await asyncio.sleep(0.01)
+        await live.close()
+        return sent
+
+    assert asyncio.run(main()) == [{"transcript": "a"}, {"transcript": "b"}]
+
+
+def test_errors_are_reported_in_order_and_close_keeps_final_windows():
+    async def main():
+        sent, saved = [], []
+
+        async def transcribe(audio):
+            if audio == b"busy":
+                raise HTTPException(status_code=503, detail={"detail": "LLM queue full", "code": "llm_busy"})
+            await asyncio.sleep(0.05 if audio == b"final" else 5)
+            return audio.decode()
+
+        async def send(msg):
+            sent.append(msg)
+
+        async def persist(text):
+            saved.append(text)
+
+        live = LiveTranscriber(transcribe, send, max_in_flight=4)
+        await live.submit(b"busy")
+        await live.submit(b"slow interim")
+        await live.submit(b"final", final=True, persist=persist)
+        await asyncio.sleep(0.01)
+        started = time.monotonic()
+        await live.close()  # client disconnected
+        return sent, saved, time.monotonic() - started
+
+    sent, saved, took = asyncio.run(main())
+    assert sent[0] == {"transcript": "", "error": "LLM queue full", "code": "llm_busy"}
+    assert sent[1:] == [{"transcript": "final", "final": True}]
+    assert saved == ["final"]
+    assert took < 1  # the interim window was cancelled, not awaited
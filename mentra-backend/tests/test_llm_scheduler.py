@@ -0,0 +1,126 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.llm_scheduler import LLMScheduler
+
+
+client = TestClient(app)
+
+
+def _sched(**kw):
+    opts = dict(max_in_flight=1, rate_per_sec=0, burst=1, queue_timeout=5, starvation_seconds=60)
+    opts.update(kw)
+    return LLMScheduler(**opts)
+
+
+def test_interactive_calls_are_admitted_before_batch():
+    sched = _sched()
+    order = []
+
+    def worker(op):
+        with sched.slot(op):
+            order.append(op)
+
+    with sched.slot("summary"):
+        threads = [threading.Thread(target=worker, args=(op,)) for op in ("flashcards", "summary", "transcribe")]
+        for t in threads:
+            t.start()
+            time.sleep(0.02)  # deterministic enqueue order
+        assert sched.stats()["classes"]["batch"]["queue_depth"] == 2
+        assert sched.stats()["classes"]["interactive"]["queue_depth"] == 1
+    for t in threads:
+        t.join(2)
+    assert order == ["transcribe", "flashcards", "summary"]
+    assert sched.stats()["in_flight"] == 0
+
+
+def test_starving_batch_call_goes_first():
+    sched = _sched(starvation_seconds=0.05)
+    order = []
+
+    async def main():
+        async def call(op):
+            async with sched.slot_async(op):
+                order.append(op)
+
+        async with sched.slot_async("explain"):
+            batch = asyncio.create_task(call("summary"))
+            await asyncio.sleep(0.1)
+            interactive = asyncio.create_task(call("transcribe"))
+            await asyncio.sleep(0)
+        await asyncio.gather(batch, interactive)
+
+    asyncio.run(main())
+    assert order == ["summary", "transcribe"]
+
+
+def test_token_bucket_limits_rate():
+    sched = _sched(max_in_flight=10, rate_per_sec=20, burst=2)
+
+    async def main():
+        async def call():
+            async with sched.slot_async("vision"):
+                pass
+
+        start = time.monotonic()
+        await asyncio.gather(*(call() for _ in range(5)))
+        return time.monotonic() - start
+
+    # 2 from the burst, then 3 more at 20/s
+    assert asyncio.run(main()) >= 0.12
+    assert sched.stats()["classes"]["default"]["granted"] == 5
+
+
+def test_queue_timeout_raises_llm_busy():
+    sched = _sched(queue_timeout=0.05)
+    with sched.slot("summary"):
+        with pytest.raises(HTTPException) as ei:
+            with sched.slot("summary"):
+                pass
+        assert ei.value.status_code == 503
+        assert ei.value.detail["code"] == "llm_busy"
+
+        async def waiter():
+            async with sched.slot_async("explain"):
+                pass
+
+        with pytest.raises(HTTPException):
+            asyncio.run(waiter())
+    stats = sched.stats()
+    assert stats["in_flight"] == 0
+    assert stats["classes"]["batch"]["timeouts"] == 1
+    assert stats["classes"]["interactive"]["queue_depth"] == 0
+
+
+def test_cancelled_waiter_does_not_leak_slot():
+    sched = _sched()
+
+    async def main():
+        async def call():
+            async with sched.slot_async("summary"):
+                pass
+
+        async with sched.slot_async("summary"):
+            t = asyncio.create_task(call())
+            await asyncio.sleep(0.01)
+            t.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await t
+        await call()
+
+    asyncio.run(main())
+    assert sched.stats()["in_flight"] == 0
+
+
+def test_llm_metrics_endpoint():
+    r = client.get("/metrics/llm", headers={"Authorization": "Bearer devsecret123"})
+    assert r.status_code == 200
+    body = r.json()
+    assert set(body["scheduler"]["classes"]) == {"interactive", "default", "batch"}
+    assert "ops" in body["cache"]
@@ -17,6 +17,9 @@ def _reload_with_env(monkeypatch, provider: str, model: str = "gemini-1.5-pro",
     import app.services.llm_service as llm
     importlib.reload(cfg)
     importlib.reload(llm)
+    # Tests reuse prompts across different fake responses
+    from app.services.llm_cache import llm_cache
+    llm_cache.clear()
     return cfg, llm
 
 
@@ -108,3 +111,252 @@ def test_gemini_exception(monkeypatch):
     detail = getattr(exc.value, "detail", None)
     assert isinstance(detail, dict)
     assert detail.get("code") == "llm_error"
+
+
+def _install_fake_genai(model_cls):
+    fake_google = ModuleType("google")
+    fake_gen = ModuleType("google.generativeai")
+    fake_gen.configure_calls = []  # type: ignore[attr-defined]
+    fake_gen.configure = lambda api_key=None: fake_gen.configure_calls.append(api_key)  # type: ignore[attr-defined]
+    fake_gen.GenerativeModel = model_cls  # type: ignore[attr-defined]
+    sys.modules["google"] = fake_google
+    sys.modules["google.generativeai"] = fake_gen
+    return fake_gen
+
+
+def test_gemini_provider_pools_models_and_configures_once(monkeypatch):
+    created = []
+
+    class FakeModel:
+        def __init__(self, name, generation_config=None):
+            created.append((name, generation_config))
+
+        def generate_content(self, parts, generation_config=None, request_options=None):  # noqa: ARG002
+            class R:
+                text = _json.dumps({"qa": [], "cloze": [], "mc": [], "bullets": []})
+
+            return R()
+
+    fake_gen = _install_fake_genai(FakeModel)
+    cfg, llm = _reload_with_env(monkeypatch, provider="gemini")
+    llm.generate_flashcards("t", ["qa"], 1)
+    llm.generate_flashcards("t", ["qa"], 1)
+    llm.generate_summary("t")
+    llm.explain_topic("gravity", "eli5")
+    # One JSON-mode model shared by flashcards + summary, one plain model for explain
+    assert created == [("gemini-1.5-pro", {"response_mime_type": "application/json"}), ("gemini-1.5-pro", None)]
+    assert fake_gen.configure_calls == ["test-google-key"]
+
+
+def test_gemini_provider_async_native_and_timeout(monkeypatch):
+    import asyncio
+
+    calls = []
+
+    class FakeModel:
+        def __init__(self, name, generation_config=None):
+            pass
+
+        def generate_content(self, parts, **kwargs):  # noqa: ARG002
+            raise AssertionError("async path should not use the blocking call")
+
+        async def generate_content_async(self, parts, **kwargs):  # noqa: ARG002
+            calls.append(parts)
+            if "slow" in parts[0]:
+                await asyncio.sleep(5)
+
+            class R:
+                text = "async explanation"
+
+            return R()
+
+    _install_fake_genai(FakeModel)
+    cfg, llm = _reload_with_env(monkeypatch, provider="gemini")
+    assert asyncio.run(llm.explain_topic_async("gravity", "eli5")) == "async explanation"
+    assert len(calls) == 1
+
+    monkeypatch.setattr(cfg.settings, "REQUEST_TIMEOUT_SECONDS", 0.05)
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(llm.explain_topic_async("slow topic", "eli5"))
+    assert exc.value.status_code == 504
+    assert exc.value.detail["code"] == "LLM_TIMEOUT"
+
+
+def test_gemini_provider_streams_native_and_blocking(monkeypatch):
+    import asyncio
+
+    calls = []
+
+    class Chunk:
+        def __init__(self, text):
+            self.text = text
+
+    class NativeModel:
+        def __init__(self, name, generation_config=None):
+            pass
+
+        async def generate_content_async(self, parts, stream=False, **kwargs):  # noqa: ARG002
+            calls.append(("native", stream))
+
+            async def chunks():
+                for t in ["Inertia ", "is ", "laziness."]:
+                    yield Chunk(t)
+
+            return chunks()
+
+    class BlockingModel:
+        def __init__(self, name, generation_config=None):
+            pass
+
+        def generate_content(self, parts, stream=False, **kwargs):  # noqa: ARG002
+            calls.append(("blocking", stream))
+            return iter([Chunk("a "), Chunk(""), Chunk("b")])
+
+    async def collect(llm, topic):
+        return [p async for p in llm.explain_topic_stream(topic, "eli5")]
+
+    _install_fake_genai(NativeModel)
+    cfg, llm = _reload_with_env(monkeypatch, provider="gemini")
+    assert asyncio.run(collect(llm, "inertia")) == ["Inertia ", "is ", "laziness."]
+    # A completed stream is cached and replayed in one piece
+    assert asyncio.run(collect(llm, "inertia")) == ["Inertia is laziness."]
+    assert asyncio.run(llm.explain_topic_async("inertia", "eli5")) == "Inertia is laziness."
+    assert calls == [("native", True)]
+
+    _install_fake_genai(BlockingModel)
+    assert asyncio.run(collect(llm, "gravity")) == ["a ", "b"]
+    assert calls[-1] == ("blocking", True)
+
+
+def test_llm_cache_serves_repeat_prompts(monkeypatch):
+    calls = []
+
+    class FakeModel:
+        def __init__(self, name, generation_config=None):
+            pass
+
+        def generate_content(self, parts, **kwargs):  # noqa: ARG002
+            calls.append(parts)
+
+            class R:
+                text = f"explanation #{len(calls)}"
+
+            return R()
+
+    _install_fake_genai(FakeModel)
+    cfg, llm = _reload_with_env(monkeypatch, provider="gemini")
+    from app.services.llm_cache import llm_cache
+
+    first = llm.explain_topic("inertia", "eli5")
+    assert llm.explain_topic("inertia", "eli5") == first
+    assert llm.explain_topic("inertia", "analogy") != first
+    assert len(calls) == 2
+    stats = llm_cache.stats()["ops"]["explain"]
+    assert stats["hits"] == 1 and stats["misses"] == 2 and stats["stores"] == 2
+
+
+def test_flashcards_are_not_cached_by_default():
+    from app.core.config import Settings
+    from app.services.llm_cache import LLMCache
+
+    ttls = Settings().LLM_CACHE_TTLS
+    assert ttls["flashcards"] == 0 and ttls["explain"] > 0
+    cache = LLMCache(max_entries=8, ttls=ttls, default_ttl=3600)
+    cache.set("flashcards", "k", '{"qa": []}')
+    assert cache.get("flashcards", "k") is None
+
+
+def test_llm_cache_backend_tier_and_ttl():
+    import time
+    from app.services.llm_cache import LLMCache, cache_key
+
+    class DictBackend:
+        # Local stand-in for redis.Redis (get / set with ex=)
+        def __init__(self):
+            self.data = {}
+
+        def get(self, key):
+            return self.data.get(key)
+
+        def set(self, key, value, ex=None):
+            self.data[key] = value
+
+    backend = DictBackend()
+    key = cache_key("summary", "m", ["transcript"], {"response_mime_type": "application/json"})
+    writer = LLMCache(max_entries=8, ttls={"summary": 60, "flashcards": 0}, default_ttl=60, backend=backend)
+    writer.set("summary", key, '{"bullets": []}')
+    writer.set("flashcards", "k2", "{}")  # TTL 0: not cached
+    assert list(backend.data) == [key]
+
+    # A second process finds it in the shared tier, then serves it locally
+    reader = LLMCache(max_entries=8, ttls={"summary": 60}, default_ttl=60, backend=backend)
+    assert reader.get("summary", key) == '{"bullets": []}'
+    assert reader.get("summary", key) == '{"bullets": []}'
+    assert reader.stats()["ops"]["summary"]["backend_hits"] == 1
+    assert reader.stats()["ops"]["summary"]["hits"] == 1
+
+    local = LLMCache(max_entries=1, ttls={"explain": 60}, default_ttl=60)
+    local.set("explain", "a", "A")
+    local._lru["a"] = (time.monotonic() - 1, "A")  # expired
+    assert local.get("explain", "a") is None
+
+
+def test_split_windows_respects_budget_and_order():
+    from app.services.llm_service import split_windows
+
+    text = "\n".join(f"line {i:03d} " + "x" * 20 for i in range(100))
+    windows = split_windows(text, max_tokens=50)  # ~200 chars
+    assert len(windows) > 1
+    assert all(len(w) <= 200 for w in windows)
+    assert "\n".join(windows) == text
+    # Overlong single line is hard-split rather than dropped
+    assert "".join(split_windows("y" * 450, max_tokens=50)) == "y" * 450
+
+
+def test_summary_map_reduce_covers_whole_transcript(monkeypatch):
+    import asyncio
+    import threading
+
+    state = {"inflight": 0, "peak": 0, "map": 0, "reduce": 0}
+    lock = threading.Lock()
+
+    class FakeModel:
+        def __init__(self, name, generation_config=None):
+            pass
+
+        def generate_content(self, parts, **kwargs):  # noqa: ARG002
+            import time
+
+            with lock:
+                state["inflight"] += 1
+                state["peak"] = max(state["peak"], state["inflight"])
+            time.sleep(0.02)
+            prompt = parts[0]
+            if prompt.startswith("Merge"):
+                state["reduce"] += 1
+                partials = _json.loads(prompt.split("Partial summaries:\n", 1)[1])
+                bullets = [b for p in partials for b in p["bullets"]]
+            else:
+                state["map"] += 1
+                bullets = [ln.split()[1] for ln in prompt.split("Transcript:\n", 1)[1].splitlines() if ln.startswith("part")]
+            with lock:
+                state["inflight"] -= 1
+
+            class R:
+                text = _json.dumps({"bullets": bullets, "sections": [], "keywords": []})
+
+            return R()
+
+    _install_fake_genai(FakeModel)
+    cfg, llm = _reload_with_env(monkeypatch, provider="gemini")
+    monkeypatch.setattr(cfg.settings, "LLM_WINDOW_TOKENS", 100)
+    monkeypatch.setattr(cfg.settings, "LLM_MAP_CONCURRENCY", 3)
+
+    text = "\n".join(f"part {i} " + "z" * 150 for i in range(12))
+    out = asyncio.run(llm.generate_summary_async(text))
+    assert out["bullets"] == [str(i) for i in range(12)]  # nothing past the first window is lost
+    assert state["map"] == len(llm.split_windows(text, 100)) > 1 and state["reduce"] >= 1
+    assert 1 < state["peak"] <= 3
+
+    # Sync path produces the same result (served from cache this time)
+    assert llm.generate_summary(text) == out
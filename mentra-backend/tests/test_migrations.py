@@ -0,0 +1,89 @@
+from pathlib import Path
+
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config
+from alembic.migration import MigrationContext
+from sqlalchemy import create_engine, inspect, text
+
+from app.db.base import Base
+from app.db.fts import FTS_TABLE, include_object, install_fts
+from app.db.schema import create_schema
+from app.models import entities as _entities  # noqa: F401
+
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def _upgrade_head(url: str, stamp: str | None = None):
+    engine = create_engine(url, future=True)
+    cfg = Config(str(ROOT / "alembic.ini"))
+    cfg.set_main_option("script_location", str(ROOT / "alembic"))
+    with engine.begin() as conn:
+        cfg.attributes["connection"] = conn
+        if stamp:
+            command.stamp(cfg, stamp)
+        command.upgrade(cfg, "head")
+    return engine
+
+
+def _model_diff(engine):
+    with engine.connect() as conn:
+        ctx = MigrationContext.configure(conn, opts={"include_object": include_object})
+        return compare_metadata(ctx, Base.metadata)
+
+
+def test_migration_chain_matches_models(tmp_path):
+    engine = _upgrade_head(f"sqlite:///{tmp_path / 'mig.db'}")
+    assert _model_diff(engine) == []
+    # legacy placeholder tables from 0001/0002 are gone
+    assert "transcript_chunks" not in inspect(engine).get_table_names()
+    assert FTS_TABLE in inspect(engine).get_table_names()
+
+
+def test_hot_lookup_columns_are_indexed(tmp_path):
+    engine = _upgrade_head(f"sqlite:///{tmp_path / 'idx.db'}")
+    insp = inspect(engine)
+
+    def indexed(table: str, cols: list[str]) -> bool:
+        return any(ix["column_names"][: len(cols)] == cols for ix in insp.get_indexes(table))
+
+    assert indexed("transcript_chunk", ["session_id", "ts_start"])
+    assert indexed("flashcard", ["session_id"])
+    assert indexed("asset", ["session_id"])
+    assert indexed("quiz_attempt", ["session_id"])
+    assert indexed("session_course", ["course_id"])
+    assert indexed("flashcard_course", ["flashcard_id"])
+    assert indexed("proposed_calendar_item", ["status", "created_at"])
+
+
+def test_auto_created_database_can_be_stamped_and_upgraded(tmp_path):
+    url = f"sqlite:///{tmp_path / 'auto.db'}"
+    engine = create_engine(url, future=True)
+    # A database auto-created by the baseline build: no objects added since
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        for stmt in (
+            "DROP TABLE bookmark",
+            "DROP TABLE job",
+            "DROP INDEX uix_transcript_chunk_session_key",
+            "DROP INDEX ix_transcript_chunk_session_ts",
+            "ALTER TABLE transcript_chunk DROP COLUMN chunk_key",
+            "ALTER TABLE session DROP COLUMN summary_cursor",
+            "ALTER TABLE session DROP COLUMN summary_chunk_count",
+        ):
+            conn.execute(text(stmt))
+        conn.execute(text("INSERT INTO session (id, created_at, title, is_active) VALUES ('s1', '2026-01-01', 'Old', 1)"))
+
+    # Started once by the current build: the auto-create adds what create_all skips
+    create_schema(engine)
+    with engine.begin() as conn:
+        install_fts(conn)
+    assert {"summary_cursor", "summary_chunk_count"} <= {c["name"] for c in inspect(engine).get_columns("session")}
+
+    # Then handed to Alembic as the README describes
+    engine.dispose()
+    engine = _upgrade_head(url, stamp="0002_full_schema")
+    assert _model_diff(engine) == []
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT title, summary_chunk_count FROM session WHERE id = 's1'")).one() == ("Old", 0)
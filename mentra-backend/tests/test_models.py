@@ -12,3 +12,22 @@ def test_placeholder_models_import():
         FlashcardCourse,
     )  # noqa: F401
     assert True
+
+
+def test_async_session_sees_sync_writes():
+    import asyncio
+    from uuid import uuid4
+    from app.db.session import get_async_session, get_session
+    from app.models.entities import Session
+
+    sid = str(uuid4())
+    with get_session() as db:
+        db.add(Session(id=sid, title="Async", is_active=True))
+        db.commit()
+
+    async def _read():
+        async with get_async_session() as adb:
+            row = await adb.get(Session, sid)
+            return row.title if row else None
+
+    assert asyncio.run(_read()) == "Async"
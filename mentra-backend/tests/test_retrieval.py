@@ -0,0 +1,114 @@
+import asyncio
+from uuid import uuid4
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.retrieval import ChunkIndex, HashingEmbedder
+
+
+client = TestClient(app)
+AUTH = {"Authorization": "Bearer devsecret123"}
+WEBHOOK_HEADERS = {"X-Webhook-Token": "mentra_webhook_secret"}
+
+LECTURE = [
+    "Today we start with Newton's first law and inertia.",
+    "Inertia means an object resists changes to its motion.",
+    "Next, the syllabus and grading policy for the semester.",
+    "Homework is due every Friday before midnight.",
+    "Later we cover photosynthesis: chlorophyll absorbs light energy.",
+    "Photosynthesis turns carbon dioxide and water into glucose.",
+]
+
+
+def _ingest(sid, texts, start=0):
+    chunks = [{"text": t, "ts_start": start + i, "ts_end": start + i + 1} for i, t in enumerate(texts)]
+    r = client.post("/webhooks/mentra", headers=WEBHOOK_HEADERS, json={"session_id": sid, "chunks": chunks})
+    assert r.status_code == 200
+
+
+def test_hashing_embedder_is_deterministic_and_normalized():
+    emb = HashingEmbedder(dim=256)
+    a = emb.embed(["Inertia resists motion changes", ""])
+    b = emb.embed(["Inertia resists motion changes"])
+    assert a.shape == (2, 256) and a.dtype == np.float32
+    assert np.allclose(a[0], b[0])
+    assert np.isclose(np.linalg.norm(a[0]), 1.0)
+    assert not a[1].any()
+
+
+def test_index_returns_relevant_chunks_and_resyncs_incrementally():
+    from app.db.session import get_session
+    from app.models.entities import TranscriptChunk
+
+    index = ChunkIndex(HashingEmbedder(dim=512), max_sessions=4)
+    sid = str(uuid4())
+    _ingest(sid, LECTURE)
+    with get_session() as db:
+        hits = index.search(db, sid, "how does photosynthesis use chlorophyll?", 2)
+        assert {h.text for h in hits} == {LECTURE[4], LECTURE[5]}
+        assert hits[0].score >= hits[1].score > 0
+        assert index.embedded == len(LECTURE)
+        # Unchanged transcript: no rebuild
+        index.search(db, sid, "inertia", 2)
+        assert index.builds == 1
+
+    _ingest(sid, ["Mitochondria are the powerhouse of the cell."], start=len(LECTURE))
+    with get_session() as db:
+        hits = index.search(db, sid, "mitochondria powerhouse", 1)
+        assert hits[0].text.startswith("Mitochondria")
+        assert index.embedded == len(LECTURE) + 1  # only the new chunk
+
+        chunk = db.query(TranscriptChunk).filter(TranscriptChunk.session_id == sid, TranscriptChunk.ts_start == 2).one()
+        chunk.text = "Entropy always increases in an isolated system."
+        db.commit()
+        assert index.search(db, sid, "entropy isolated system", 1)[0].text.startswith("Entropy")
+        assert index.embedded == len(LECTURE) + 2
+        assert index.search(db, sid, "", 3) == []
+
+
+def test_embedder_is_pluggable():
+    from app.db.session import get_session
+
+    class KeywordEmbedder:
+        name = "keyword"
+
+        def embed(self, texts, query=False):
+            return np.array([[1.0, 0.0] if "homework" in t.lower() else [0.0, 1.0] for t in texts], dtype=np.float32)
+
+    index = ChunkIndex(KeywordEmbedder(), max_sessions=1)
+    sid = str(uuid4())
+    _ingest(sid, LECTURE)
+    with get_session() as db:
+        assert [h.text for h in index.search(db, sid, "homework?", 1)] == [LECTURE[3]]
+
+
+def test_explain_and_topic_flashcards_send_only_relevant_chunks(monkeypatch):
+    from app.services import llm_service
+    from app.services.flashcard_service import generate_session_flashcards
+
+    seen = {}
+
+    async def explain(topic, mode, context=None):
+        seen["explain"] = context
+        return "ok"
+
+    async def cards(text, types, max_per_type, pinned=()):
+        seen["cards"] = text
+        return {"qa": [], "cloze": [], "mc": []}
+
+    monkeypatch.setattr(llm_service, "explain_topic_async", explain)
+    monkeypatch.setattr(llm_service, "generate_flashcards_async", cards)
+    sid = str(uuid4())
+    _ingest(sid, LECTURE)
+
+    r = client.post(f"/sessions/{sid}/explain", headers=AUTH, json={"topic": "photosynthesis", "mode": "eli5"})
+    assert r.status_code == 200
+    assert seen["explain"] == "\n".join(LECTURE[4:6])
+
+    asyncio.run(generate_session_flashcards(sid, ["qa"], 1, topic="inertia"))
+    assert seen["cards"] == "\n".join(LECTURE[0:2])
+    # Without a topic the whole transcript is used
+    asyncio.run(generate_session_flashcards(sid, ["qa"], 1))
+    assert seen["cards"] == "\n".join(LECTURE)
@@ -0,0 +1,165 @@
+from fastapi.testclient import TestClient
+from uuid import uuid4
+from app.main import app
+
+
+client = TestClient(app)
+AUTH = {"Authorization": "Bearer devsecret123"}
+
+
+def _ingest(sid, texts):
+    r = client.post(
+        "/webhooks/mentra",
+        headers={"X-Webhook-Token": "mentra_webhook_secret"},
+        json={"session_id": sid, "chunks": [{"text": t, "ts_start": i, "ts_end": i + 1} for i, t in enumerate(texts)]},
+    )
+    assert r.status_code == 200
+
+
+def test_timeline_search_is_ranked_and_highlighted():
+    from app.db import fts
+
+    assert fts.enabled  # SQLite in tests ships FTS5
+    sid = str(uuid4())
+    _ingest(sid, [
+        "Newton mowed the lawn.",
+        "Inertia appears once here.",
+        "Inertia, inertia and more inertia: the law of inertia.",
+        "Forces cause acceleration.",
+    ])
+    r = client.get(f"/sessions/{sid}/timeline", params={"q": "inertia"}, headers=AUTH)
+    assert r.status_code == 200
+    chunks = r.json()["chunks"]
+    assert [c["text"] for c in chunks] == ["Inertia, inertia and more inertia: the law of inertia.", "Inertia appears once here."]
+    assert chunks[0]["rank"] > chunks[1]["rank"]
+    assert "<mark>Inertia</mark>" in chunks[1]["snippet"]
+
+    # word boundaries: "law" must not match "lawn"; stemming: "forced" matches "Forces"
+    r = client.get(f"/sessions/{sid}/timeline", params={"q": "law"}, headers=AUTH)
+    assert [c["text"] for c in r.json()["chunks"]] == ["Inertia, inertia and more inertia: the law of inertia."]
+    r = client.get(f"/sessions/{sid}/timeline", params={"q": "forced"}, headers=AUTH)
+    assert [c["text"] for c in r.json()["chunks"]] == ["Forces cause acceleration."]
+
+
+def test_timeline_search_is_scoped_and_tolerates_syntax():
+    sid, other = str(uuid4()), str(uuid4())
+    _ingest(sid, ["gravity pulls"])
+    _ingest(other, ["gravity everywhere"])
+    r = client.get(f"/sessions/{sid}/timeline", params={"q": 'gravity" (*'}, headers=AUTH)
+    assert r.status_code == 200
+    assert [c["text"] for c in r.json()["chunks"]] == ["gravity pulls"]
+    assert r.json()["truncated"] is False
+
+
+def test_timeline_search_reports_truncation_and_rejects_paging():
+    sid = str(uuid4())
+    _ingest(sid, [f"vector {i}" for i in range(5)])
+    r = client.get(f"/sessions/{sid}/timeline", params={"q": "vector", "limit": 3}, headers=AUTH)
+    body = r.json()
+    assert len(body["chunks"]) == 3 and body["truncated"] is True and body["next_cursor"] is None
+    r = client.get(f"/sessions/{sid}/timeline", params={"q": "vector", "limit": 5}, headers=AUTH)
+    assert r.json()["truncated"] is False
+    for params in ({"cursor": "x"}, {"tag": "exam"}, {"fields": "id"}):
+        r = client.get(f"/sessions/{sid}/timeline", params={"q": "vector", **params}, headers=AUTH)
+        assert r.status_code == 400 and r.json()["detail"]["code"] == "invalid_search"
+
+
+def test_search_index_follows_updates_and_deletes():
+    from app.db.session import get_session
+    from app.models.entities import TranscriptChunk
+    from app.services.transcript_service import search_chunks
+
+    sid = str(uuid4())
+    _ingest(sid, ["momentum is conserved", "energy is conserved"])
+    with get_session() as db:
+        c = db.query(TranscriptChunk).filter(TranscriptChunk.session_id == sid, TranscriptChunk.text.like("momentum%")).one()
+        c.text = "impulse changes things"
+        db.query(TranscriptChunk).filter(TranscriptChunk.session_id == sid, TranscriptChunk.text.like("energy%")).delete(synchronize_session=False)
+        db.commit()
+        assert search_chunks(db, sid, "conserved") == []
+        assert [h["text"] for h in search_chunks(db, sid, "impulse")] == ["impulse changes things"]
+
+
+def test_search_index_survives_rowid_renumbering():
+    from sqlalchemy import text
+    from app.db.session import get_session
+    from app.services.transcript_service import search_chunks
+
+    sid, other = str(uuid4()), str(uuid4())
+    _ingest(sid, ["torque twists the wheel", "angular momentum"])
+    _ingest(other, ["unrelated chatter"])
+    with get_session() as db:
+        # What VACUUM may do to a table without an INTEGER PRIMARY KEY
+        db.execute(text("UPDATE transcript_chunk SET rowid = rowid + 1000000 WHERE session_id = :sid"), {"sid": sid})
+        db.commit()
+        assert [h["text"] for h in search_chunks(db, sid, "torque")] == ["torque twists the wheel"]
+        assert search_chunks(db, other, "unrelated")[0]["text"] == "unrelated chatter"
+
+
+def test_timeline_keyset_pagination_and_projection():
+    sid = str(uuid4())
+    _ingest(sid, [f"chunk {i}" for i in range(7)])
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        params = {"limit": 3, "fields": "id,bookmarked"}
+        if cursor:
+            params["cursor"] = cursor
+        r = client.get(f"/sessions/{sid}/timeline", params=params, headers=AUTH)
+        assert r.status_code == 200
+        body = r.json()
+        pages += 1
+        assert all(set(c) == {"id", "bookmarked"} for c in body["chunks"])
+        seen.extend(c["id"] for c in body["chunks"])
+        cursor = body["next_cursor"]
+        if not cursor:
+            break
+    assert pages == 3 and len(seen) == len(set(seen)) == 7
+
+    full = client.get(f"/sessions/{sid}/timeline", params={"fields": "id,text,ts_start"}, headers=AUTH).json()
+    assert [c["id"] for c in full["chunks"]] == seen
+    assert [c["ts_start"] for c in full["chunks"]] == [float(i) for i in range(7)]
+    assert full["next_cursor"] is None
+
+    r = client.get(f"/sessions/{sid}/timeline", params={"cursor": "garbage!"}, headers=AUTH)
+    assert r.status_code == 400
+    r = client.get(f"/sessions/{sid}/timeline", params={"fields": "id,password"}, headers=AUTH)
+    assert r.status_code == 400
+
+
+def test_timeline_ndjson_stream():
+    import json
+
+    sid = str(uuid4())
+    _ingest(sid, ["a", "b", "c"])
+    with client.stream("GET", f"/sessions/{sid}/timeline", params={"format": "ndjson", "fields": "id,text"}, headers=AUTH) as r:
+        assert r.status_code == 200
+        assert r.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in r.iter_lines() if line]
+    assert [l["chunk"]["text"] for l in lines if "chunk" in l] == ["a", "b", "c"]
+    for params in ({"q": "a"}, {"limit": 2}, {"cursor": "x"}):
+        r = client.get(f"/sessions/{sid}/timeline", params={"format": "ndjson", **params}, headers=AUTH)
+        assert r.status_code == 400 and r.json()["detail"]["code"] == "invalid_format"
+
+
+def test_bookmark_range_updates_in_one_statement_and_persists_tag():
+    sid = str(uuid4())
+    _ingest(sid, ["intro", "definition", "example", "recap"])  # ts 0-1, 1-2, 2-3, 3-4
+    r = client.post(f"/sessions/{sid}/bookmark", headers=AUTH, data={"ts_start": "1", "ts_end": "3", "tag": "exam"})
+    assert r.status_code == 200
+    body = r.json()
+    assert body["updated"] == 2 and body["tag"] == "exam" and body["bookmark_id"]
+
+    r = client.get(f"/sessions/{sid}/bookmarks", params={"tag": "exam"}, headers=AUTH)
+    assert [(b["ts_start"], b["ts_end"], b["tag"]) for b in r.json()] == [(1.0, 3.0, "exam")]
+
+    r = client.get(f"/sessions/{sid}/timeline", params={"tag": "exam"}, headers=AUTH)
+    assert [c["text"] for c in r.json()["chunks"]] == ["definition", "example"]
+    r = client.get(f"/sessions/{sid}/timeline", params={"bookmarked": True}, headers=AUTH)
+    assert [c["text"] for c in r.json()["chunks"]] == ["definition", "example"]
+
+    for start, end in (("x", "3"), ("3", "1"), ("nan", "3"), ("0", "inf")):
+        r = client.post(f"/sessions/{sid}/bookmark", headers=AUTH, data={"ts_start": start, "ts_end": end})
+        assert r.status_code == 400 and r.json()["detail"]["code"] == "invalid_range"
+    r = client.get(f"/sessions/{sid}/bookmarks", headers=AUTH)
+    assert len(r.json()) == 1
@@ -0,0 +1,119 @@
+import asyncio
+import base64
+import time
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from app.services import email_extract, gemini_provider, llm_service, transcribe_service, vision_service
+from app.services.circuit_breaker import breakers
+from app.services.llm_cache import llm_cache
+from app.services.sim_llm import DeadlineExceeded, ResourceExhausted, SimClient, classify
+
+
+def _cfg(**kw):
+    opts = dict(
+        LLM_SIM_LATENCY_MS={"default": 20},
+        LLM_SIM_LATENCY_DIST="constant",
+        LLM_SIM_LATENCY_SIGMA=0.6,
+        LLM_SIM_TOKENS_PER_SEC=1e6,
+        LLM_SIM_PREFILL_TOKENS_PER_SEC=1e6,
+        LLM_SIM_ERROR_RATE=0.0,
+        LLM_SIM_MAX_CONCURRENCY=0,
+        LLM_SIM_SEED=7,
+    )
+    opts.update(kw)
+    return SimpleNamespace(**opts)
+
+
+@pytest.fixture
+def sim(monkeypatch):
+    """Route the provider to the simulator; every module's settings object is patched
+    because test_llm_service reloads app.core.config."""
+    objs = {id(m.settings): m.settings for m in (llm_service, transcribe_service, vision_service, email_extract)}
+    objs[id(gemini_provider._settings())] = gemini_provider._settings()
+    for obj in objs.values():
+        for key, value in vars(_cfg()).items():
+            monkeypatch.setattr(obj, key, value)
+        monkeypatch.setattr(obj, "LLM_SIM", True)
+        monkeypatch.setattr(obj, "DEV_FAKE_LLM", False)
+    gemini_provider.reset()
+    llm_cache.clear()
+    breakers.reset()
+    yield gemini_provider.get_client()
+    gemini_provider.reset()
+    llm_cache.clear()
+    breakers.reset()
+
+
+def test_services_parse_simulated_responses(sim):
+    started = time.monotonic()
+    cards = asyncio.run(llm_service.generate_flashcards_async("Newton's laws of motion", ["qa", "mc"], 2))
+    assert len(cards["qa"]) == 2 and cards["mc"][0]["answer"]["choices"]
+    summary = asyncio.run(llm_service.generate_summary_async("Lecture about inertia and force"))
+    assert summary["bullets"] and summary["keywords"]
+    assert asyncio.run(llm_service.explain_topic_async("gravity", "eli5"))
+    assert time.monotonic() - started >= 0.06  # three calls at 20ms each
+
+    # Two seconds of 16 kHz PCM → ~5 words
+    wav = b"RIFF" + bytes(44 + 64000 - 4)
+    words = asyncio.run(transcribe_service.transcribe_wav_bytes_async(wav)).split()
+    assert 3 <= len(words) <= 7
+    assert asyncio.run(vision_service.analyze_image_async(b"\x89PNG fake")).startswith("Whiteboard notes:")
+    assert email_extract.extract_from_email("Project sync", "Tomorrow 3pm")["confidence"] == 0.8
+    assert sim.stats()["calls"] == 6
+
+
+def test_streaming_arrives_at_token_rate(sim, monkeypatch):
+    monkeypatch.setattr(sim, "tokens_per_sec", 2000.0)
+
+    async def collect():
+        out = []
+        async for piece in llm_service.explain_topic_stream("entropy", "technical"):
+            out.append((time.monotonic(), piece))
+        return out
+
+    pieces = asyncio.run(collect())
+    assert len(pieces) > 5
+    span = pieces[-1][0] - pieces[0][0]
+    tokens = sum(len(p) for _, p in pieces) / 4
+    assert span >= 0.5 * tokens / 2000.0
+
+
+def test_error_rate_surfaces_as_llm_error(sim, monkeypatch):
+    monkeypatch.setattr(sim, "error_rate", 1.0)
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(llm_service.explain_topic_async("gravity", "eli5"))
+    assert exc.value.status_code == 502 and "simulated" in exc.value.detail["detail"]
+
+
+def test_latency_distribution_concurrency_limit_and_timeout():
+    client = SimClient(_cfg(LLM_SIM_LATENCY_MS={"explain": 100}, LLM_SIM_LATENCY_DIST="lognormal", LLM_SIM_SEED=1))
+    samples = sorted(client._latency("explain") for _ in range(2000))
+    assert 0.08 < samples[1000] < 0.12  # median
+    assert samples[1980] > 2.5 * samples[1000]  # heavy tail
+    assert SimClient(_cfg(LLM_SIM_SEED=1))._latency("x") == SimClient(_cfg(LLM_SIM_SEED=1))._latency("x")
+
+    client = SimClient(_cfg(LLM_SIM_LATENCY_MS={"default": 100}, LLM_SIM_MAX_CONCURRENCY=1))
+    model = client.GenerativeModel("gemini-sim")
+
+    async def two():
+        return await asyncio.gather(model.generate_content_async("a"), model.generate_content_async("b"), return_exceptions=True)
+
+    results = asyncio.run(two())
+    assert sum(isinstance(r, ResourceExhausted) for r in results) == 1
+    assert client.stats()["peak_in_flight"] == 1 and client.stats()["in_flight"] == 0
+
+    with pytest.raises(DeadlineExceeded) as exc:
+        model.generate_content("slow", request_options={"timeout": 0.01})
+    assert gemini_provider.is_timeout(exc.value)
+
+
+def test_classify_by_parts():
+    audio = {"mime_type": "audio/wav", "data": base64.b64encode(bytes(32000)).decode()}
+    kind, _, tokens = classify(["Transcribe", audio])
+    assert kind == "transcribe" and tokens >= 32
+    assert classify([{"role": "user", "parts": [{"text": "x"}, {"inline_data": {"mime_type": "image/png", "data": "AA=="}}]}])[0] == "vision"
+    assert classify(["Return strictly JSON with keys 'qa', 'cloze', 'mc'."])[0] == "flashcards"
+    assert classify(["Why is the sky blue?"])[0] == "explain"
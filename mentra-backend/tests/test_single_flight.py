@@ -0,0 +1,124 @@
+import asyncio
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.single_flight import SingleFlight
+
+
+client = TestClient(app)
+WEBHOOK_HEADERS = {"X-Webhook-Token": "mentra_webhook_secret"}
+
+
+def _ingest(sid):
+    r = client.post("/webhooks/mentra", headers=WEBHOOK_HEADERS, json={"session_id": sid, "chunks": [{"text": "inertia", "ts_start": 0, "ts_end": 1}]})
+    assert r.status_code == 200
+
+
+def test_concurrent_flashcard_requests_share_one_generation(monkeypatch):
+    from app.db.session import get_session
+    from app.models.entities import Flashcard
+    from app.services import llm_service
+    from app.services.flashcard_service import generate_session_flashcards
+
+    calls = []
+
+    async def cards(text, types, max_per_type, pinned=()):
+        calls.append(text)
+        await asyncio.sleep(0.05)
+        return {"qa": [{"question": "What is inertia?", "answer": "Resistance", "source_ts": 0}], "cloze": [], "mc": []}
+
+    monkeypatch.setattr(llm_service, "generate_flashcards_async", cards)
+    sid = str(uuid4())
+    _ingest(sid)
+
+    async def main():
+        return await asyncio.gather(*(generate_session_flashcards(sid, ["qa"], 1) for _ in range(3)))
+
+    results = asyncio.run(main())
+    assert len(calls) == 1
+    assert results[0] == results[1] == results[2]
+    with get_session() as db:
+        assert db.query(Flashcard).filter(Flashcard.session_id == sid).count() == 1
+
+    # Different parameters are a different flight
+    async def mixed():
+        return await asyncio.gather(generate_session_flashcards(sid, ["qa"], 1), generate_session_flashcards(sid, ["qa"], 2))
+
+    asyncio.run(mixed())
+    assert len(calls) == 3
+
+
+def test_concurrent_summary_and_explain_requests_are_coalesced(monkeypatch):
+    from app.api import routes
+    from app.services import llm_service
+    from app.services.summary_service import generate_session_summary
+
+    calls = {"summary": 0, "explain": 0}
+
+    async def summary(text, pinned=()):
+        calls["summary"] += 1
+        await asyncio.sleep(0.05)
+        return {"bullets": [text], "sections": [], "keywords": []}
+
+    async def explain(topic, mode, context=None):
+        calls["explain"] += 1
+        await asyncio.sleep(0.05)
+        return f"{mode}: {topic}"
+
+    monkeypatch.setattr(llm_service, "generate_summary_async", summary)
+    monkeypatch.setattr(llm_service, "explain_topic_async", explain)
+    sid = str(uuid4())
+    _ingest(sid)
+
+    async def main():
+        s = await asyncio.gather(*(generate_session_summary(sid) for _ in range(3)))
+        e = await asyncio.gather(*(routes.explain_topic(sid, {"topic": "inertia", "mode": "eli5"}, True) for _ in range(3)))
+        return s, e
+
+    summaries, explanations = asyncio.run(main())
+    assert calls == {"summary": 1, "explain": 1}
+    assert all(s["bullets"] == ["inertia"] for s in summaries)
+    assert all(e["explanation"] == "eli5: inertia" for e in explanations)
+
+
+def test_errors_are_shared_and_not_cached():
+    flights = SingleFlight()
+    calls = []
+
+    async def boom():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise HTTPException(status_code=502, detail={"detail": "boom", "code": "llm_error"})
+
+    async def main():
+        results = await asyncio.gather(*(flights.do("k", boom) for _ in range(2)), return_exceptions=True)
+        assert all(isinstance(r, HTTPException) for r in results)
+        assert flights.in_flight() == 0
+        with pytest.raises(HTTPException):
+            await flights.do("k", boom)
+
+    asyncio.run(main())
+    assert len(calls) == 2
+    assert (flights.started, flights.joined) == (2, 1)
+
+
+def test_cancelled_caller_does_not_cancel_shared_call():
+    flights = SingleFlight()
+
+    async def slow():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def main():
+        first = asyncio.create_task(flights.do("k", slow))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(flights.do("k", slow))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(main()) == "done"
@@ -0,0 +1,116 @@
+import json
+from uuid import uuid4
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.json_stream import JSONItemStream
+
+
+client = TestClient(app)
+AUTH = {"Authorization": "Bearer devsecret123"}
+WEBHOOK_HEADERS = {"X-Webhook-Token": "mentra_webhook_secret"}
+
+SUMMARY = {
+    "bullets": ["Inertia resists \"change\"", "Force causes acceleration"],
+    "sections": [{"title": "Laws", "points": ["First", "Second"]}],
+    "keywords": ["inertia"],
+}
+
+
+def _events(text):
+    out = []
+    for frame in text.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in frame.splitlines())
+        out.append((lines["event"], json.loads(lines["data"])))
+    return out
+
+
+def _stream_llm(monkeypatch, pieces):
+    from app.services import gemini_provider, llm_service
+
+    async def fake_stream(op, parts, **kwargs):
+        for p in pieces:
+            if isinstance(p, Exception):
+                raise p
+            yield p
+
+    monkeypatch.setattr(llm_service.settings, "DEV_FAKE_LLM", False)
+    monkeypatch.setattr(gemini_provider, "stream_text_async", fake_stream)
+
+
+def _ingest(sid):
+    r = client.post("/webhooks/mentra", headers=WEBHOOK_HEADERS, json={"session_id": sid, "chunks": [{"text": "inertia", "ts_start": 0, "ts_end": 1}]})
+    assert r.status_code == 200
+
+
+def test_json_item_stream_emits_elements_as_they_complete():
+    raw = "```json\n" + json.dumps(SUMMARY) + "\n```"
+    acc = JSONItemStream()
+    seen = []
+    first_at = None
+    for i, ch in enumerate(raw):
+        items = acc.feed(ch)
+        if items and first_at is None:
+            first_at = i
+        seen.extend(items)
+    assert seen == [
+        ("bullets", SUMMARY["bullets"][0]),
+        ("bullets", SUMMARY["bullets"][1]),
+        ("sections", SUMMARY["sections"][0]),
+        ("keywords", "inertia"),
+    ]
+    assert first_at < len(raw) // 3
+    assert acc.text == raw
+
+
+def test_explain_stream_forwards_tokens(monkeypatch):
+    _stream_llm(monkeypatch, ["Inertia ", "is ", "laziness."])
+    sid = str(uuid4())
+    _ingest(sid)
+    r = client.post(f"/sessions/{sid}/explain:stream", headers=AUTH, json={"topic": "inertia", "mode": "eli5"})
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/event-stream")
+    events = _events(r.text)
+    assert [e for e, _ in events] == ["token", "token", "token", "done"]
+    assert events[-1][1]["explanation"] == "Inertia is laziness."
+
+
+def test_summary_stream_emits_items_then_persists(monkeypatch):
+    from app.db.session import get_session
+    from app.models.entities import Session
+
+    raw = json.dumps(SUMMARY)
+    _stream_llm(monkeypatch, [raw[i : i + 7] for i in range(0, len(raw), 7)])
+    sid = str(uuid4())
+    _ingest(sid)
+    r = client.post(f"/sessions/{sid}/summary:generate-stream", headers=AUTH)
+    assert r.status_code == 200
+    events = _events(r.text)
+    assert [d["field"] for e, d in events if e == "item"] == ["bullets", "bullets", "sections", "keywords"]
+    assert events[-1] == ("done", SUMMARY)
+    with get_session() as db:
+        assert json.loads(db.get(Session, sid).summary_json) == SUMMARY
+
+
+def test_stream_errors(monkeypatch):
+    from app.core.security import api_error
+
+    sid = str(uuid4())
+    _ingest(sid)
+    try:
+        api_error("LLM timeout", code="LLM_TIMEOUT", status_code=504)
+    except Exception as e:
+        timeout = e
+
+    # Before the first token: a normal HTTP error
+    _stream_llm(monkeypatch, [timeout])
+    r = client.post(f"/sessions/{sid}/explain:stream", headers=AUTH, json={"topic": "x"})
+    assert r.status_code == 504
+    assert r.json()["detail"]["code"] == "LLM_TIMEOUT"
+
+    # Mid-stream: an error event
+    _stream_llm(monkeypatch, ["partial ", timeout])
+    r = client.post(f"/sessions/{sid}/explain:stream", headers=AUTH, json={"topic": "x"})
+    assert r.status_code == 200
+    assert _events(r.text) == [("token", {"text": "partial "}), ("error", {"detail": "LLM timeout", "code": "LLM_TIMEOUT"})]
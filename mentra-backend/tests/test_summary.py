@@ -0,0 +1,82 @@
+import asyncio
+import json
+from uuid import uuid4
+
+from fastapi.testclient import TestClient
+from app.main import app
+
+
+client = TestClient(app)
+WEBHOOK_HEADERS = {"X-Webhook-Token": "mentra_webhook_secret"}
+
+
+def _ingest(sid, chunks):
+    r = client.post("/webhooks/mentra", headers=WEBHOOK_HEADERS, json={"session_id": sid, "chunks": chunks})
+    assert r.status_code == 200
+
+
+def _fake_llm(monkeypatch):
+    from app.services import llm_service
+
+    seen = {"summarized": [], "merged": 0}
+
+    async def fake_summary(text, pinned=()):
+        seen["summarized"].append(text)
+        return {"bullets": text.splitlines(), "sections": [], "keywords": []}
+
+    async def fake_merge(partials):
+        seen["merged"] += 1
+        return llm_service._union_summaries(partials)
+
+    monkeypatch.setattr(llm_service, "generate_summary_async", fake_summary)
+    monkeypatch.setattr(llm_service, "merge_summaries_async", fake_merge)
+    return seen
+
+
+def test_incremental_summary_only_sends_delta(monkeypatch):
+    from app.db.session import get_session
+    from app.models.entities import Session
+    from app.services.summary_service import generate_session_summary
+
+    seen = _fake_llm(monkeypatch)
+    sid = str(uuid4())
+    _ingest(sid, [{"text": f"minute {i}", "ts_start": i, "ts_end": i + 1} for i in range(3)])
+
+    out = asyncio.run(generate_session_summary(sid, incremental=True))  # no watermark yet: full run
+    assert out["bullets"] == ["minute 0", "minute 1", "minute 2"]
+
+    _ingest(sid, [{"text": "minute 3", "ts_start": 3, "ts_end": 4}])
+    out = asyncio.run(generate_session_summary(sid, incremental=True))
+    assert seen["summarized"][-1] == "minute 3"
+    assert seen["merged"] == 1
+    assert out["bullets"] == ["minute 0", "minute 1", "minute 2", "minute 3"]
+
+    # Nothing new: stored summary is returned without any LLM call
+    calls = len(seen["summarized"])
+    assert asyncio.run(generate_session_summary(sid, incremental=True)) == out
+    assert len(seen["summarized"]) == calls
+
+    with get_session() as db:
+        ses = db.get(Session, sid)
+        assert ses.summary_chunk_count == 4
+        assert json.loads(ses.summary_json) == out
+
+
+def test_incremental_summary_falls_back_to_full_on_late_chunks(monkeypatch):
+    from app.services.summary_service import generate_session_summary
+
+    seen = _fake_llm(monkeypatch)
+    sid = str(uuid4())
+    _ingest(sid, [{"text": "b", "ts_start": 5, "ts_end": 6}])
+    asyncio.run(generate_session_summary(sid))
+    # Arrives behind the watermark; a delta run would miss it
+    _ingest(sid, [{"text": "a", "ts_start": 1, "ts_end": 2}])
+    out = asyncio.run(generate_session_summary(sid, incremental=True))
+    assert seen["summarized"][-1] == "a\nb"
+    assert seen["merged"] == 0
+    assert out["bullets"] == ["a", "b"]
+
+
+def test_summary_mode_is_validated():
+    r = client.post(f"/sessions/{uuid4()}/summary:generate-sync?mode=bogus", headers={"Authorization": "Bearer devsecret123"})
+    assert r.status_code == 422
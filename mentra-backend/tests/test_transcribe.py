@@ -1,8 +1,11 @@
 import io
 import json
+
 from fastapi.testclient import TestClient
 from app.main import app
 
+from audio_utils import utterance
+
 client = TestClient(app)
 
 
@@ -39,9 +42,9 @@ def test_websocket_live_audio_streaming_basic():
     assert r.status_code == 200
     sid = r.json()["id"]
 
-    # Connect to WebSocket and send a binary frame > threshold to trigger transcription
+    # Connect to WebSocket and send one spoken utterance to trigger transcription
     with client.websocket_connect(f"/ws/sessions/{sid}/live-audio") as ws:
-        ws.send_bytes(b"\x00" * 20000)
+        ws.send_bytes(utterance())
         resp = ws.receive_json()
         assert "transcript" in resp and isinstance(resp["transcript"], str)
 
@@ -0,0 +1,101 @@
+from fastapi.testclient import TestClient
+from uuid import uuid4
+from app.main import app
+
+
+client = TestClient(app)
+WEBHOOK_HEADERS = {"X-Webhook-Token": "mentra_webhook_secret"}
+
+
+def _ingest(sid, chunks):
+    r = client.post("/webhooks/mentra", headers=WEBHOOK_HEADERS, json={"session_id": sid, "chunks": chunks})
+    assert r.status_code == 200
+
+
+def _rebuilt(sid):
+    from app.db.session import get_session
+    from app.models.entities import TranscriptChunk
+
+    with get_session() as db:
+        rows = db.query(TranscriptChunk).filter(TranscriptChunk.session_id == sid).order_by(TranscriptChunk.ts_start, TranscriptChunk.id).all()
+        return "\n".join(c.text for c in rows)
+
+
+def test_transcript_cache_appends_on_ingest_without_rebuild():
+    from app.db.session import get_session
+    from app.services.transcript_cache import transcript_cache
+
+    sid = str(uuid4())
+    _ingest(sid, [{"text": f"line {i}", "ts_start": i, "ts_end": i + 1} for i in range(3)])
+    with get_session() as db:
+        assert transcript_cache.get(db, sid) == "line 0\nline 1\nline 2"
+
+    _ingest(sid, [{"text": "line 3", "ts_start": 3, "ts_end": 4}])
+    misses = transcript_cache.misses
+    with get_session() as db:
+        assert transcript_cache.get(db, sid) == "line 0\nline 1\nline 2\nline 3"
+    assert transcript_cache.misses == misses  # served from the appended entry
+
+    # Retried chunk: nothing inserted, nothing appended
+    _ingest(sid, [{"text": "line 3", "ts_start": 3, "ts_end": 4}])
+    with get_session() as db:
+        assert transcript_cache.get(db, sid) == _rebuilt(sid)
+
+
+def test_transcript_cache_out_of_order_and_edits_invalidate():
+    from app.db.session import get_session
+    from app.models.entities import TranscriptChunk
+    from app.services.transcript_cache import transcript_cache
+
+    sid = str(uuid4())
+    _ingest(sid, [{"text": "b", "ts_start": 5, "ts_end": 6}])
+    with get_session() as db:
+        assert transcript_cache.get(db, sid) == "b"
+
+    _ingest(sid, [{"text": "a", "ts_start": 1, "ts_end": 2}])
+    with get_session() as db:
+        assert transcript_cache.get(db, sid) == "a\nb"
+
+    with get_session() as db:
+        chunk = db.query(TranscriptChunk).filter(TranscriptChunk.session_id == sid, TranscriptChunk.text == "a").one()
+        chunk.text = "A"
+        db.commit()
+    with get_session() as db:
+        assert transcript_cache.get(db, sid) == "A\nb"
+
+    # Rolled-back inserts never reach the cache
+    with get_session() as db:
+        db.add(TranscriptChunk(session_id=sid, text="c", ts_start=9, ts_end=10))
+        db.flush()
+        db.rollback()
+    with get_session() as db:
+        assert transcript_cache.get(db, sid) == "A\nb"
+
+
+def test_session_transcript_served_from_cache():
+    from app.db.session import get_session
+    from app.services.flashcard_service import get_session_transcript
+    from app.services.transcript_cache import transcript_cache
+
+    sid = str(uuid4())
+    _ingest(sid, [{"text": "Newton's first law is about inertia.", "ts_start": 0, "ts_end": 1}])
+    with get_session() as db:
+        assert get_session_transcript(db, sid) == "Newton's first law is about inertia."
+    _ingest(sid, [{"text": "Second law: F = m a.", "ts_start": 1, "ts_end": 2}])
+    hits = transcript_cache.hits
+    with get_session() as db:
+        assert get_session_transcript(db, sid) == _rebuilt(sid)
+    assert transcript_cache.hits == hits + 1
+
+
+def test_transcript_cache_evicts_by_size():
+    from app.services.transcript_cache import TranscriptCache, _Entry
+
+    cache = TranscriptCache(max_chars=10)
+    cache._store("a", _Entry("12345", None))
+    cache._store("b", _Entry("12345", None))
+    cache._store("c", _Entry("123", None))
+    assert "a" not in cache._entries and set(cache._entries) == {"b", "c"}
+    assert cache.stats()["chars"] == 8 and cache.evictions == 1
+    cache.append("c", [(1.0, "x", "45")])
+    assert cache._entries["c"].text == "45"  # empty-transcript entry: no leading newline
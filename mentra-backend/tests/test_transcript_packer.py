@@ -0,0 +1,106 @@
+import asyncio
+from uuid import uuid4
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.transcript_packer import clean, estimate_tokens, pack_text
+
+
+client = TestClient(app)
+AUTH = {"Authorization": "Bearer devsecret123"}
+WEBHOOK_HEADERS = {"X-Webhook-Token": "mentra_webhook_secret"}
+
+
+def test_pack_drops_filler_and_overlap():
+    text = "\n".join(
+        [
+            "(fake) hello world",
+            "   ",
+            "...",
+            "Newton's   first law\tsays objects keep moving",
+            "Newton's first law says objects keep moving",
+            "says objects keep moving unless a force acts",
+            "unless a force acts",
+            "Second law: F = ma",
+        ]
+    )
+    assert pack_text(text, None) == "\n".join(
+        [
+            "Newton's first law says objects keep moving",
+            "unless a force acts",
+            "Second law: F = ma",
+        ]
+    )
+
+
+def test_pack_keeps_short_chunks_contained_in_the_previous_one():
+    text = "The derivative of x squared is 2x\nderivative\nis 2x\nOK so the limit\nOK"
+    assert pack_text(text, None, pinned=["is 2x"]).split("\n") == [
+        "The derivative of x squared is 2x",
+        "derivative",
+        "is 2x",
+        "OK so the limit",
+        "OK",
+    ]
+    # A bookmarked chunk that repeats the previous chunk's tail is kept whole
+    seam = "so the force equals mass times acceleration"
+    assert pack_text(f"{seam}\nmass times acceleration", None, pinned=["mass times acceleration"]).split("\n") == [seam, "mass times acceleration"]
+    assert pack_text(f"{seam}\nmass times acceleration", None) == seam
+
+    # Repeats further apart are content, and a bookmarked repeat is kept even when adjacent
+    lines = ["Any questions?", "Newton second law F = ma.", "Any questions?"]
+    assert [p.text for p in clean(lines, pinned=["Any questions?"])] == lines
+    assert [p.text for p in clean(lines)] == lines
+    assert [p.text for p in clean(["Any questions?", "Any questions?"], pinned=["Any questions?"])] == ["Any questions?"] * 2
+    assert [p.text for p in clean(["[image-notes] board", "[image-notes] board"])] == ["[image-notes] board"] * 2
+
+
+def test_pack_keeps_pinned_and_image_notes_within_budget():
+    lines = [f"regular chunk number {i} about the lecture topic" for i in range(100)]
+    lines[70] = "exam question: derive the wave equation"
+    lines[90] = "[image-notes] whiteboard: E = mc^2"
+    budget = 200
+    out = pack_text("\n".join(lines), budget, pinned=["exam question: derive the wave equation"])
+    kept = out.split("\n")
+    assert sum(estimate_tokens(line) + 1 for line in kept) <= budget
+    assert lines[70] in kept and lines[90] in kept
+    # Remaining budget is spread across the lecture, in timeline order
+    idx = [lines.index(line) for line in kept]
+    assert idx == sorted(idx)
+    assert min(idx) < 20 and max(i for i in idx if i not in (70, 90)) > 80
+    # Under budget nothing is cut
+    assert pack_text("\n".join(lines), 0) == "\n".join(lines)
+
+
+def test_summary_prompt_is_packed_with_bookmarks_first(monkeypatch):
+    from app.services import llm_service, transcript_service
+    from app.services.summary_service import generate_session_summary
+
+    prompts = []
+
+    async def fake_call(op, parts, cfg=None):
+        prompts.append(parts[0])
+        return '{"bullets": [], "sections": [], "keywords": []}'
+
+    monkeypatch.setattr(llm_service.settings, "DEV_FAKE_LLM", False)
+    # Patch both objects: test_llm_service reloads app.core.config
+    for mod in (llm_service, transcript_service):
+        monkeypatch.setattr(mod.settings, "LLM_PROMPT_TOKEN_BUDGET", 120)
+    monkeypatch.setattr(llm_service, "_call_async", fake_call)
+    sid = str(uuid4())
+    chunks = [{"text": f"filler sentence {i} of the long lecture", "ts_start": i, "ts_end": i + 1} for i in range(60)]
+    chunks[45]["text"] = "IMPORTANT: the midterm covers chapters 3 to 5"
+    chunks.append({"text": "(fake) hello world", "ts_start": 61, "ts_end": 62})
+    r = client.post("/webhooks/mentra", headers=WEBHOOK_HEADERS, json={"session_id": sid, "chunks": chunks})
+    assert r.status_code == 200
+    r = client.post(f"/sessions/{sid}/bookmark", headers=AUTH, data={"ts_start": "45", "ts_end": "46"})
+    assert r.json()["updated"] == 1
+
+    asyncio.run(generate_session_summary(sid))
+    sent = "".join(prompts)
+    assert "IMPORTANT: the midterm covers chapters 3 to 5" in sent
+    assert "(fake)" not in sent
+    kept = [i for i in range(60) if f"filler sentence {i} " in sent]
+    assert len(kept) < 59
+    assert min(kept) < 15 and max(kept) >= 45